@@ -89,11 +89,18 @@ export class BookValidator {
 }
 
 
+export interface ImageVariant {
+    url: string
+    maxWidth: number | null
+    maxHeight: number | null
+}
+
 export interface Book {
     id: number
     userId: number
     title: string
     previewImage: string
+    previewVariants?: Record<string, ImageVariant>
     authors: string
     pages: number
     size: number
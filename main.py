@@ -9,6 +9,7 @@ from src.application.services.storage import AbstractStorage
 from src.domain.common.exceptions import AuthorizationError, DomainError, RepositoryError
 from src.infrastructure.celery import register_tasks
 from src.infrastructure.db.session_manager import db_manager
+from src.infrastructure.dependencies import get_storage
 from src.infrastructure.settings import settings
 from src.presentation.api.exception_handlers import (
     auth_error_handler,
@@ -23,6 +24,7 @@ from src.presentation.api.handlers.books import router as book_router
 from src.presentation.api.handlers.bookshelves import router as bookshelf_router
 from src.presentation.api.handlers.comments import router as comment_router
 from src.presentation.api.handlers.history import router as history_router
+from src.presentation.api.handlers.metrics import router as metrics_router
 from src.presentation.middlewares.logging import LoggingMiddleware
 
 
@@ -36,7 +38,10 @@ async def startup(app_instance: FastAPI):
     )
     await register_tasks()
     logger.info("Database initialized")
+    storage = get_storage()
+    await storage.connect()
     yield
+    await storage.close()
     logger.info("Closing database")
     await db_manager.close()
     logger.info("Database closed")
@@ -64,6 +69,8 @@ app.include_router(comment_router, prefix="/api/v1")
 app.include_router(history_router, prefix="/api/v1")
 app.include_router(bookshelf_router, prefix="/api/v1")
 app.include_router(admin_router, prefix="/api/v1")
+# Внутренние метрики без префикса /api/v1, доступны только с токеном METRICS_TOKEN.
+app.include_router(metrics_router)
 
 
 @app.get("/ping", tags=["health"])
@@ -1,8 +1,9 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields
 from datetime import datetime
 from typing import Self
 
-from src.domain.books.entities import Book
+from src.application.services.thumbnail import ImageVariant
+from src.domain.books.entities import Book, BookFacets, FacetBucket
 
 
 @dataclass(slots=True, kw_only=True)
@@ -30,6 +31,8 @@ class BaseBookDTO:
 @dataclass(slots=True, kw_only=True)
 class BookDTO(BaseBookDTO):
     tags: list[str]
+    preview_thumbnails: list[str] = field(default_factory=list)
+    preview_variants: dict[str, ImageVariant] = field(default_factory=dict)
 
     @classmethod
     def from_domain(cls, book: Book) -> Self:
@@ -50,6 +53,7 @@ class BookDTO(BaseBookDTO):
             private=book.private,
             language=book.language,
             tags=book.tags,
+            preview_thumbnails=book.preview_thumbnails,
         )
 
 
@@ -79,3 +83,34 @@ class DetailBookDTO(BaseBookDTO):
 class BookWithReadPagesDTO(BookDTO):
     read_pages: int | None = None
     last_time_read: datetime | None = None
+
+    @classmethod
+    def from_book_dto(cls, book: BookDTO) -> Self:
+        return cls(**{field_.name: getattr(book, field_.name) for field_ in fields(BookDTO)})
+
+
+@dataclass(slots=True, kw_only=True)
+class FacetBucketDTO:
+    value: str | int
+    count: int
+
+    @classmethod
+    def from_domain(cls, bucket: FacetBucket) -> Self:
+        return cls(value=bucket.value, count=bucket.count)
+
+
+@dataclass(slots=True, kw_only=True)
+class BookFacetsDTO:
+    tags: list[FacetBucketDTO]
+    publishers: list[FacetBucketDTO]
+    years: list[FacetBucketDTO]
+    languages: list[FacetBucketDTO]
+
+    @classmethod
+    def from_domain(cls, facets: BookFacets) -> Self:
+        return cls(
+            tags=[FacetBucketDTO.from_domain(bucket) for bucket in facets.tags],
+            publishers=[FacetBucketDTO.from_domain(bucket) for bucket in facets.publishers],
+            years=[FacetBucketDTO.from_domain(bucket) for bucket in facets.years],
+            languages=[FacetBucketDTO.from_domain(bucket) for bucket in facets.languages],
+        )
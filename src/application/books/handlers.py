@@ -1,3 +1,5 @@
+from dataclasses import replace
+
 from src.application.books.commands import (
     CreateBookCommand,
     DeleteBookCommand,
@@ -8,21 +10,32 @@ from src.application.books.commands import (
 )
 from src.application.books.dto import (
     BookDTO,
+    BookFacetsDTO,
     BookshelfLinkDTO,
     BookWithReadPagesDTO,
     DetailBookDTO,
     PublisherDTO,
     TagDTO,
 )
-from src.application.books.services import RecentBookService
+from src.application.books.services import BookCacheService, BookCountService, RecentBookService
+from src.application.services.cache import AbstractCache
+from src.application.services.memoize import cached, make_cache_key
+from src.application.services.single_flight import SingleFlight
 from src.application.services.storage import AbstractStorage
 from src.application.services.task_manager import TaskManager
-from src.domain.books.entities import Book, BookFilter, BookmarksQueryFilter
+from src.domain.books.entities import Book, BookCursor, BookFilter, BookmarksQueryFilter
 from src.domain.bookshelves.entities import BookshelfFilter
-from src.domain.common.exceptions import ObjectNotFoundError, PermissionDeniedError
+from src.domain.common.exceptions import PermissionDeniedError
 from src.domain.common.unit_of_work import UnitOfWork
 from src.domain.history.entities import BookReadHistoryFilter
 
+BOOK_DETAIL_CACHE_NAMESPACE = "book_detail"
+BOOK_LOOKUP_CACHE_NAMESPACES = ("book_publishers", "book_tags", "book_authors")
+
+
+def get_book_detail_cache_key(book_id: int) -> str:
+    return make_cache_key(BOOK_DETAIL_CACHE_NAMESPACE, book_id=book_id)
+
 
 class BookCommandHandler:
     def __init__(
@@ -31,11 +44,17 @@ class BookCommandHandler:
         storage: AbstractStorage,
         task_manager: TaskManager,
         recent_book_service: RecentBookService,
+        book_count_service: BookCountService,
+        book_cache_service: BookCacheService,
+        cache: AbstractCache,
     ) -> None:
         self.uow = uow
         self.storage = storage
         self.task_manager = task_manager
         self.recent_book_service = recent_book_service
+        self.book_count_service = book_count_service
+        self.book_cache_service = book_cache_service
+        self.cache = cache
 
     async def handle_create(self, cmd: CreateBookCommand) -> BookDTO:
         if not cmd.user.is_staff:
@@ -58,7 +77,7 @@ class BookCommandHandler:
                     tags=cmd.tags,
                 )
             )
-        await self.recent_book_service.delete_recent_books_cache()
+        await self._invalidate_cache(book.id, book.user_id)
         return await self._get_dto(book)
 
     async def handler_upload_file(self, cmd: UploadBookFileCommand) -> BookDTO:
@@ -69,6 +88,8 @@ class BookCommandHandler:
             book.size = cmd.file.size or 0
             book.file = (await self.storage.upload_book(cmd.file, cmd.book_id))[:512]
             await self.uow.books.update(book)
+        await self.cache.delete(get_book_detail_cache_key(book.id))
+        await self.book_cache_service.delete_books(book.id)
         await self.task_manager.run_task("create_book_preview_task", book.id)  # Отправляем задачу
         return await self._get_dto(book)
 
@@ -87,7 +108,7 @@ class BookCommandHandler:
             book.tags = cmd.tags
             await self.uow.books.update(book)
 
-        await self.recent_book_service.delete_recent_books_cache()
+        await self._invalidate_cache(book.id, book.user_id)
         return await self._get_dto(book)
 
     async def handle_delete(self, cmd: DeleteBookCommand) -> None:
@@ -98,7 +119,15 @@ class BookCommandHandler:
             await self.uow.books.delete(cmd.book_id)
             await self.uow.book_read_history.delete_for_book(cmd.book_id)
         await self.storage.delete_book(cmd.book_id)
-        await self.recent_book_service.delete_recent_books_cache()
+        await self._invalidate_cache(book.id, book.user_id)
+
+    async def _invalidate_cache(self, book_id: int, owner_id: int) -> None:
+        await self.cache.delete(get_book_detail_cache_key(book_id))
+        await self.book_cache_service.delete_books(book_id)
+        for namespace in BOOK_LOOKUP_CACHE_NAMESPACES:
+            await self.cache.invalidate_namespace(namespace)
+        await self.book_count_service.delete_count_cache()
+        await self.recent_book_service.refresh_recent_books(owner_id)
 
     async def _get_dto(self, book: Book) -> BookDTO:
         dto = BookDTO.from_domain(book)
@@ -108,11 +137,22 @@ class BookCommandHandler:
 
 class BookQueryHandler:
     def __init__(
-        self, uow: UnitOfWork, storage: AbstractStorage, recent_book_service: RecentBookService
+        self,
+        uow: UnitOfWork,
+        storage: AbstractStorage,
+        recent_book_service: RecentBookService,
+        book_count_service: BookCountService,
+        book_cache_service: BookCacheService,
+        cache: AbstractCache,
+        single_flight: SingleFlight | None = None,
     ) -> None:
         self.uow = uow
         self.storage = storage
         self.recent_book_service = recent_book_service
+        self.book_count_service = book_count_service
+        self.book_cache_service = book_cache_service
+        self.cache = cache
+        self.single_flight = single_flight
 
     async def handle_get_book(self, book_id: int) -> BookDTO:
         async with self.uow:
@@ -123,8 +163,8 @@ class BookQueryHandler:
         return book_dto
 
     async def handle_get_book_detail(self, book_id: int, viewer_id: int | None) -> DetailBookDTO:
+        book = await self._get_book_detail(book_id)
         async with self.uow:
-            book = await self.uow.books.get_by_id(book_id)
             if viewer_id is not None:
                 is_read = await self.uow.books.is_read_by_user(book_id, viewer_id)
                 is_favorite = await self.uow.books.is_favorite_by_user(book_id, viewer_id)
@@ -132,17 +172,40 @@ class BookQueryHandler:
                 is_read = False
                 is_favorite = False
 
-            book_tags = await self.uow.books.get_book_tags(book_id)
             bookshelves, _ = await self.uow.bookshelves.get_filtered(
                 BookshelfFilter(book_id=book_id, page=1, page_size=10, viewer_id=viewer_id)
             )
-        media_url = await self.storage.get_media_url(book.preview_image)
+
+        return replace(
+            book,
+            preview_image=await self.storage.get_media_url(book.preview_image),
+            favorite=is_favorite,
+            read=is_read,
+            bookshelves=[
+                BookshelfLinkDTO(
+                    id=bookshelf.id,
+                    name=bookshelf.name,
+                    private=bookshelf.private,
+                )
+                for bookshelf in bookshelves
+            ],
+        )
+
+    @cached(timeout=60 * 10, namespace=BOOK_DETAIL_CACHE_NAMESPACE, negative_timeout=30)
+    async def _get_book_detail(self, book_id: int) -> DetailBookDTO:
+        """
+        Возвращает не зависящую от пользователя часть описания книги.
+        В кеше хранится путь к превью, ссылка на него формируется при каждом запросе.
+        """
+        async with self.uow:
+            book = await self.uow.books.get_by_id(book_id)
+            book_tags = await self.uow.books.get_book_tags(book_id)
 
         return DetailBookDTO(
             id=book.id,
             title=book.title,
             user_id=book.user_id,
-            preview_image=media_url,
+            preview_image=book.preview_image,
             authors=book.authors,
             description=book.description,
             pages=book.pages,
@@ -150,59 +213,63 @@ class BookQueryHandler:
             year=book.year,
             private=book.private,
             language=book.language,
-            favorite=is_favorite,
-            read=is_read,
+            favorite=False,
+            read=False,
             publisher=PublisherDTO(
                 id=book.publisher.id,
                 name=book.publisher.name,
             ),
             tags=[TagDTO(id=tag.id, name=tag.name) for tag in book_tags],
-            bookshelves=[
-                BookshelfLinkDTO(
-                    id=bookshelf.id,
-                    name=bookshelf.name,
-                    private=bookshelf.private,
-                )
-                for bookshelf in bookshelves
-            ],
+            bookshelves=[],
         )
 
-    async def handle_get_list_books(self, query: BookFilter) -> tuple[list[BookDTO], int]:
-        books, count = await self.uow.books.get_filtered(query)
-        books_dto = []
-        for book in books:
-            dto = BookDTO.from_domain(book)
-            dto.preview_image = await self.storage.get_media_url(book.preview_image)
-            books_dto.append(dto)
-        return books_dto, count
-
-    async def handle_get_recent_books(self, user_id: int | None = None) -> list[BookDTO]:
+    async def handle_get_list_books(self, query: BookFilter) -> tuple[list[BookDTO], int, BookCursor | None]:
         """
-        Возвращает последние книги в порядке добавления.
+        Возвращает страницу книг по фильтру.
+        :return: Книги страницы, общее количество и курсор следующей страницы.
+        """
+        count = await self.book_count_service.get_count(query)
+        if count is not None:
+            page = await self.uow.books.get_filtered_id_list(query)
+        elif self.book_count_service.can_estimate(query):
+            page = await self.uow.books.get_filtered_id_list(query)
+            count = await self.uow.books.estimate_count()
+        else:
+            page, count = await self.uow.books.get_filtered_ids(query)
+            await self.book_count_service.set_count(query, count)
+
+        return await self.book_cache_service.get_books(self.uow, page.ids), count, page.next_cursor
+
+    async def handle_get_facets(self, query: BookFilter, limit: int = 20) -> BookFacetsDTO:
+        """
+        Возвращает количество найденных по фильтру книг в разрезе тегов, издательств, годов и языков.
+        :param query: Фильтр книг.
+        :param limit: Максимальное количество значений в каждом разрезе.
         """
-        query = BookFilter(viewer_id=user_id, page=1, page_size=25, sorted_by=["-id"])
-        cached_books = await self.recent_book_service.get_recent_books(query)
-        if cached_books is None:
+
+        async def load() -> BookFacetsDTO:
             async with self.uow:
-                books, _ = await self.uow.books.get_filtered(query)
-            cached_books = []
-            for book in books:
-                dto = BookDTO.from_domain(book)
-                dto.preview_image = await self.storage.get_media_url(book.preview_image)
-                cached_books.append(dto)
+                return BookFacetsDTO.from_domain(await self.uow.books.get_facets(query, limit))
 
-            await self.recent_book_service.set_recent_books(cached_books, query)
+        return await self.book_count_service.get_or_load_facets(query, load)
 
-        return cached_books
+    async def handle_get_recent_books(self, user_id: int | None = None) -> list[BookDTO]:
+        """
+        Возвращает последние книги в порядке добавления.
+        """
+        return await self.recent_book_service.get_recent_books(user_id)
 
+    @cached(timeout=60 * 10, namespace="book_publishers")
     async def handle_get_publishers(self, search: str | None, user_id: int | None) -> list[str]:
         async with self.uow:
             return await self.uow.books.get_publishers(search, user_id)
 
+    @cached(timeout=60 * 10, namespace="book_tags")
     async def handle_get_tags(self, search: str | None, user_id: int | None) -> list[str]:
         async with self.uow:
             return await self.uow.books.get_tags(search, user_id)
 
+    @cached(timeout=60 * 10, namespace="book_authors")
     async def handle_get_authors(self, search: str | None, user_id: int | None) -> list[str]:
         async with self.uow:
             return await self.uow.books.get_authors(search, user_id)
@@ -215,22 +282,19 @@ class BookQueryHandler:
                 BookReadHistoryFilter(user_id=user_id, page=page, page_size=page_size)
             )
             viewed_books_map = {book.book_id: book for book in last_viewed_books}
-            books_data, count = await self.uow.books.get_filtered(
-                BookFilter(ids_in=list(viewed_books_map.keys()), page=page, page_size=page_size)
-            )
-            results = []
-            for book in books_data:
-                if book.id not in viewed_books_map:
-                    raise ObjectNotFoundError(f"Book with id {book.id} not found in viewed books map")
-                dto = BookWithReadPagesDTO.from_domain(book)
-                dto.preview_image = await self.storage.get_media_url(book.preview_image)
-                if viewed_books_map.get(book.id) is not None:
-                    dto.read_pages = viewed_books_map[book.id].history.files[-1].page
-                dto.last_time_read = viewed_books_map[book.id].updated_at
-                results.append(dto)
+            books = await self.book_cache_service.get_books(self.uow, list(viewed_books_map))
+
+        results = []
+        for book in books:
+            if book.private:
+                continue
+            dto = BookWithReadPagesDTO.from_book_dto(book)
+            dto.read_pages = viewed_books_map[book.id].history.files[-1].page
+            dto.last_time_read = viewed_books_map[book.id].updated_at
+            results.append(dto)
 
-            results = sorted(results, key=lambda x: x.last_time_read or 0, reverse=True)
-            return results, count
+        results = sorted(results, key=lambda x: x.last_time_read or 0, reverse=True)
+        return results, count
 
 
 class BookmarksCommandHandler:
@@ -255,33 +319,27 @@ class BookmarksCommandHandler:
 
 
 class BookmarksQueryHandler:
-    def __init__(self, uow: UnitOfWork, storage: AbstractStorage) -> None:
+    def __init__(self, uow: UnitOfWork, book_cache_service: BookCacheService) -> None:
         self.uow = uow
-        self.storage = storage
+        self.book_cache_service = book_cache_service
 
-    async def handle_get_favorite_books(self, query: BookmarksQueryFilter) -> tuple[list[BookDTO], int]:
+    async def handle_get_favorite_books(
+        self, query: BookmarksQueryFilter
+    ) -> tuple[list[BookDTO], int, BookCursor | None]:
         async with self.uow:
-            books, count = await self.uow.books.get_favorite_books(query)
-        results = []
-        for book in books:
-            dto = BookDTO.from_domain(book)
-            dto.preview_image = await self.storage.get_media_url(book.preview_image)
-            results.append(dto)
-        return results, count
+            page, count = await self.uow.books.get_favorite_book_ids(query)
+            return await self.book_cache_service.get_books(self.uow, page.ids), count, page.next_cursor
 
     async def handle_get_favorite_books_count(self, user_id: int) -> int:
         async with self.uow:
             return await self.uow.books.get_favorite_books_count(user_id)
 
-    async def handle_get_read_books(self, query: BookmarksQueryFilter) -> tuple[list[BookDTO], int]:
+    async def handle_get_read_books(
+        self, query: BookmarksQueryFilter
+    ) -> tuple[list[BookDTO], int, BookCursor | None]:
         async with self.uow:
-            books, count = await self.uow.books.get_read_books(query)
-        results = []
-        for book in books:
-            dto = BookDTO.from_domain(book)
-            dto.preview_image = await self.storage.get_media_url(book.preview_image)
-            results.append(dto)
-        return results, count
+            page, count = await self.uow.books.get_read_book_ids(query)
+            return await self.book_cache_service.get_books(self.uow, page.ids), count, page.next_cursor
 
     async def handle_get_read_books_count(self, user_id: int) -> int:
         async with self.uow:
@@ -1,63 +1,315 @@
-from typing import BinaryIO  # noqa
+import asyncio
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import replace
 
 # noinspection PyPackageRequirements
 import fitz
 
-from src.domain.books.entities import BookFilter
+from src.domain.books.entities import Book, BookFilter
 from src.domain.books.repository import BookRepository
-from .dto import BookDTO
+from src.domain.common.unit_of_work import UnitOfWork, UnitOfWorkFactory
+
 from ..services.cache import AbstractCache
+from ..services.single_flight import SingleFlight
+from ..services.stale_cache import StaleWhileRevalidateCache
 from ..services.storage import AbstractStorage
+from ..services.thumbnail import create_thumbnails, get_preview_variant_urls
+from .dto import BookDTO, BookFacetsDTO
 
 
 class RecentBookService:
+    """
+    Кеш последних добавленных книг.
+
+    Список публичных книг общий для всех пользователей и хранится в одном ключе.
+    Приватные книги пользователя (обычно их нет) хранятся в отдельном небольшом списке
+    и подмешиваются к общему при чтении.
+
+    Списки кешируются в режиме stale-while-revalidate, а после изменения книги
+    перестраиваются сразу (write-through), поэтому читатели не попадают на пустой кеш.
+    В кеше хранятся пути к превью, ссылки на них формируются при чтении.
+    """
+
     base_cache_key = "recent_books"
 
-    def __init__(self, cache: AbstractCache, cache_ttl: int = 60 * 60 * 24):
+    def __init__(
+        self,
+        cache: AbstractCache,
+        storage: AbstractStorage,
+        uow_factory: UnitOfWorkFactory,
+        cache_ttl: int = 60 * 60 * 24,
+        soft_ttl: int = 60 * 5,
+        limit: int = 25,
+        write_through: bool = True,
+        single_flight: SingleFlight | None = None,
+    ):
+        """
+        :param cache: :class:`AbstractCache` кеш.
+        :param storage: :class:`AbstractStorage` хранилище для ссылок на превью.
+        :param uow_factory: Фабрика Unit of Work, списки загружаются в отдельной сессии,
+                            так как фоновое обновление может завершиться после ответа на запрос.
+        :param cache_ttl: Время хранения списков в секундах.
+        :param soft_ttl: Время, после которого списки обновляются в фоне, в секундах.
+        :param limit: Количество книг в списке.
+        :param write_through: Перестраивать списки после изменения книги вместо удаления.
+        :param single_flight: :class:`SingleFlight` для объединения одновременных промахов кеша.
+        """
+        self.storage = storage
+        self.uow_factory = uow_factory
+        self.limit = limit
+        self.write_through = write_through
+        self.cache = StaleWhileRevalidateCache(cache, soft_ttl, cache_ttl, single_flight)
+
+    def _get_public_cache_key(self) -> str:
+        return f"{self.base_cache_key}:public"
+
+    def _get_private_cache_key(self, user_id: int) -> str:
+        return f"{self.base_cache_key}:private:{user_id}"
+
+    def _get_public_query(self) -> BookFilter:
+        return BookFilter(page=1, page_size=self.limit, sorted_by=["-id"])
+
+    def _get_private_query(self, user_id: int) -> BookFilter:
+        return BookFilter(
+            viewer_id=user_id, only_private=True, page=1, page_size=self.limit, sorted_by=["-id"]
+        )
+
+    async def get_recent_books(self, user_id: int | None = None) -> list[BookDTO]:
+        """
+        Возвращает последние книги в порядке добавления.
+        :param user_id: Пользователь, чьи приватные книги добавляются к общему списку.
+        """
+        public_books: list[BookDTO] = await self.cache.get_or_load(
+            self._get_public_cache_key(), lambda: self._load(self._get_public_query())
+        )
+        if user_id is None:
+            return await with_preview_urls(self.storage, public_books[: self.limit])
+
+        private_books: list[BookDTO] = await self.cache.get_or_load(
+            self._get_private_cache_key(user_id), lambda: self._load(self._get_private_query(user_id))
+        )
+        books = self.merge_books(public_books, private_books, self.limit)
+        return await with_preview_urls(self.storage, books)
+
+    @staticmethod
+    def merge_books(public: list[BookDTO], private: list[BookDTO], limit: int) -> list[BookDTO]:
+        """
+        Объединяет общий список с приватными книгами пользователя в порядке добавления.
+        :param public: Последние публичные книги.
+        :param private: Последние приватные книги пользователя.
+        :param limit: Максимальное количество книг.
+        """
+        if not private:
+            return public[:limit]
+        return sorted(public + private, key=lambda book: book.id, reverse=True)[:limit]
+
+    async def refresh_recent_books(self, owner_id: int) -> None:
+        """
+        Обновляет кеш после изменения книги: перестраивает общий список и список приватных книг владельца.
+        Если write-through отключен или перестроить списки не удалось, то они удаляются.
+        :param owner_id: Владелец измененной книги.
+        """
+        if not self.write_through:
+            await self.delete_recent_books_cache(owner_id)
+            return
+        try:
+            await self.cache.refresh(
+                self._get_public_cache_key(), lambda: self._load(self._get_public_query())
+            )
+            await self.cache.refresh(
+                self._get_private_cache_key(owner_id), lambda: self._load(self._get_private_query(owner_id))
+            )
+        except Exception:
+            # Изменение книги уже сохранено, устаревшие списки удаляются и будут загружены при чтении.
+            await self.delete_recent_books_cache(owner_id)
+
+    async def delete_recent_books_cache(self, user_id: int | None = None) -> None:
+        """
+        Удаляет общий список последних книг.
+        :param user_id: Владелец измененной книги, его список приватных книг также удаляется.
+        """
+        await self.cache.delete(self._get_public_cache_key())
+        if user_id is not None:
+            await self.cache.delete(self._get_private_cache_key(user_id))
+
+    async def _load(self, query: BookFilter) -> list[BookDTO]:
+        async with self.uow_factory() as uow:
+            books = await uow.books.get_filtered_list(query)
+        return [BookDTO.from_domain(book) for book in books]
+
+
+class BookCountService:
+    """
+    Кеш общего количества книг и фасетов (количества в разрезе тегов, издательств, годов и языков)
+    для постраничных списков.
+
+    Количество не зависит от номера страницы, поэтому кешируется по подписи фильтра
+    и пересчитывается только после изменения книг.
+    """
+
+    base_cache_key = "books_count"
+
+    def __init__(
+        self,
+        cache: AbstractCache,
+        cache_ttl: int = 60 * 10,
+        estimate_unfiltered: bool = False,
+        single_flight: SingleFlight | None = None,
+    ):
+        """
+        :param cache: :class:`AbstractCache` кеш.
+        :param cache_ttl: Время жизни закешированного количества в секундах.
+        :param estimate_unfiltered: Для списков без фильтров использовать оценку количества
+                                    по статистике планировщика БД вместо точного подсчета.
+        :param single_flight: :class:`SingleFlight` для объединения одновременных промахов кеша.
+        """
+        self.cache = cache
+        self.cache_ttl = cache_ttl
+        self.estimate_unfiltered = estimate_unfiltered
+        self.single_flight = single_flight or SingleFlight(cache)
+
+    def _get_cache_key(self, query: BookFilter) -> str:
+        return f"{self.base_cache_key}:{query.count_signature()}"
+
+    def can_estimate(self, query: BookFilter) -> bool:
+        return self.estimate_unfiltered and query.is_unfiltered
+
+    async def get_count(self, query: BookFilter) -> int | None:
+        return await self.cache.get(self._get_cache_key(query))
+
+    async def set_count(self, query: BookFilter, count: int) -> None:
+        await self.cache.set(self._get_cache_key(query), count, self.cache_ttl)
+
+    async def get_facets(self, query: BookFilter) -> BookFacetsDTO | None:
+        return await self.cache.get(f"{self._get_cache_key(query)}:facets")
+
+    async def set_facets(self, query: BookFilter, facets: BookFacetsDTO) -> None:
+        await self.cache.set(f"{self._get_cache_key(query)}:facets", facets, self.cache_ttl)
+
+    async def get_or_load_facets(
+        self, query: BookFilter, loader: Callable[[], Awaitable[BookFacetsDTO]]
+    ) -> BookFacetsDTO:
+        """
+        Возвращает фасеты из кеша, а при их отсутствии загружает через `loader` и кеширует.
+        Одновременные промахи кеша выполняют `loader` только один раз.
+        """
+        facets = await self.get_facets(query)
+        if facets is not None:
+            return facets
+
+        async def load() -> BookFacetsDTO:
+            loaded = await loader()
+            await self.set_facets(query, loaded)
+            return loaded
+
+        cache_key = f"{self._get_cache_key(query)}:facets"
+        return await self.single_flight.do(cache_key, load, cache_key=cache_key)
+
+    async def delete_count_cache(self) -> None:
+        await self.cache.invalidate_namespace(self.base_cache_key)
+
+
+class BookCacheService:
+    """
+    Кеш книг по идентификатору для постраничных списков.
+
+    Списки сначала получают из БД только идентификаторы книг страницы, затем книги берутся из кеша
+    одним пакетным запросом, а отсутствующие в кеше загружаются из БД одним запросом и кешируются.
+    В кеше хранятся пути к превью, ссылки на превью и его миниатюры формируются при каждом запросе.
+    """
+
+    base_cache_key = "book"
+
+    def __init__(self, cache: AbstractCache, storage: AbstractStorage, cache_ttl: int = 60 * 60):
+        """
+        :param cache: :class:`AbstractCache` кеш.
+        :param storage: :class:`AbstractStorage` хранилище для ссылок на превью.
+        :param cache_ttl: Время хранения книги в секундах.
+        """
         self.cache = cache
+        self.storage = storage
         self.cache_ttl = cache_ttl
 
-    async def _get_cache_key(self, query: BookFilter) -> str:
-        return f"{self.base_cache_key}:viewer:{query.viewer_id}:page_size:{query.page_size}"
+    def _get_cache_key(self, book_id: int) -> str:
+        return f"{self.base_cache_key}:{book_id}"
+
+    async def get_books(self, uow: UnitOfWork, book_ids: Sequence[int]) -> list[BookDTO]:
+        """
+        Возвращает книги в порядке идентификаторов, удаленные книги пропускаются.
+        :param uow: Unit of Work для загрузки отсутствующих в кеше книг.
+        :param book_ids: Идентификаторы книг.
+        """
+        keys = [self._get_cache_key(book_id) for book_id in book_ids]
+        cached: list[BookDTO | None] = await self.cache.get_many(keys)
+        books = {book.id: book for book in cached if book is not None}
 
-    async def get_recent_books(self, query: BookFilter) -> list[BookDTO] | None:
-        cache_key = await self._get_cache_key(query)
-        return await self.cache.get(cache_key)
+        if missing := [book_id for book_id in book_ids if book_id not in books]:
+            loaded = [BookDTO.from_domain(book) for book in await uow.books.get_by_ids(missing)]
+            await self.cache.set_many({self._get_cache_key(book.id): book for book in loaded}, self.cache_ttl)
+            books.update((book.id, book) for book in loaded)
 
-    async def set_recent_books(self, books: list[BookDTO], query: BookFilter) -> None:
-        if books:
-            cache_key = await self._get_cache_key(query)
-            await self.cache.set(cache_key, books, self.cache_ttl)
+        found = [books[book_id] for book_id in book_ids if book_id in books]
+        return await with_preview_urls(self.storage, found)
 
-    async def delete_recent_books_cache(self) -> None:
-        await self.cache.delete_namespace(self.base_cache_key)
+    async def delete_books(self, *book_ids: int) -> None:
+        """Удаляет книги из кеша после их изменения."""
+        for book_id in book_ids:
+            await self.cache.delete(self._get_cache_key(book_id))
+
+
+async def with_preview_urls(storage: AbstractStorage, books: Sequence[BookDTO]) -> list[BookDTO]:
+    """
+    Возвращает копии книг со ссылками на превью и его миниатюры вместо путей в хранилище.
+    Книги копируются, чтобы не изменять значения, которые могут храниться в кеше без сериализации.
+    """
+    previews = await get_preview_variant_urls(
+        storage, [book.preview_image for book in books], [book.preview_thumbnails for book in books]
+    )
+    return [
+        replace(book, preview_image=variants["original"].url, preview_variants=variants)
+        for book, variants in zip(books, previews, strict=True)
+    ]
+
+
+def render_first_page(data: bytes) -> tuple[int, bytes]:
+    """
+    Отрисовывает первую страницу PDF документа.
+    :param data: PDF документ.
+    :return: Количество страниц документа и изображение первой страницы в формате PNG.
+    """
+    with fitz.Document(stream=data) as doc:
+        pix: fitz.Pixmap = doc.load_page(0).get_pixmap()
+        return doc.page_count, pix.tobytes()
 
 
 async def create_book_preview_and_update_pages_count(
     storage: AbstractStorage, book_repository: BookRepository, book_id: int
-) -> str:
+) -> Book:
     """
-    Создает превью книги из первой страницы PDF документа и обновляет ее количество страниц в БД.
+    Создает превью книги из первой страницы PDF документа и его миниатюры,
+    затем обновляет превью и количество страниц книги в БД.
+    Миниатюры создаются до обновления книги, поэтому у книги с превью они уже есть,
+    а их размеры сохраняются в книге, чтобы ссылки на них выдавались без проверки хранилища.
 
     :param storage: :class:`AbstractStorage` объект хранилища.
     :param book_repository: :class:`BookRepository` объект репозитория книг.
     :param book_id: Идентификатор книги.
 
-    :return: Ссылка на превью книги.
+    :return: Обновленная книга.
     """
-    with storage.get_book_binary(book_id) as file_data:  # type: BinaryIO
-        doc = fitz.Document(stream=file_data.read())
-
-    total_pages: int = doc.page_count
-    page = doc.load_page(0)
-    pix: fitz.Pixmap = page.get_pixmap()
-    image: bytes = pix.tobytes()
+    file_info = await storage.get_book_info(book_id)
+    async with storage.open_read(file_info.path) as file:
+        data = await file.read()
+    # Разбор PDF и отрисовка страницы занимают процессор, поэтому выполняются вне event loop.
+    total_pages, image = await asyncio.to_thread(render_first_page, data)
 
     preview_name = f"previews/{book_id}/preview.png"
     await storage.upload_file(preview_name, image)
+    thumbnails = await create_thumbnails(storage, preview_name)
 
     book = await book_repository.get_by_id(book_id)
     book.preview_image = preview_name
+    book.preview_thumbnails = thumbnails
     book.pages = total_pages
     await book_repository.update(book)
-    return preview_name
+    return book
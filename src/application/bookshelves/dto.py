@@ -1,7 +1,8 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Self
 
+from src.application.services.thumbnail import ImageVariant
 from src.domain.bookshelves.entities import Bookshelf
 
 
@@ -9,6 +10,8 @@ from src.domain.bookshelves.entities import Bookshelf
 class BookshelfElementDTO:
     id: int
     preview: str
+    preview_thumbnails: list[str] = field(default_factory=list)
+    preview_variants: dict[str, ImageVariant] = field(default_factory=dict)
 
 
 @dataclass(slots=True, kw_only=True)
@@ -34,6 +37,7 @@ class BookshelfDTO:
                 BookshelfElementDTO(
                     id=book.id,
                     preview=book.preview,
+                    preview_thumbnails=book.preview_thumbnails,
                 )
                 for book in data.books
             ],
@@ -5,6 +5,7 @@ from src.application.bookshelves.commands import (
 )
 from src.application.bookshelves.dto import BookshelfDTO
 from src.application.services.storage import AbstractStorage
+from src.application.services.thumbnail import get_preview_variant_urls
 from src.domain.bookshelves.entities import Bookshelf, BookshelfFilter
 from src.domain.common.exceptions import ObjectNotFoundError
 from src.domain.common.unit_of_work import UnitOfWork
@@ -12,8 +13,12 @@ from src.domain.common.unit_of_work import UnitOfWork
 
 async def get_bookshelf_dto(bookshelf: Bookshelf, storage: AbstractStorage) -> BookshelfDTO:
     dto = BookshelfDTO.from_domain(bookshelf)
-    for book in dto.books:
-        book.preview = await storage.get_media_url(book.preview)
+    previews = await get_preview_variant_urls(
+        storage, [book.preview for book in dto.books], [book.preview_thumbnails for book in dto.books]
+    )
+    for book, variants in zip(dto.books, previews, strict=True):
+        book.preview = variants["original"].url
+        book.preview_variants = variants
     return dto
 
 
@@ -1,7 +1,27 @@
+import uuid
 from abc import ABC, abstractmethod
+from collections.abc import Mapping, Sequence
 from typing import Any
 
 
+class CacheSerializer(ABC):
+    """Абстрактный сериализатор значений кеша."""
+
+    class SerializationError(Exception):
+        """Значение не удалось сериализовать или десериализовать."""
+
+    @abstractmethod
+    def dumps(self, value: Any) -> bytes:
+        """Сериализует значение в байты."""
+
+    @abstractmethod
+    def loads(self, data: bytes) -> Any:
+        """
+        Восстанавливает значение из байтов.
+        :raises self.SerializationError: Если данные повреждены или записаны другим сериализатором.
+        """
+
+
 class AbstractCache(ABC):
     """Абстрактный класс для реализации кеша данных."""
 
@@ -20,7 +40,41 @@ class AbstractCache(ABC):
         """Удаляет значение из кеша по ключу."""
         pass
 
+    async def get_many(self, keys: Sequence[str]) -> list[Any | None]:
+        """
+        Получает значения нескольких ключей.
+        Реализация может получать их одним запросом, по умолчанию ключи читаются по очереди.
+        :return: Значения в порядке ключей, `None` для отсутствующих.
+        """
+        return [await self.get(key) for key in keys]
+
+    async def set_many(self, items: Mapping[str, Any], timeout: int) -> None:
+        """Записывает несколько значений с одинаковым таймаутом."""
+        for key, value in items.items():
+            await self.set(key, value, timeout)
+
     @abstractmethod
     async def delete_namespace(self, prefix: str) -> None:
         """Удаляет все ключи с указанным префиксом"""
         pass
+
+    async def invalidate_namespace(self, namespace: str) -> None:
+        """
+        Делает недействительными все ключи вида `<namespace>:...`.
+        Реализация может выполнять это за постоянное время, по умолчанию ключи удаляются по префиксу.
+        """
+        await self.delete_namespace(f"{namespace}:")
+
+    async def acquire_lock(self, key: str, timeout: int) -> str | None:
+        """
+        Захватывает блокировку по ключу на `timeout` секунд.
+
+        Кеш, который не разделяется между экземплярами приложения, не нуждается в блокировке,
+        поэтому по умолчанию она всегда захватывается.
+
+        :return: Токен для освобождения блокировки или `None`, если блокировка уже захвачена.
+        """
+        return uuid.uuid4().hex
+
+    async def release_lock(self, key: str, token: str) -> None:  # noqa: B027
+        """Освобождает блокировку, если она захвачена с указанным токеном."""
@@ -0,0 +1,182 @@
+import hashlib
+import inspect
+import random
+from collections.abc import Awaitable, Callable, Iterator, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from enum import StrEnum
+from functools import wraps
+from typing import Any, ParamSpec, TypeVar
+from urllib.parse import quote
+
+from src.domain.common.exceptions import ObjectNotFoundError
+
+from .cache import AbstractCache
+from .single_flight import SingleFlight
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+MAX_KEY_LENGTH = 200
+
+
+class CacheMode(StrEnum):
+    default = "default"  # Значение берется из кеша, при промахе вычисляется и записывается
+    bypass = "bypass"  # Кеш не используется
+    refresh = "refresh"  # Значение вычисляется заново и перезаписывается в кеше
+
+
+_cache_mode: ContextVar[CacheMode] = ContextVar("cache_mode", default=CacheMode.default)
+
+
+@contextmanager
+def cache_mode(mode: CacheMode) -> Iterator[None]:
+    """
+    Устанавливает режим использования кеша для вызовов кешируемых функций внутри блока.
+
+    Пример:
+        with cache_mode(CacheMode.refresh):
+            await handler.handle_get_tags(search=None, user_id=None)
+    """
+    token = _cache_mode.set(mode)
+    try:
+        yield
+    finally:
+        _cache_mode.reset(token)
+
+
+@dataclass(slots=True, kw_only=True)
+class NegativeCacheEntry:
+    """Закешированный результат «не найдено»: `None` или исключение с именем `error`."""
+
+    error: str = ""
+    message: str = ""
+
+
+def make_cache_key(namespace: str, **arguments: Any) -> str:
+    """
+    Формирует ключ кеша из пространства имен и именованных аргументов.
+    Ключ не зависит от порядка аргументов, слишком длинная часть с аргументами заменяется хешем.
+
+    :param namespace: Пространство имен ключа.
+    :param arguments: Аргументы функции.
+    :return: Ключ вида `<namespace>:<name>=<value>:...`.
+    """
+    suffix = ":".join(f"{name}={quote(str(value), safe='')}" for name, value in sorted(arguments.items()))
+    if len(suffix) > MAX_KEY_LENGTH:
+        suffix = hashlib.sha256(suffix.encode()).hexdigest()
+    return f"{namespace}:{suffix}"
+
+
+def cached(
+    timeout: int,
+    namespace: str | None = None,
+    key: Sequence[str] | Callable[..., str] | None = None,
+    jitter: float = 0.1,
+    negative_timeout: int | None = None,
+    negative_exceptions: tuple[type[Exception], ...] = (ObjectNotFoundError,),
+    cache: Callable[[], AbstractCache] | None = None,
+    single_flight: Callable[[], SingleFlight | None] | None = None,
+) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Awaitable[R]]]:
+    """
+    Декоратор кеширования асинхронной функции.
+
+    Аргументы вызова связываются с сигнатурой функции, поэтому позиционный и именованный вызов
+    с одинаковыми значениями используют один ключ. Одновременные промахи по одному ключу
+    вызывают функцию только один раз. Режим использования кеша для отдельного вызова
+    задается через :func:`cache_mode`.
+
+    Если `cache` не указан, то декорируется метод, а кеш и :class:`SingleFlight` берутся
+    из атрибутов `cache` и `single_flight` объекта.
+
+    :param timeout: Время жизни значения в секундах.
+    :param namespace: Пространство имен ключей, по умолчанию имя функции.
+    :param key: Имена аргументов, входящих в ключ, или функция, которая получает аргументы вызова
+                и возвращает часть ключа после пространства имен. По умолчанию в ключ входят все аргументы.
+    :param jitter: Доля случайного увеличения времени жизни, чтобы значения не истекали одновременно.
+    :param negative_timeout: Время жизни результата «не найдено» (`None` или исключение
+                             из `negative_exceptions`), по умолчанию такие результаты не кешируются.
+    :param negative_exceptions: Исключения, означающие, что объект не найден.
+    :param cache: Функция, возвращающая кеш.
+    :param single_flight: Функция, возвращающая :class:`SingleFlight`.
+    :return: Декоратор функции.
+    """
+
+    def decorator(func: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+        signature = inspect.signature(func)
+        parameters = list(signature.parameters)
+        is_method = bool(parameters) and parameters[0] == "self"
+        if cache is None and not is_method:
+            raise TypeError(f"Cache getter is required for function {func.__qualname__}")
+        key_namespace = namespace or func.__name__
+
+        def get_cache_key(bound: inspect.BoundArguments) -> str:
+            if callable(key):
+                return f"{key_namespace}:{key(*bound.args, **bound.kwargs)}"
+            arguments = {name: value for name, value in bound.arguments.items() if name != "self"}
+            if key is not None:
+                arguments = {name: arguments[name] for name in key}
+            return make_cache_key(key_namespace, **arguments)
+
+        def get_backends(bound: inspect.BoundArguments) -> tuple[AbstractCache, SingleFlight | None]:
+            if cache is not None:
+                return cache(), single_flight() if single_flight is not None else None
+            instance = bound.arguments["self"]
+            return instance.cache, getattr(instance, "single_flight", None)
+
+        def get_error(entry: NegativeCacheEntry) -> type[Exception] | None:
+            return next((exc for exc in negative_exceptions if exc.__name__ == entry.error), None)
+
+        def is_hit(value: Any) -> bool:
+            # Исключение, которое больше не входит в `negative_exceptions`, считается промахом.
+            if isinstance(value, NegativeCacheEntry) and value.error:
+                return get_error(value) is not None
+            return value is not None
+
+        def unwrap(value: Any) -> Any:
+            if not isinstance(value, NegativeCacheEntry):
+                return value
+            if error := get_error(value):
+                raise error(value.message)
+            return None
+
+        @wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            mode = _cache_mode.get()
+            if mode is CacheMode.bypass:
+                return await func(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            cache_key = get_cache_key(bound)
+            cache_, flight = get_backends(bound)
+
+            if mode is CacheMode.default:
+                value = await cache_.get(cache_key)
+                if is_hit(value):
+                    return unwrap(value)
+
+            async def load() -> Any:
+                try:
+                    result = await func(*args, **kwargs)
+                except negative_exceptions as exc:
+                    if negative_timeout is None:
+                        raise
+                    entry = NegativeCacheEntry(error=type(exc).__name__, message=str(exc))
+                    await cache_.set(cache_key, entry, negative_timeout)
+                    return entry
+                if result is None:
+                    if negative_timeout is not None:
+                        await cache_.set(cache_key, NegativeCacheEntry(), negative_timeout)
+                    return None
+                await cache_.set(cache_key, result, int(timeout * (1 + random.uniform(0, jitter))))
+                return result
+
+            if flight is None or mode is CacheMode.refresh:
+                return unwrap(await load())
+            return unwrap(await flight.do(cache_key, load, cache_key=cache_key))
+
+        return wrapper
+
+    return decorator
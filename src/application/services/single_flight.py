@@ -0,0 +1,87 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
+
+from .cache import AbstractCache
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Объединяет одновременные вычисления значения по одному ключу.
+
+    Значение вычисляет только первый вызов, остальные ожидают его результат.
+    Если указан кеш и ключ кеша, то вычисление дополнительно объединяется между экземплярами приложения:
+    вычисляет тот, кто захватил блокировку в кеше, остальные ожидают появления значения в кеше.
+    """
+
+    def __init__(
+        self, cache: AbstractCache | None = None, lock_timeout: int = 10, poll_interval: float = 0.05
+    ) -> None:
+        """
+        :param cache: :class:`AbstractCache` кеш для блокировки между экземплярами приложения.
+        :param lock_timeout: Время жизни блокировки и максимальное время ожидания значения в секундах.
+        :param poll_interval: Интервал проверки значения в кеше при ожидании в секундах.
+        """
+        self.cache = cache
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self._calls: dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]], cache_key: str | None = None) -> T:
+        """
+        Выполняет вычисление или ожидает уже начатое вычисление с тем же ключом.
+
+        Вычисление выполняется в отдельной задаче, поэтому отмена первого вызова не прерывает ожидающих.
+
+        :param key: Ключ вычисления.
+        :param func: Функция вычисления значения.
+        :param cache_key: Ключ кеша, в который `func` записывает результат.
+        :return: Результат `func`.
+        """
+        return await asyncio.shield(self.start(key, func, cache_key))
+
+    def start(self, key: str, func: Callable[[], Awaitable[T]], cache_key: str | None = None) -> asyncio.Task:
+        """
+        Запускает вычисление в фоне, если вычисление с тем же ключом еще не выполняется.
+        :return: Задача вычисления.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            if self.cache is not None and cache_key is not None:
+                task = asyncio.ensure_future(self._do_locked(func, cache_key))
+            else:
+                task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        return task
+
+    async def _do_locked(self, func: Callable[[], Awaitable[T]], cache_key: str) -> T:
+        assert self.cache is not None
+        lock_key = f"lock:{cache_key}"
+        deadline = time.monotonic() + self.lock_timeout
+        while (token := await self.cache.acquire_lock(lock_key, self.lock_timeout)) is None:
+            # Значение вычисляет другой экземпляр приложения.
+            value: Any = await self.cache.get(cache_key)
+            if value is not None:
+                return value
+            if time.monotonic() > deadline:
+                return await func()
+            await asyncio.sleep(self.poll_interval)
+
+        try:
+            value = await self.cache.get(cache_key)
+            if value is not None:
+                return value
+            return await func()
+        finally:
+            await self.cache.release_lock(lock_key, token)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Ошибка передается ожидающим, здесь она только помечается как полученная.
+            task.exception()
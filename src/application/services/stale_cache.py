@@ -0,0 +1,60 @@
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+from .cache import AbstractCache
+from .single_flight import SingleFlight
+
+
+@dataclass(slots=True, kw_only=True)
+class StaleCacheEntry:
+    value: Any
+    stale_at: float
+
+
+class StaleWhileRevalidateCache:
+    """
+    Кеш с мягким и жестким временем жизни значений (stale-while-revalidate).
+
+    До истечения мягкого времени жизни значение считается свежим. После него значение все еще возвращается,
+    но запускается одно фоновое обновление. По истечении жесткого времени жизни значение удаляется из кеша
+    и загружается заново при чтении.
+    """
+
+    def __init__(
+        self, cache: AbstractCache, soft_ttl: int, hard_ttl: int, single_flight: SingleFlight | None = None
+    ) -> None:
+        """
+        :param cache: :class:`AbstractCache` кеш.
+        :param soft_ttl: Время, после которого значение обновляется в фоне, в секундах.
+        :param hard_ttl: Время хранения значения в кеше в секундах.
+        :param single_flight: :class:`SingleFlight` для объединения одновременных загрузок.
+        """
+        self.cache = cache
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = hard_ttl
+        self.single_flight = single_flight or SingleFlight(cache)
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Возвращает значение из кеша, при его отсутствии загружает через `loader` и кеширует.
+        Устаревшее значение возвращается сразу, а обновляется в фоне.
+        """
+        entry = await self.cache.get(key)
+        if isinstance(entry, StaleCacheEntry):
+            if time.time() >= entry.stale_at:
+                self.single_flight.start(key, lambda: self.refresh(key, loader))
+            return entry.value
+
+        entry = await self.single_flight.do(key, lambda: self.refresh(key, loader), cache_key=key)
+        return entry.value
+
+    async def refresh(self, key: str, loader: Callable[[], Awaitable[Any]]) -> StaleCacheEntry:
+        """Загружает значение через `loader` и записывает его в кеш."""
+        entry = StaleCacheEntry(value=await loader(), stale_at=time.time() + self.soft_ttl)
+        await self.cache.set(key, entry, self.hard_ttl)
+        return entry
+
+    async def delete(self, key: str) -> None:
+        await self.cache.delete(key)
@@ -1,6 +1,10 @@
+import os
 from abc import ABC, abstractmethod
-from collections.abc import AsyncIterable, Generator
-from contextlib import contextmanager
+from collections.abc import AsyncIterable, AsyncIterator, Sequence
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
 from typing import BinaryIO, Protocol
 
 
@@ -12,12 +16,81 @@ class FileProtocol(Protocol):
     async def read(self, size: int = -1) -> bytes: ...
 
 
+@dataclass(slots=True, kw_only=True)
+class FileInfo:
+    """Сведения о файле в хранилище."""
+
+    path: str  # Путь к файлу в хранилище
+    size: int  # Размер в байтах
+    last_modified: datetime
+    etag: str  # Строгий ETag в кавычках, меняется при изменении файла
+
+
+class StorageFile:
+    """
+    Файл хранилища, открытый для чтения.
+    Каждое чтение запрашивает у хранилища только нужный диапазон байт, поэтому файл не загружается целиком.
+    """
+
+    def __init__(self, storage: AbstractStorage, info: FileInfo) -> None:
+        """
+        :param storage: :class:`AbstractStorage` хранилище файла.
+        :param info: :class:`FileInfo` сведения о файле.
+        """
+        self.storage = storage
+        self.info = info
+        self._position = 0
+
+    @property
+    def size(self) -> int:
+        return self.info.size
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        """
+        Изменяет позицию чтения, обращения к хранилищу не происходит.
+        :param offset: Смещение.
+        :param whence: Откуда отсчитывается смещение: `os.SEEK_SET`, `os.SEEK_CUR` или `os.SEEK_END`.
+        :return: Новая позиция.
+        """
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            offset += self.size
+        elif whence != os.SEEK_SET:
+            raise ValueError(f"Invalid whence: {whence}")
+        if offset < 0:
+            raise ValueError(f"Negative seek position: {offset}")
+        self._position = offset
+        return offset
+
+    async def read(self, size: int = -1) -> bytes:
+        """
+        Читает до `size` байт с текущей позиции, по умолчанию до конца файла.
+        :return: Прочитанные байты, пустая строка в конце файла.
+        """
+        if size == 0 or self._position >= self.size:
+            return b""
+        end = self.size if size < 0 else min(self._position + size, self.size)
+        data = await self.storage.read_range(self.info.path, self._position, end - 1)
+        self._position += len(data)
+        return data
+
+
 class AbstractStorage(ABC):
     """Абстрактное хранилище для книг."""
 
     class FileNotFoundError(Exception):  # noqa: A001
         """Класс ошибки файла не найдено."""
 
+    async def connect(self) -> None:  # noqa: B027
+        """Открывает долгоживущие соединения хранилища в текущем event loop."""
+
+    async def close(self) -> None:  # noqa: B027
+        """Закрывает соединения, открытые в :meth:`connect`."""
+
     @abstractmethod
     async def upload_book(self, file: FileProtocol, book_id: int) -> str:
         """
@@ -30,42 +103,91 @@ class AbstractStorage(ABC):
         """
 
     @abstractmethod
-    def get_book_iterator(self, book_id: int) -> AsyncIterable[bytes]:
+    async def get_book_info(self, book_id: int) -> FileInfo:
         """
-        Возвращает асинхронный итератор по байтам книги.
+        Возвращает сведения о файле книги.
         :param book_id: Идентификатор книги.
-        :return: Итератор по байтам книги.
+        :return: :class:`FileInfo` сведения о файле книги.
         :raises self.FileNotFoundError:  :class:`AbstractStorage.FileNotFoundError` Если книга не найдена.
         """
 
-    @contextmanager
     @abstractmethod
-    def get_book_binary(self, book_id: int) -> Generator[BinaryIO]:
+    def get_file_iterator(
+        self, file_name: str, start: int = 0, end: int | None = None
+    ) -> AsyncIterable[bytes]:
         """
-        Возвращает итератор бинарного файла книги.
-        :param book_id: Идентификатор книги.
-        :return: Бинарный файл книги.
-        :raises self.FileNotFoundError:  :class:`AbstractStorage.FileNotFoundError` Если книга не найдена.
+        Возвращает асинхронный итератор по байтам файла или его части.
+        :param file_name: Путь к файлу в хранилище.
+        :param start: Позиция первого байта.
+        :param end: Позиция последнего байта включительно, по умолчанию до конца файла.
+        :return: Итератор по байтам файла.
+        :raises self.FileNotFoundError:  :class:`AbstractStorage.FileNotFoundError` Если файл не найден.
+        """
+
+    def get_local_path(self, file_name: str) -> Path | None:
+        """
+        Возвращает путь к файлу в файловой системе, если хранилище хранит файлы локально.
+        Такой файл можно отдать без чтения через приложение.
+        :param file_name: Путь к файлу в хранилище.
+        :return: Путь к файлу или `None`, если файл не хранится локально.
+        """
+        return None
+
+    async def get_download_url(
+        self, file_name: str, media_type: str | None = None, download_name: str | None = None
+    ) -> str | None:
         """
+        Возвращает временную ссылку для скачивания файла напрямую из хранилища, минуя приложение.
+        :param file_name: Путь к файлу в хранилище.
+        :param media_type: MIME тип, с которым хранилище отдаст файл.
+        :param download_name: Имя файла для сохранения, если файл нужно скачать, а не открыть.
+        :return: Ссылка или `None`, если хранилище не выдает такие ссылки.
+        """
+        return None
 
     @abstractmethod
-    async def upload_file(self, file_name: str, data: bytes) -> str:
+    async def get_file_info(self, file_name: str) -> FileInfo:
         """
-        Загружает файл в хранилище.
-        :param file_name: Имя файла.
-        :param data: Данные файла.
-        :return: Путь к загруженному файлу.
+        Возвращает сведения о файле.
+        :param file_name: Путь к файлу в хранилище.
+        :return: :class:`FileInfo` сведения о файле.
+        :raises self.FileNotFoundError:  :class:`AbstractStorage.FileNotFoundError` Если файл не найден.
         """
 
-    @contextmanager
     @abstractmethod
-    def get_file_binary(self, file_name: str) -> Generator[BinaryIO]:
+    async def read_range(self, file_name: str, start: int = 0, end: int | None = None) -> bytes:
+        """
+        Читает часть файла.
+        :param file_name: Путь к файлу в хранилище.
+        :param start: Позиция первого байта.
+        :param end: Позиция последнего байта включительно, по умолчанию до конца файла.
+        :return: Прочитанные байты.
+        :raises self.FileNotFoundError:  :class:`AbstractStorage.FileNotFoundError` Если файл не найден.
+        """
+
+    @asynccontextmanager
+    async def open_read(self, file_name: str) -> AsyncIterator[StorageFile]:
         """
-        Возвращает итератор бинарного файла.
+        Открывает файл для чтения с произвольной позиции.
+
+        Пример:
+            async with storage.open_read("previews/1/preview.png") as file:
+                header = await file.read(8)
+
         :param file_name: Путь к файлу в хранилище.
-        :return: Бинарный файл.
+        :return: :class:`StorageFile` файл хранилища.
         :raises self.FileNotFoundError:  :class:`AbstractStorage.FileNotFoundError` Если файл не найден.
         """
+        yield StorageFile(self, await self.get_file_info(file_name))
+
+    @abstractmethod
+    async def upload_file(self, file_name: str, data: bytes) -> str:
+        """
+        Загружает файл в хранилище.
+        :param file_name: Имя файла.
+        :param data: Данные файла.
+        :return: Путь к загруженному файлу.
+        """
 
     @abstractmethod
     async def delete_book(self, book_id: int) -> None:
@@ -81,3 +203,12 @@ class AbstractStorage(ABC):
         :param file: Путь к файлу в хранилище.
         :return: URL файла.
         """
+
+    async def get_media_urls(self, files: Sequence[str]) -> list[str]:
+        """
+        Возвращает URL нескольких файлов в хранилище.
+        Реализация может формировать их без отдельного вызова на каждый файл.
+        :param files: Пути к файлам в хранилище.
+        :return: URL файлов в том же порядке.
+        """
+        return [await self.get_media_url(file) for file in files]
@@ -1,32 +1,109 @@
+import asyncio
 import io
-from typing import BinaryIO, Literal  # noqa
+from collections.abc import Collection, Sequence
+from dataclasses import dataclass
+from typing import Literal, cast
 
 from PIL import Image
 
 from .storage import AbstractStorage
 
-thumbnail_sizes = {"small": (160, 240), "medium": (260, 380)}
+ThumbnailSize = Literal["small", "medium"]
 
+thumbnail_sizes: dict[str, tuple[int, int]] = {"small": (160, 240), "medium": (260, 380)}
 
-def get_thumbnail(image: str, size_name: Literal["small", "medium"]) -> str:
+
+@dataclass(slots=True, kw_only=True)
+class ImageVariant:
+    """
+    Вариант изображения.
+    Для миниатюр указан размер, в который вписано изображение с сохранением пропорций,
+    а не фактический размер. Для оригинала размер не указывается.
+    """
+
+    url: str
+    max_width: int | None = None
+    max_height: int | None = None
+
+
+def get_thumbnail(image: str, size_name: ThumbnailSize) -> str:
     """Возвращает thumbnail для переданного изображения и размера thumbnail."""
     return str(image).replace(".png", f"_thumb_{size_name}.png")
 
 
-async def create_thumbnails(storage: AbstractStorage, original_image: str) -> None:
+def get_preview_variants(image: str, thumbnails: Collection[str]) -> dict[str, str]:
+    """
+    Возвращает пути к вариантам превью: созданным миниатюрам и оригиналу.
+    Миниатюры создаются только для PNG превью, для остальных изображений возвращается только оригинал.
+    :param image: Путь к превью в хранилище.
+    :param thumbnails: Размеры миниатюр, созданных для превью, остальные размеры заменяются оригиналом.
+    """
+    if not image.endswith(".png"):
+        return {"original": image}
+    variants = {
+        size_name: get_thumbnail(image, cast(ThumbnailSize, size_name))
+        for size_name in thumbnail_sizes
+        if size_name in thumbnails
+    }
+    variants["original"] = image
+    return variants
+
+
+async def get_preview_variant_urls(
+    storage: AbstractStorage, images: Sequence[str], thumbnails: Sequence[Collection[str]]
+) -> list[dict[str, ImageVariant]]:
+    """
+    Возвращает варианты нескольких превью со ссылками, полученными одним вызовом хранилища.
+    Если миниатюры какого-либо размера нет, то вместо нее возвращается ссылка на оригинал.
+    :param storage: :class:`AbstractStorage` - объект для работы с хранилищем.
+    :param images: Пути к превью в хранилище.
+    :param thumbnails: Размеры миниатюр, созданных для каждого превью.
+    :return: Варианты каждого превью по названию размера, оригинал под названием `original`.
+    """
+    variants = [
+        get_preview_variants(image, created) for image, created in zip(images, thumbnails, strict=True)
+    ]
+    urls = iter(await storage.get_media_urls([path for item in variants for path in item.values()]))
+    results = []
+    for item in variants:
+        result = {}
+        for size_name in item:
+            size = thumbnail_sizes.get(size_name)
+            result[size_name] = ImageVariant(
+                url=next(urls), max_width=size[0] if size else None, max_height=size[1] if size else None
+            )
+        for size_name in thumbnail_sizes:
+            result.setdefault(size_name, ImageVariant(url=result["original"].url))
+        results.append(result)
+    return results
+
+
+def make_thumbnail(image: bytes, size: tuple[int, int]) -> bytes:
+    """
+    Уменьшает изображение до размера, вписанного в `size`, с сохранением пропорций.
+    :param image: Исходное изображение.
+    :param size: Максимальные ширина и высота.
+    :return: Изображение в формате PNG.
+    """
+    with Image.open(io.BytesIO(image)) as img:
+        img.thumbnail(size)
+        image_data = io.BytesIO()
+        img.save(image_data, format="PNG")
+    return image_data.getvalue()
+
+
+async def create_thumbnails(storage: AbstractStorage, original_image: str) -> list[str]:
     """
     Создаёт thumbnail для переданного изображения и размера thumbnail в хранилище.
+    Изображение читается из хранилища один раз, а уменьшается вне event loop.
 
     :param storage: :class:`AbstractStorage` - объект для работы с хранилищем.
     :param original_image: Путь к изображению в хранилище.
+    :return: Размеры созданных миниатюр.
     """
+    async with storage.open_read(original_image) as file:
+        image = await file.read()
     for size_name, size in thumbnail_sizes.items():
-        with storage.get_file_binary(original_image) as file:  # type: BinaryIO
-            img = Image.open(file)
-            img.thumbnail(size)
-            image_data = io.BytesIO()
-            img.save(image_data, format="PNG")
-            await storage.upload_file(
-                original_image.replace(".png", f"_thumb_{size_name}.png"),
-                image_data.getvalue(),
-            )
+        image_data = await asyncio.to_thread(make_thumbnail, image, size)
+        await storage.upload_file(get_thumbnail(original_image, cast(ThumbnailSize, size_name)), image_data)
+    return list(thumbnail_sizes)
@@ -1,6 +1,11 @@
+import base64
+import binascii
 import contextlib
-from dataclasses import dataclass, field
-from typing import Self
+import hashlib
+import json
+from collections.abc import Sequence
+from dataclasses import dataclass, field, fields
+from typing import Any, Self
 
 from src.domain.common.exceptions import ValidationError
 
@@ -40,6 +45,7 @@ class Book:
     language: str
 
     tags: list[str] = field(default_factory=list)
+    preview_thumbnails: list[str] = field(default_factory=list)
 
     def __post_init__(self):
         if self.id < 0:
@@ -92,13 +98,76 @@ class Book:
         )
 
 
+# Типы значений полей, по которым возможна keyset пагинация.
+KEYSET_FIELD_TYPES: dict[str, type] = {
+    "id": int,
+    "year": int,
+    "pages": int,
+    "size": int,
+    "title": str,
+    "authors": str,
+    "language": str,
+}
+
+
+@dataclass(slots=True, frozen=True, kw_only=True)
+class BookCursor:
+    """
+    Курсор для keyset пагинации.
+
+    Хранит значения полей сортировки последней строки страницы (книги или закладки).
+    Следующая страница начинается сразу после строки с этими значениями.
+    """
+
+    values: tuple[int | str, ...]
+
+    def encode(self) -> str:
+        """Возвращает непрозрачное строковое представление курсора."""
+        raw = json.dumps(self.values, separators=(",", ":"), ensure_ascii=False).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, cursor: str, sorted_by: Sequence[str]) -> Self:
+        """
+        Восстанавливает курсор из строкового представления.
+        :param cursor: Строковое представление курсора.
+        :param sorted_by: Поля сортировки, по значениям которых построен курсор.
+        :raises ValidationError: Если курсор поврежден или не соответствует полям сортировки.
+        """
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        except (ValueError, binascii.Error) as exc:
+            raise ValidationError("Invalid cursor") from exc
+        if not isinstance(values, list) or len(values) != len(sorted_by):
+            raise ValidationError("Invalid cursor")
+        for field_, value in zip(sorted_by, values, strict=True):
+            expected = KEYSET_FIELD_TYPES.get(field_.removeprefix("-"))
+            # bool является подклассом int, но не может быть значением числового поля.
+            if expected is None or isinstance(value, bool) or not isinstance(value, expected):
+                raise ValidationError("Invalid cursor")
+        return cls(values=tuple(values))
+
+
+@dataclass(slots=True, kw_only=True)
+class BookIdPage:
+    """
+    Attributes:
+        ids: Идентификаторы книг страницы в порядке сортировки
+        next_cursor: Курсор следующей страницы по последней строке, возвращенной БД,
+                     `None` если страница последняя
+    """
+
+    ids: list[int]
+    next_cursor: BookCursor | None = None
+
+
 @dataclass(slots=True, kw_only=True)
 class BookFilter:
     """
     Attributes:
         viewer_id: Идентификатор пользователя, который запрашивает данные,
                     используется для ограничения доступа
-        search: Поиск по названию, описанию
+        search: Полнотекстовый поиск по названию, авторам и описанию (с сортировкой по релевантности)
         title: Поиск по названию книги
         authors: Поиск по автору
         publisher: Поиск по издательству
@@ -112,6 +181,7 @@ class BookFilter:
         page: Страница для отображения
         page_size: Количество книг на странице
         sorted_by: Поля для сортировки, по умолчанию: ("-year", "-id")
+        cursor: Курсор keyset пагинации, при указании `page` не используется
     """
 
     viewer_id: int | None = None
@@ -130,15 +200,91 @@ class BookFilter:
     page_size: int = 25
     sorted_by: list[str] = field(default_factory=lambda: ["-year", "-id"])
     ids_in: list[int] | None = None
+    cursor: BookCursor | None = None
+
+    def __post_init__(self):
+        if self.cursor is not None and not self.supports_cursor:
+            raise ValidationError("Cursor pagination is not available for full-text search")
 
     def remove_sorted_by_field(self, field_: str):
         with contextlib.suppress(ValueError):
             self.sorted_by.remove(field_)
             self.sorted_by.remove(f"-{field_}")
 
+    def count_signature(self) -> str:
+        """
+        Возвращает нормализованную подпись фильтра для кеширования количества найденных книг.
+        Не зависит от страницы, размера страницы, сортировки и курсора.
+        """
+        raw = json.dumps(self._count_signature_data(), sort_keys=True, ensure_ascii=False)
+        return hashlib.sha1(raw.encode(), usedforsecurity=False).hexdigest()
+
+    @property
+    def is_unfiltered(self) -> bool:
+        """Фильтр не содержит никаких условий, кроме ограничения видимости книг для пользователя."""
+        data = self._count_signature_data()
+        return all(value is None for name, value in data.items() if name != "viewer_id")
+
+    def _count_signature_data(self) -> dict[str, Any]:
+        data: dict[str, Any] = {}
+        for field_ in fields(self):
+            if field_.name in ("page", "page_size", "sorted_by", "cursor"):
+                continue
+            value = getattr(self, field_.name)
+            if isinstance(value, str):
+                value = value.strip().lower() or None
+            elif isinstance(value, list):
+                value = sorted({item.strip().lower() if isinstance(item, str) else item for item in value})
+                value = value or None
+            data[field_.name] = value
+        return data
+
+    @property
+    def keyset_fields(self) -> list[str]:
+        """
+        Поля сортировки для keyset пагинации.
+        Если среди них нет `id`, то он добавляется в конец для однозначного порядка книг.
+        """
+        if any(field_.removeprefix("-") == "id" for field_ in self.sorted_by):
+            return list(self.sorted_by)
+        return [*self.sorted_by, "-id"]
+
+    @property
+    def supports_cursor(self) -> bool:
+        """Keyset пагинация невозможна при сортировке по релевантности полнотекстового поиска."""
+        return not self.search
+
+
+@dataclass(slots=True, kw_only=True)
+class FacetBucket:
+    value: str | int
+    count: int
+
+
+@dataclass(slots=True, kw_only=True)
+class BookFacets:
+    """Количество найденных книг в разрезе тегов, издательств, годов и языков."""
+
+    tags: list[FacetBucket] = field(default_factory=list)
+    publishers: list[FacetBucket] = field(default_factory=list)
+    years: list[FacetBucket] = field(default_factory=list)
+    languages: list[FacetBucket] = field(default_factory=list)
+
 
 @dataclass(slots=True, kw_only=True)
 class BookmarksQueryFilter:
+    """
+    Attributes:
+        user_id: Идентификатор пользователя, закладки которого запрашиваются
+        page: Страница для отображения
+        page_size: Количество книг на странице
+        cursor: Курсор keyset пагинации (идентификатор последней закладки страницы),
+                при указании `page` не используется
+    """
+
     user_id: int
     page: int
     page_size: int
+    cursor: BookCursor | None = None
+
+    keyset_fields = ("id",)
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
+from collections.abc import Sequence
 
-from .entities import Book, BookFilter, BookmarksQueryFilter, Tag
+from .entities import Book, BookFacets, BookFilter, BookIdPage, BookmarksQueryFilter, Tag
 
 
 class BookRepository(ABC):
@@ -10,7 +11,32 @@ class BookRepository(ABC):
     async def get_by_id(self, book_id: int) -> Book: ...
 
     @abstractmethod
-    async def get_filtered(self, filter_: BookFilter) -> tuple[list[Book], int]: ...
+    async def get_by_ids(self, book_ids: Sequence[int]) -> list[Book]:
+        """Возвращает книги по идентификаторам одним запросом, порядок книг не определен."""
+
+    @abstractmethod
+    async def get_filtered_ids(self, filter_: BookFilter) -> tuple[BookIdPage, int]:
+        """Возвращает идентификаторы книг страницы по фильтру в порядке сортировки и общее количество."""
+
+    @abstractmethod
+    async def get_filtered_id_list(self, filter_: BookFilter) -> BookIdPage:
+        """Возвращает идентификаторы книг страницы по фильтру без подсчета общего количества."""
+
+    @abstractmethod
+    async def get_filtered_list(self, filter_: BookFilter) -> list[Book]:
+        """Возвращает страницу книг по фильтру без подсчета общего количества."""
+
+    @abstractmethod
+    async def get_facets(self, filter_: BookFilter, limit: int) -> BookFacets:
+        """
+        Возвращает количество книг по фильтру в разрезе тегов, издательств, годов и языков.
+        :param filter_: Фильтр книг, пагинация не учитывается.
+        :param limit: Максимальное количество значений в каждом разрезе.
+        """
+
+    @abstractmethod
+    async def estimate_count(self) -> int:
+        """Возвращает приблизительное количество всех книг по статистике планировщика БД."""
 
     @abstractmethod
     async def add(self, book: Book) -> Book: ...
@@ -22,10 +48,11 @@ class BookRepository(ABC):
     async def delete(self, book_id: int) -> None: ...
 
     @abstractmethod
-    async def get_favorite_books(self, filter_: BookmarksQueryFilter) -> tuple[list[Book], int]: ...
+    async def update_favorite_status(self, book_id: int, user_id: int, favorite: bool) -> None: ...
 
     @abstractmethod
-    async def update_favorite_status(self, book_id: int, user_id: int, favorite: bool) -> None: ...
+    async def get_favorite_book_ids(self, filter_: BookmarksQueryFilter) -> tuple[BookIdPage, int]:
+        """Возвращает идентификаторы избранных книг страницы в порядке добавления и общее количество."""
 
     @abstractmethod
     async def get_favorite_books_count(self, user_id: int) -> int: ...
@@ -34,10 +61,11 @@ class BookRepository(ABC):
     async def is_favorite_by_user(self, book_id: int, user_id: int) -> bool: ...
 
     @abstractmethod
-    async def get_read_books(self, filter_: BookmarksQueryFilter) -> tuple[list[Book], int]: ...
+    async def update_read_status(self, book_id: int, user_id: int, read: bool) -> None: ...
 
     @abstractmethod
-    async def update_read_status(self, book_id: int, user_id: int, read: bool) -> None: ...
+    async def get_read_book_ids(self, filter_: BookmarksQueryFilter) -> tuple[BookIdPage, int]:
+        """Возвращает идентификаторы прочитанных книг страницы в порядке добавления и общее количество."""
 
     @abstractmethod
     async def get_read_books_count(self, user_id: int) -> int: ...
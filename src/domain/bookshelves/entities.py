@@ -9,6 +9,7 @@ from ..common.exceptions import ValidationError
 class BookValue:
     id: int
     preview: str = ""
+    preview_thumbnails: list[str] = field(default_factory=list)
 
 
 @dataclass(slots=True, kw_only=True)
@@ -1,4 +1,6 @@
 from abc import ABC, abstractmethod
+from collections.abc import Callable
+from contextlib import AbstractAsyncContextManager
 
 from ..auth.repository import RefreshTokenRepository
 from ..books.repository import BookRepository
@@ -40,3 +42,7 @@ class UnitOfWork(ABC):
 
     @abstractmethod
     async def __aexit__(self, exc_type, exc_val, exc_tb) -> None: ...
+
+
+# Создает Unit of Work с собственной сессией, не привязанной к запросу.
+UnitOfWorkFactory = Callable[[], AbstractAsyncContextManager[UnitOfWork]]
@@ -1,4 +1,15 @@
+from .breaker import CircuitBreakerCache
+from .instrumented import InstrumentedCache
 from .local import InMemoryCache
+from .metrics import CacheMetrics
 from .redis import RedisCache
+from .tiered import TieredCache
 
-__all__ = ["InMemoryCache", "RedisCache"]
+__all__ = [
+    "CacheMetrics",
+    "CircuitBreakerCache",
+    "InMemoryCache",
+    "InstrumentedCache",
+    "RedisCache",
+    "TieredCache",
+]
@@ -0,0 +1,64 @@
+"""
+Сравнение сериализаторов кеша на списке последних книг.
+
+Запуск: `python -m src.infrastructure.cache.benchmark [количество повторов]`
+"""
+
+import sys
+import timeit
+from contextlib import suppress
+
+from src.application.books.dto import BookDTO, PublisherDTO
+from src.application.services.cache import CacheSerializer
+from src.application.services.stale_cache import StaleCacheEntry
+
+from .serializers import CompressedSerializer, MsgpackSerializer, OrjsonSerializer, PickleSerializer
+
+
+def recent_books_payload(count: int = 25) -> StaleCacheEntry:
+    """Возвращает запись кеша последних книг в том виде, в котором ее хранит `RecentBookService`."""
+    books = [
+        BookDTO(
+            id=book_id,
+            user_id=1,
+            publisher=PublisherDTO(id=book_id % 7, name="O'Reilly Media"),
+            title=f"Высоконагруженные приложения. Программирование, масштабирование, том {book_id}",
+            description="Книга о проектировании систем обработки данных. " * 20,
+            preview_image=f"/media/previews/{book_id}/preview.png",
+            authors="Мартин Клеппман",
+            pages=640,
+            size=25_000_000,
+            year=2018,
+            private=False,
+            language="Русский",
+            tags=["Базы данных", "Архитектура", "Распределенные системы"],
+        )
+        for book_id in range(count, 0, -1)
+    ]
+    return StaleCacheEntry(value=books, stale_at=0.0)
+
+
+def get_serializers() -> dict[str, CacheSerializer]:
+    serializers: dict[str, CacheSerializer] = {
+        "pickle": PickleSerializer(),
+        "orjson": OrjsonSerializer(),
+    }
+    with suppress(ImportError):
+        serializers["msgpack"] = MsgpackSerializer()
+    for name in list(serializers):
+        serializers[f"{name}+zstd"] = CompressedSerializer(serializers[name], threshold=0)
+    return serializers
+
+
+def main(number: int = 1000) -> None:
+    payload = recent_books_payload()
+    print(f"{'serializer':<14}{'bytes':>10}{'dumps, us':>12}{'loads, us':>12}")
+    for name, serializer in get_serializers().items():
+        data = serializer.dumps(payload)
+        dumps_time = timeit.timeit(lambda s=serializer: s.dumps(payload), number=number) / number * 1e6
+        loads_time = timeit.timeit(lambda s=serializer, d=data: s.loads(d), number=number) / number * 1e6
+        print(f"{name:<14}{len(data):>10}{dumps_time:>12.1f}{loads_time:>12.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
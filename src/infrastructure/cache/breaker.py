@@ -0,0 +1,195 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable, Mapping, MutableSet, Sequence
+from enum import StrEnum
+from typing import Any, TypeVar
+
+from loguru import logger
+
+from src.application.services.cache import AbstractCache
+
+from .local import InMemoryCache
+
+T = TypeVar("T")
+
+
+class CircuitState(StrEnum):
+    closed = "closed"
+    open = "open"
+    half_open = "half_open"
+
+
+class CircuitBreakerCache(AbstractCache):
+    """
+    Автоматический выключатель (circuit breaker) для кэша.
+
+    После `failure_threshold` ошибок подряд основной кэш перестает использоваться на `reset_timeout` секунд,
+    а запросы обслуживает локальный кэш процесса. По истечении этого времени несколько пробных запросов
+    снова отправляются в основной кэш: при успехе выключатель замыкается, при ошибке снова размыкается.
+    Удаления ключей, выполненные при разомкнутом выключателе, повторяются в основном кэше
+    после восстановления.
+    """
+
+    def __init__(
+        self,
+        cache: AbstractCache,
+        fallback: InMemoryCache,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30,
+        call_timeout: float = 0.5,
+        half_open_max_calls: int = 1,
+    ) -> None:
+        """
+        :param cache: :class:`AbstractCache` основной кэш.
+        :param fallback: :class:`InMemoryCache` кэш процесса на время недоступности основного.
+        :param failure_threshold: Количество ошибок подряд, после которого выключатель размыкается.
+        :param reset_timeout: Время в секундах, на которое основной кэш перестает использоваться.
+        :param call_timeout: Максимальное время операции с основным кэшем в секундах.
+        :param half_open_max_calls: Количество одновременных пробных запросов к основному кэшу.
+        """
+        self.cache = cache
+        self.fallback = fallback
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.call_timeout = call_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._state = CircuitState.closed
+        self._failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._opened_total = 0
+        self._fallback_calls = 0
+        self._pending_keys: set[str] = set()
+        self._pending_prefixes: set[str] = set()
+        self._pending_namespaces: set[str] = set()
+
+    @property
+    def state(self) -> CircuitState:
+        if self._state is CircuitState.open and time.monotonic() - self._opened_at >= self.reset_timeout:
+            return CircuitState.half_open
+        return self._state
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        return {
+            "state": self.state.value,
+            "failures": self._failures,
+            "opened_total": self._opened_total,
+            "fallback_calls": self._fallback_calls,
+        }
+
+    async def get(self, key: str) -> Any | None:
+        return await self._call(lambda: self.cache.get(key), lambda: self.fallback.get(key))
+
+    async def set(self, key: str, value: Any, timeout: int) -> None:
+        await self._call(
+            lambda: self.cache.set(key, value, timeout), lambda: self.fallback.set(key, value, timeout)
+        )
+
+    async def get_many(self, keys: Sequence[str]) -> list[Any | None]:
+        return await self._call(lambda: self.cache.get_many(keys), lambda: self.fallback.get_many(keys))
+
+    async def set_many(self, items: Mapping[str, Any], timeout: int) -> None:
+        await self._call(
+            lambda: self.cache.set_many(items, timeout), lambda: self.fallback.set_many(items, timeout)
+        )
+
+    async def delete(self, key: str) -> None:
+        await self.fallback.delete(key)
+        await self._call(lambda: self.cache.delete(key), lambda: self._add_pending(self._pending_keys, key))
+
+    async def delete_namespace(self, prefix: str) -> None:
+        await self.fallback.delete_namespace(prefix)
+        await self._call(
+            lambda: self.cache.delete_namespace(prefix),
+            lambda: self._add_pending(self._pending_prefixes, prefix),
+        )
+
+    async def invalidate_namespace(self, namespace: str) -> None:
+        await self.fallback.invalidate_namespace(namespace)
+        await self._call(
+            lambda: self.cache.invalidate_namespace(namespace),
+            lambda: self._add_pending(self._pending_namespaces, namespace),
+        )
+
+    async def acquire_lock(self, key: str, timeout: int) -> str | None:
+        return await self._call(
+            lambda: self.cache.acquire_lock(key, timeout), lambda: self.fallback.acquire_lock(key, timeout)
+        )
+
+    async def release_lock(self, key: str, token: str) -> None:
+        await self._call(
+            lambda: self.cache.release_lock(key, token), lambda: self.fallback.release_lock(key, token)
+        )
+
+    async def _call(self, primary: Callable[[], Awaitable[T]], fallback: Callable[[], Awaitable[T]]) -> T:
+        if not self._allow_request():
+            self._fallback_calls += 1
+            return await fallback()
+        try:
+            async with asyncio.timeout(self.call_timeout):
+                result = await primary()
+        except asyncio.CancelledError:
+            # Прерванный пробный запрос не должен занимать место других пробных запросов.
+            self._half_open_calls = 0
+            raise
+        except Exception as exc:
+            self._on_failure(exc)
+            self._fallback_calls += 1
+            return await fallback()
+        await self._on_success()
+        return result
+
+    def _allow_request(self) -> bool:
+        state = self.state
+        if state is CircuitState.closed:
+            return True
+        if state is CircuitState.open or self._half_open_calls >= self.half_open_max_calls:
+            return False
+        self._half_open_calls += 1
+        return True
+
+    def _on_failure(self, exc: Exception) -> None:
+        self._failures += 1
+        if self.state is CircuitState.half_open or self._failures >= self.failure_threshold:
+            self._open(exc)
+
+    def _open(self, exc: Exception) -> None:
+        if self._state is not CircuitState.open:
+            self._opened_total += 1
+            logger.warning(f"Cache circuit breaker opened: {exc!r}")
+        self._state = CircuitState.open
+        self._opened_at = time.monotonic()
+        self._half_open_calls = 0
+
+    async def _on_success(self) -> None:
+        self._failures = 0
+        if self._state is CircuitState.closed:
+            return
+        self._state = CircuitState.closed
+        self._half_open_calls = 0
+        logger.info("Cache circuit breaker closed")
+        await self._replay_pending()
+        # Значения, записанные во время недоступности, могли устареть.
+        await self.fallback.clear()
+
+    async def _add_pending(self, pending: MutableSet[str], value: str) -> None:
+        pending.add(value)
+
+    async def _replay_pending(self) -> None:
+        keys, self._pending_keys = self._pending_keys, set()
+        prefixes, self._pending_prefixes = self._pending_prefixes, set()
+        namespaces, self._pending_namespaces = self._pending_namespaces, set()
+        try:
+            for key in keys:
+                await self.cache.delete(key)
+            for prefix in prefixes:
+                await self.cache.delete_namespace(prefix)
+            for namespace in namespaces:
+                await self.cache.invalidate_namespace(namespace)
+        except Exception as exc:
+            self._pending_keys |= keys
+            self._pending_prefixes |= prefixes
+            self._pending_namespaces |= namespaces
+            self._open(exc)
@@ -1,49 +1,42 @@
-from collections.abc import Callable
-from functools import wraps
-from typing import Any
+from collections.abc import Awaitable, Callable, Sequence
+from typing import ParamSpec, TypeVar
 
-from src.infrastructure.dependencies import get_cache
+from src.application.services import memoize
+from src.domain.common.exceptions import ObjectNotFoundError
+from src.infrastructure.dependencies import get_cache, get_single_flight
+
+P = ParamSpec("P")
+R = TypeVar("R")
 
 
 def cached(
     timeout: int,
-    key: str | None = None,
-    variable_positions: list[int] | None = None,
-    delimiter: str = ":",
-) -> Callable[..., Any]:
+    namespace: str | None = None,
+    key: Sequence[str] | Callable[..., str] | None = None,
+    jitter: float = 0.1,
+    negative_timeout: int | None = None,
+    negative_exceptions: tuple[type[Exception], ...] = (ObjectNotFoundError,),
+) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Awaitable[R]]]:
     """
-    Декоратор кэширования функции.
+    Декоратор кэширования функции в общем кэше приложения.
+    Параметры описаны в :func:`src.application.services.memoize.cached`.
 
-    :param timeout: Время жизни кэш.
-    :param key: Ключ кэша, если не указан будет взято имя функции.
-    :param variable_positions: Список позиций аргументов, которые будут добавлены в ключ через str().
-    :param delimiter: Разделитель позиций аргументов.
+    :param timeout: Время жизни кэша.
+    :param namespace: Пространство имен ключей, по умолчанию имя функции.
+    :param key: Имена аргументов, входящих в ключ, или функция, возвращающая часть ключа.
+    :param jitter: Доля случайного увеличения времени жизни.
+    :param negative_timeout: Время жизни результата «не найдено».
+    :param negative_exceptions: Исключения, означающие, что объект не найден.
 
     :return: Декоратор функции.
     """
-
-    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
-        @wraps(func)
-        async def wrapper(*args: Any, **kwargs: Any) -> Any:
-            cache_key: str = key if key is not None else func.__name__
-
-            # Добавляем в название ключа значение аргументов
-            if variable_positions is not None:
-                for pos in variable_positions:
-                    if len(args) >= pos:
-                        cache_key += delimiter + str(args[pos - 1])
-                    elif len(kwargs) >= pos - len(args):
-                        values = list(kwargs.values())
-                        cache_key += delimiter + str(values[pos - len(args) - 1])
-
-            cache = get_cache()
-            value = await cache.get(cache_key)
-            if value is not None:
-                return value
-            value = await func(*args, **kwargs)
-            await cache.set(cache_key, value, timeout)
-            return value
-
-        return wrapper
-
-    return decorator
+    return memoize.cached(
+        timeout,
+        namespace=namespace,
+        key=key,
+        jitter=jitter,
+        negative_timeout=negative_timeout,
+        negative_exceptions=negative_exceptions,
+        cache=get_cache,
+        single_flight=get_single_flight,
+    )
@@ -0,0 +1,72 @@
+import time
+from collections.abc import Mapping, Sequence
+from typing import Any
+
+from src.application.services.cache import AbstractCache
+
+from .metrics import CacheMetrics
+
+
+class InstrumentedCache(AbstractCache):
+    """Собирает метрики попаданий, промахов и времени операций кэша в разрезе пространств имен."""
+
+    def __init__(self, cache: AbstractCache, metrics: CacheMetrics, name: str = "cache") -> None:
+        """
+        :param cache: :class:`AbstractCache` кэш.
+        :param metrics: :class:`CacheMetrics` метрики.
+        :param name: Название кэша в метриках.
+        """
+        self.cache = cache
+        self.metrics = metrics
+        self.name = name
+
+    async def get(self, key: str) -> Any | None:
+        start = time.perf_counter()
+        value = await self.cache.get(key)
+        self.metrics.observe("get_seconds", self.name, key, time.perf_counter() - start)
+        self.metrics.inc("operations", self.name, key, "hit" if value is not None else "miss")
+        return value
+
+    async def set(self, key: str, value: Any, timeout: int) -> None:
+        start = time.perf_counter()
+        await self.cache.set(key, value, timeout)
+        self.metrics.observe("set_seconds", self.name, key, time.perf_counter() - start)
+        self.metrics.inc("operations", self.name, key, "set")
+
+    async def get_many(self, keys: Sequence[str]) -> list[Any | None]:
+        start = time.perf_counter()
+        values = await self.cache.get_many(keys)
+        if keys:
+            self.metrics.observe("get_many_seconds", self.name, keys[0], time.perf_counter() - start)
+        for key, value in zip(keys, values, strict=True):
+            self.metrics.inc("operations", self.name, key, "hit" if value is not None else "miss")
+        return values
+
+    async def set_many(self, items: Mapping[str, Any], timeout: int) -> None:
+        start = time.perf_counter()
+        await self.cache.set_many(items, timeout)
+        if items:
+            elapsed = time.perf_counter() - start
+            self.metrics.observe("set_many_seconds", self.name, next(iter(items)), elapsed)
+        for key in items:
+            self.metrics.inc("operations", self.name, key, "set")
+
+    async def delete(self, key: str) -> None:
+        await self.cache.delete(key)
+        self.metrics.inc("operations", self.name, key, "delete")
+
+    async def delete_namespace(self, prefix: str) -> None:
+        await self.cache.delete_namespace(prefix)
+        self.metrics.inc("operations", self.name, prefix, "delete_namespace")
+
+    async def invalidate_namespace(self, namespace: str) -> None:
+        await self.cache.invalidate_namespace(namespace)
+        self.metrics.inc("operations", self.name, namespace, "invalidate_namespace")
+
+    async def acquire_lock(self, key: str, timeout: int) -> str | None:
+        token = await self.cache.acquire_lock(key, timeout)
+        self.metrics.inc("locks", self.name, key, "acquired" if token is not None else "busy")
+        return token
+
+    async def release_lock(self, key: str, token: str) -> None:
+        await self.cache.release_lock(key, token)
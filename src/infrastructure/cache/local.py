@@ -1,46 +1,288 @@
-import pickle
-from datetime import datetime, timedelta
-from typing import Any, TypedDict
+import asyncio
+import contextlib
+import sys
+import time
+from collections import OrderedDict
+from typing import Any
 
 from loguru import logger
 
-from src.application.services.cache import AbstractCache
+from src.application.services.cache import AbstractCache, CacheSerializer
 
+from .metrics import CacheMetrics, cache_logger
+from .serializers import PickleSerializer
 
-class _ValueType(TypedDict):
-    data: Any
-    expires: datetime
+# Таблица для `bytes.translate`: каждое значение счетчика переходит в половину этого значения.
+_HALVE = bytes(count >> 1 for count in range(256))
+
+
+class _Entry:
+    __slots__ = ("data", "expires", "size")
+
+    def __init__(self, data: Any, expires: float, size: int) -> None:
+        self.data = data
+        self.expires = expires
+        self.size = size
+
+
+class _FrequencySketch:
+    """
+    Приблизительный счетчик частоты обращений к ключам (Count-Min Sketch с 4-битными счетчиками).
+
+    Когда количество обращений достигает `sample_size`, все счетчики уменьшаются вдвое,
+    чтобы давно популярные ключи со временем уступали новым.
+    """
+
+    _depth = 4
+    _max_count = 15
+
+    def __init__(self, capacity: int) -> None:
+        self._width = 1 << max(capacity * 8, 16).bit_length()
+        self._mask = self._width - 1
+        self._table = [bytearray(self._width) for _ in range(self._depth)]
+        self._sample_size = capacity * 10
+        self._additions = 0
+
+    def _indexes(self, key: str):
+        for row in range(self._depth):
+            yield row, hash((row, key)) & self._mask
+
+    def increment(self, key: str) -> None:
+        for row, index in self._indexes(key):
+            if self._table[row][index] < self._max_count:
+                self._table[row][index] += 1
+        self._additions += 1
+        if self._additions >= self._sample_size:
+            self._reset()
+
+    def estimate(self, key: str) -> int:
+        return min(self._table[row][index] for row, index in self._indexes(key))
+
+    def _reset(self) -> None:
+        # Строка уменьшается вдвое за один проход на уровне C, без цикла по счетчикам в Python.
+        for row in self._table:
+            row[:] = row.translate(_HALVE)
+        self._additions //= 2
 
 
 class InMemoryCache(AbstractCache):
-    """Кэш данных в памяти."""
+    """
+    Кэш данных в памяти с ограничением по количеству записей и занимаемому объему.
+
+    Вытеснение реализовано по алгоритму W-TinyLFU: новые записи попадают в небольшое LRU окно,
+    вытесненные из окна записи допускаются в основную сегментированную LRU область (probation/protected),
+    только если обращались к ним чаще, чем к кандидату на вытеснение из основной области.
+    Записи с истекшим временем жизни удаляются при чтении и периодически в фоновой задаче.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        max_bytes: int = 64 * 1024 * 1024,
+        serialize: bool = True,
+        sweep_interval: int = 60,
+        serializer: CacheSerializer | None = None,
+        metrics: CacheMetrics | None = None,
+        metrics_name: str = "local",
+    ) -> None:
+        """
+        :param max_entries: Максимальное количество записей.
+        :param max_bytes: Максимальный объем записей в байтах.
+        :param serialize: Хранить значения в сериализованном виде. Без сериализации значения хранятся
+                          по ссылке, поэтому их нельзя изменять, а объем оценивается приблизительно.
+        :param sweep_interval: Интервал удаления записей с истекшим временем жизни в секундах.
+        :param serializer: :class:`CacheSerializer` сериализатор значений, по умолчанию pickle.
+        :param metrics: :class:`CacheMetrics` метрики размера значений, вытеснений и истечения записей.
+        :param metrics_name: Название кэша в метриках.
+        """
+        self.max_entries = max(max_entries, 2)
+        self.max_bytes = max_bytes
+        self.serialize = serialize
+        self.serializer = serializer or PickleSerializer()
+        self.metrics = metrics
+        self.metrics_name = metrics_name
+        self.sweep_interval = sweep_interval
+
+        self._window_max = max(1, self.max_entries // 100)
+        self._main_max = self.max_entries - self._window_max
+        self._protected_max = int(self._main_max * 0.8)
+
+        self._window: OrderedDict[str, _Entry] = OrderedDict()
+        self._probation: OrderedDict[str, _Entry] = OrderedDict()
+        self._protected: OrderedDict[str, _Entry] = OrderedDict()
+        self._sketch = _FrequencySketch(self.max_entries)
+        self._bytes = 0
+        self._sweeper: asyncio.Task | None = None
+        self._sweeper_loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
 
-    def __init__(self) -> None:
-        self._cache: dict[str, _ValueType] = {}
+    def __len__(self) -> int:
+        return len(self._window) + len(self._probation) + len(self._protected)
 
     async def get(self, key: str) -> Any | None:
-        logger.debug(f"Get from cache {key}", key=key)
+        cache_logger.debug("Get from cache {key}", key=key)
 
-        if value := self._cache.get(key, None):
-            if value["expires"] > datetime.now():
-                return pickle.loads(value["data"])
-            await self.delete(key)
-        return None
+        self._sketch.increment(key)
+        entry = self._touch(key)
+        if entry is None:
+            return None
+        if entry.expires <= time.monotonic():
+            self._remove(key)
+            self._record("expirations", key)
+            return None
+        return self.serializer.loads(entry.data) if self.serialize else entry.data
 
     async def set(self, key: str, value: Any, timeout: int) -> None:
-        logger.debug(f"Set to cache {key}", key=key)
+        cache_logger.debug("Set to cache {key}", key=key)
+        self._start_sweeper()
+
+        data = self.serializer.dumps(value) if self.serialize else value
+        size = len(data) if self.serialize else sys.getsizeof(value)
+        if self.metrics is not None:
+            self.metrics.observe("value_bytes", self.metrics_name, key, size)
+        if size > self.max_bytes:
+            self._remove(key)
+            self._record("evictions", key)
+            return
 
-        self._cache[key] = {
-            "data": pickle.dumps(value),
-            "expires": datetime.now() + timedelta(seconds=timeout),
-        }
+        self._sketch.increment(key)
+        entry = _Entry(data, time.monotonic() + timeout, size)
+        if (old := self._touch(key)) is not None:
+            self._bytes += size - old.size
+            self._segment_of(key)[key] = entry  # type: ignore[index]
+        else:
+            self._window[key] = entry
+            self._bytes += size
+            self._evict_window()
+        self._evict_bytes()
 
     async def delete(self, key: str) -> None:
-        logger.debug(f"Delete_ from cache {key}", key=key)
-        self._cache.pop(key, None)
+        cache_logger.debug("Delete_ from cache {key}", key=key)
+        self._remove(key)
 
     async def delete_namespace(self, prefix: str) -> None:
-        logger.debug(f"Delete namespace from cache {prefix}", prefix=prefix)
-        for key in list(self._cache.keys()):
-            if key.startswith(prefix):
-                self._cache.pop(key, None)
+        cache_logger.debug("Delete namespace from cache {prefix}", prefix=prefix)
+        for segment in (self._window, self._probation, self._protected):
+            for key in [key for key in segment if key.startswith(prefix)]:
+                self._remove(key)
+
+    async def clear(self) -> None:
+        logger.debug("Clear cache")
+        for segment in (self._window, self._probation, self._protected):
+            segment.clear()
+        self._bytes = 0
+
+    async def close(self) -> None:
+        """Останавливает фоновое удаление записей с истекшим временем жизни."""
+        if self._sweeper is None:
+            return
+        if self._sweeper_loop is asyncio.get_running_loop():
+            self._sweeper.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._sweeper
+            self._sweeper = None
+            self._sweeper_loop = None
+        else:
+            self._cancel_foreign_sweeper()
+
+    def sweep(self) -> int:
+        """
+        Удаляет записи с истекшим временем жизни.
+        :return: Количество удаленных записей.
+        """
+        now = time.monotonic()
+        expired = [
+            key
+            for segment in (self._window, self._probation, self._protected)
+            for key, entry in segment.items()
+            if entry.expires <= now
+        ]
+        for key in expired:
+            self._remove(key)
+            self._record("expirations", key)
+        return len(expired)
+
+    def _start_sweeper(self) -> None:
+        """Запускает фоновое удаление в текущем event loop, задача другого loop перезапускается."""
+        loop = asyncio.get_running_loop()
+        if self._sweeper is not None and self._sweeper_loop is not loop:
+            self._cancel_foreign_sweeper()
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = loop.create_task(self._sweep_loop())
+            self._sweeper_loop = loop
+
+    def _cancel_foreign_sweeper(self) -> None:
+        """
+        Отменяет задачу удаления, созданную в другом event loop.
+        Задачу нельзя ожидать из текущего loop, поэтому отмена передается в ее loop,
+        а если он уже закрыт, задача больше не выполняется и просто забывается.
+        """
+        sweeper, loop = self._sweeper, self._sweeper_loop
+        self._sweeper = None
+        self._sweeper_loop = None
+        if sweeper is not None and loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(sweeper.cancel)
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            if removed := self.sweep():
+                logger.debug(f"Removed {removed} expired entries from cache")
+
+    def _segment_of(self, key: str) -> OrderedDict[str, _Entry] | None:
+        for segment in (self._window, self._probation, self._protected):
+            if key in segment:
+                return segment
+        return None
+
+    def _touch(self, key: str) -> _Entry | None:
+        """Отмечает обращение к записи и возвращает ее."""
+        if key in self._window:
+            self._window.move_to_end(key)
+            return self._window[key]
+        if key in self._protected:
+            self._protected.move_to_end(key)
+            return self._protected[key]
+        if key in self._probation:
+            # Повторное обращение переводит запись в защищенный сегмент.
+            entry = self._probation.pop(key)
+            self._protected[key] = entry
+            if len(self._protected) > self._protected_max:
+                demoted_key, demoted = self._protected.popitem(last=False)
+                self._probation[demoted_key] = demoted
+            return entry
+        return None
+
+    def _remove(self, key: str) -> None:
+        if (segment := self._segment_of(key)) is not None:
+            self._bytes -= segment.pop(key).size
+
+    def _evict_window(self) -> None:
+        while len(self._window) > self._window_max:
+            candidate_key, candidate = self._window.popitem(last=False)
+            if len(self._probation) + len(self._protected) < self._main_max:
+                self._probation[candidate_key] = candidate
+                continue
+
+            victim_key = next(iter(self._probation or self._protected))
+            if self._sketch.estimate(candidate_key) > self._sketch.estimate(victim_key):
+                self._remove(victim_key)
+                self._record("evictions", victim_key)
+                self._probation[candidate_key] = candidate
+            else:
+                self._bytes -= candidate.size
+                self._record("evictions", candidate_key)
+
+    def _evict_bytes(self) -> None:
+        for segment in (self._probation, self._window, self._protected):
+            while self._bytes > self.max_bytes and segment:
+                key, entry = segment.popitem(last=False)
+                self._bytes -= entry.size
+                self._record("evictions", key)
+
+    def _record(self, name: str, key: str) -> None:
+        if self.metrics is not None:
+            self.metrics.inc(name, self.metrics_name, key)
@@ -0,0 +1,103 @@
+import random
+from bisect import bisect_left
+from collections import defaultdict
+from collections.abc import Callable
+
+from loguru import logger
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+def namespace_of(key: str) -> str:
+    """Пространство имен ключа: часть до первого `:`."""
+    return key.partition(":")[0]
+
+
+class SampledLogger:
+    """
+    Журналирует только часть операций кэша, чтобы запись каждой операции не замедляла кэш.
+    Сообщение форматируется loguru только для попавших в выборку записей.
+    """
+
+    def __init__(self, rate: float = 0.01) -> None:
+        """
+        :param rate: Доля записываемых сообщений от 0 до 1.
+        """
+        self.rate = rate
+
+    def debug(self, message: str, **kwargs) -> None:
+        if self.rate > 0 and random.random() < self.rate:
+            logger.debug(message, **kwargs)
+
+
+cache_logger = SampledLogger()
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class CacheMetrics:
+    """
+    Метрики кэша в разрезе кэша и пространства имен ключей: счетчики операций,
+    гистограммы времени операций и размера сериализованных значений.
+    Отдаются в текстовом формате Prometheus.
+    """
+
+    def __init__(self) -> None:
+        self._counters: dict[tuple[str, str, str, str], int] = defaultdict(int)
+        self._histograms: dict[tuple[str, str, str], Histogram] = {}
+        self._gauges: dict[str, Callable[[], float]] = {}
+
+    def inc(self, name: str, cache: str, key: str, result: str = "", value: int = 1) -> None:
+        """
+        Увеличивает счетчик.
+        :param name: Название метрики, например `operations` или `evictions`.
+        :param cache: Название кэша.
+        :param key: Ключ, по которому определяется пространство имен.
+        :param result: Дополнительная метка, например `hit` или `miss`.
+        """
+        self._counters[(name, cache, namespace_of(key), result)] += value
+
+    def observe(self, name: str, cache: str, key: str, value: float) -> None:
+        """Добавляет значение в гистограмму `name` (`get_seconds`, `set_seconds`, `value_bytes`)."""
+        index = (name, cache, namespace_of(key))
+        if (histogram := self._histograms.get(index)) is None:
+            buckets = SIZE_BUCKETS if name.endswith("bytes") else LATENCY_BUCKETS
+            histogram = self._histograms[index] = Histogram(buckets)
+        histogram.observe(value)
+
+    def register_gauge(self, name: str, getter: Callable[[], float]) -> None:
+        """Регистрирует метрику, значение которой вычисляется при выгрузке."""
+        self._gauges[name] = getter
+
+    def render(self) -> str:
+        lines = []
+        for (name, cache, namespace, result), value in sorted(self._counters.items()):
+            labels = f'cache="{cache}",namespace="{namespace}"'
+            if result:
+                labels += f',result="{result}"'
+            lines.append(f"cache_{name}_total{{{labels}}} {value}")
+
+        for (name, cache, namespace), histogram in sorted(self._histograms.items()):
+            labels = f'cache="{cache}",namespace="{namespace}"'
+            cumulative = 0
+            for bound, count in zip((*histogram.buckets, "+Inf"), histogram.counts, strict=True):
+                cumulative += count
+                lines.append(f'cache_{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"cache_{name}_sum{{{labels}}} {histogram.sum}")
+            lines.append(f"cache_{name}_count{{{labels}}} {histogram.count}")
+
+        for name, getter in sorted(self._gauges.items()):
+            lines.append(f"{name} {getter()}")
+        return "\n".join(lines) + "\n"
@@ -1,51 +1,236 @@
-import pickle
+import json
+import uuid
+from collections.abc import AsyncGenerator, Mapping, Sequence
 from typing import Any
 
 from loguru import logger
-from redis.asyncio import ConnectionPool, Redis
+from redis.asyncio import BlockingConnectionPool, Redis
 
-from src.application.services.cache import AbstractCache
+from src.application.services.cache import AbstractCache, CacheSerializer
+
+from .metrics import CacheMetrics, cache_logger
+from .serializers import get_serializer
+
+# Удаляет блокировку, только если она захвачена с указанным токеном.
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
 
 
 class RedisCache(AbstractCache):
-    """Кэш данных в Redis."""
+    """
+    Кэш данных в Redis.
+
+    Ключи вида `<namespace>:<key>` хранятся с номером поколения пространства имен: `<namespace>:v<gen>:<key>`.
+    Инвалидация пространства имен увеличивает счетчик поколений одной командой `INCR`,
+    а ключи прошлых поколений удаляются по истечении их времени жизни.
+
+    Номер поколения читается отдельной командой перед обращением к данным, а не внутри Lua скрипта,
+    поэтому все ключи передаются командам явно и могут находиться на разных узлах Redis Cluster.
+    Запись, начатая до инвалидации, попадает в прошлое поколение и уже не читается.
+    """
+
+    generation_key_prefix = "namespace_generation"
 
     def __init__(
-        self, host: str, port: int, db: int, password: str | None = None, max_connections: int = 5
+        self,
+        host: str,
+        port: int,
+        db: int,
+        password: str | None = None,
+        max_connections: int = 20,
+        invalidation_channel: str | None = None,
+        serializer: CacheSerializer | None = None,
+        metrics: CacheMetrics | None = None,
+        metrics_name: str = "redis",
     ) -> None:
-        self._pool = ConnectionPool(
-            host=host,
-            port=port,
-            db=db,
-            password=password,
-            socket_timeout=2,
-            socket_connect_timeout=2,
-            max_connections=max_connections,
+        """
+        :param max_connections: Размер пула соединений для команд. Когда все соединения заняты,
+                                команда ждет освободившееся соединение, а не завершается ошибкой.
+        :param invalidation_channel: Канал Redis pub/sub, в который публикуются измененные ключи и префиксы,
+                                     чтобы процессы с локальной копией кеша могли ее сбросить.
+        :param serializer: :class:`CacheSerializer` сериализатор значений,
+                           по умолчанию orjson со сжатием zstd.
+        :param metrics: :class:`CacheMetrics` метрики размера сериализованных значений.
+        :param metrics_name: Название кэша в метриках.
+        """
+        self.instance_id = uuid.uuid4().hex
+        self.serializer = serializer or get_serializer()
+        self.metrics = metrics
+        self.metrics_name = metrics_name
+        self.invalidation_channel = invalidation_channel
+        self._connection_kwargs: dict[str, Any] = {
+            "host": host,
+            "port": port,
+            "db": db,
+            "password": password,
+            "socket_timeout": 2,
+            "socket_connect_timeout": 2,
+        }
+        self._pool = BlockingConnectionPool(
+            **self._connection_kwargs, max_connections=max_connections, timeout=2
         )
         self._redis = Redis(connection_pool=self._pool)
+        # Скрипт выполняется по SHA1 командой `EVALSHA`, исходный код отправляется в Redis
+        # только при первом вызове или после сброса кеша скриптов.
+        self._release_lock = self._redis.register_script(RELEASE_LOCK_SCRIPT)
 
     async def get(self, key: str) -> Any | None:
-        logger.debug(f"Get from cache {key}", key=key)
+        cache_logger.debug("Get from cache {key}", key=key)
 
-        value = await self._redis.get(key)
-        if value is not None:
-            return pickle.loads(value)  # type: ignore
-        return None
+        [versioned_key] = await self._versioned_keys([key])
+        value = await self._redis.get(versioned_key)
+        if value is None:
+            return None
+        try:
+            return self.serializer.loads(value)
+        except CacheSerializer.SerializationError as exc:
+            # Например, значение записано до смены формата, считается отсутствующим.
+            logger.warning(f"Can't load cache value {key}: {exc}", key=key)
+            return None
 
     async def set(self, key: str, value: Any, expire: int) -> None:
-        logger.debug(f"Set to cache {key}", key=key)
+        cache_logger.debug("Set to cache {key}", key=key)
+
+        try:
+            data = self.serializer.dumps(value)
+        except CacheSerializer.SerializationError as exc:
+            logger.warning(f"Can't serialize cache value {key}: {exc}", key=key)
+            return
+        if self.metrics is not None:
+            self.metrics.observe("value_bytes", self.metrics_name, key, len(data))
+        [versioned_key] = await self._versioned_keys([key])
+        await self._redis.set(versioned_key, data, ex=expire)
+        await self._publish_invalidation(key=key)
+
+    async def get_many(self, keys: Sequence[str]) -> list[Any | None]:
+        """Получает значения одной командой `MGET` после чтения поколений пространств имен."""
+        cache_logger.debug("Get many from cache {count}", count=len(keys))
+
+        if not keys:
+            return []
+        values = await self._redis.mget(await self._versioned_keys(keys))
+
+        results: list[Any | None] = []
+        for key, value in zip(keys, values, strict=True):
+            if value is None:
+                results.append(None)
+                continue
+            try:
+                results.append(self.serializer.loads(value))
+            except CacheSerializer.SerializationError as exc:
+                logger.warning(f"Can't load cache value {key}: {exc}", key=key)
+                results.append(None)
+        return results
+
+    async def set_many(self, items: Mapping[str, Any], timeout: int) -> None:
+        """Записывает значения одним конвейером команд `SET` после чтения поколений пространств имен."""
+        cache_logger.debug("Set many to cache {count}", count=len(items))
 
-        await self._redis.set(key, pickle.dumps(value), ex=expire)
+        data: dict[str, bytes] = {}
+        for key, value in items.items():
+            try:
+                data[key] = self.serializer.dumps(value)
+            except CacheSerializer.SerializationError as exc:
+                logger.warning(f"Can't serialize cache value {key}: {exc}", key=key)
+                continue
+            if self.metrics is not None:
+                self.metrics.observe("value_bytes", self.metrics_name, key, len(data[key]))
+
+        if not data:
+            return
+        versioned_keys = await self._versioned_keys(list(data))
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for versioned_key, value in zip(versioned_keys, data.values(), strict=True):
+                pipe.set(versioned_key, value, ex=timeout)
+            await pipe.execute()
+        await self._publish_invalidation(keys=list(data))
 
     async def delete(self, key: str) -> None:
-        logger.debug(f"Delete_ from cache {key}", key=key)
-        await self._redis.delete(key)
+        cache_logger.debug("Delete_ from cache {key}", key=key)
+        [versioned_key] = await self._versioned_keys([key])
+        await self._redis.delete(versioned_key)
+        await self._publish_invalidation(key=key)
 
     async def clear(self) -> None:
         logger.debug("Clear cache")
         await self._redis.flushdb(asynchronous=True)
+        await self._publish_invalidation(prefix="")
 
     async def delete_namespace(self, prefix: str) -> None:
-        logger.debug(f"Delete namespace from cache {prefix}", prefix=prefix)
-        async for key in self._redis.scan_iter(f"{prefix}*"):
+        cache_logger.debug("Delete namespace from cache {prefix}", prefix=prefix)
+        [versioned_prefix] = await self._versioned_keys([prefix])
+        async for key in self._redis.scan_iter(f"{versioned_prefix}*"):
             await self._redis.delete(key)
+        await self._publish_invalidation(prefix=prefix)
+
+    async def invalidate_namespace(self, namespace: str) -> None:
+        cache_logger.debug("Invalidate namespace {namespace}", namespace=namespace)
+        await self._redis.incr(self._generation_key(namespace))
+        await self._publish_invalidation(prefix=f"{namespace}:")
+
+    async def acquire_lock(self, key: str, timeout: int) -> str | None:
+        token = uuid.uuid4().hex
+        if await self._redis.set(key, token, nx=True, ex=timeout):
+            return token
+        return None
+
+    async def release_lock(self, key: str, token: str) -> None:
+        await self._release_lock(keys=[key], args=[token])
+
+    async def close(self) -> None:
+        """Закрывает соединения пула команд."""
+        await self._redis.aclose()
+        await self._pool.disconnect()
+
+    async def listen(self, channel: str) -> AsyncGenerator[str]:
+        """
+        Подписывается на канал Redis pub/sub и возвращает поступающие сообщения.
+        Подписка занимает соединение на все время прослушивания, поэтому для нее открывается
+        отдельное соединение, а не берется соединение из пула команд кеша.
+        """
+        client = Redis(**self._connection_kwargs)
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(channel)
+            while True:
+                message = await pubsub.get_message(timeout=1.0)
+                if message is not None:
+                    yield message["data"].decode()
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+
+    async def _versioned_keys(self, keys: Sequence[str]) -> list[str]:
+        """
+        Заменяет ключи вида `<namespace>:<key>` ключами текущего поколения `<namespace>:v<gen>:<key>`.
+        Счетчики поколений всех пространств имен читаются одной командой `MGET`,
+        ключи без пространства имен не версионируются и не требуют обращения к Redis.
+        """
+        namespaces = list(dict.fromkeys(key.partition(":")[0] for key in keys if ":" in key))
+        if not namespaces:
+            return list(keys)
+        generations = await self._redis.mget([self._generation_key(namespace) for namespace in namespaces])
+        versions = {
+            namespace: int(generation or 0)
+            for namespace, generation in zip(namespaces, generations, strict=True)
+        }
+        versioned_keys = []
+        for key in keys:
+            namespace, delimiter, rest = key.partition(":")
+            versioned_keys.append(f"{namespace}:v{versions[namespace]}:{rest}" if delimiter else key)
+        return versioned_keys
+
+    def _generation_key(self, namespace: str) -> str:
+        return f"{self.generation_key_prefix}:{namespace}"
+
+    async def _publish_invalidation(
+        self, key: str | None = None, prefix: str | None = None, keys: list[str] | None = None
+    ) -> None:
+        if self.invalidation_channel is None:
+            return
+        message = {"origin": self.instance_id, "key": key, "prefix": prefix, "keys": keys}
+        await self._redis.publish(self.invalidation_channel, json.dumps(message))
@@ -0,0 +1,235 @@
+import dataclasses
+import pickle
+from abc import abstractmethod
+from collections.abc import Iterable
+from compression import zstd
+from datetime import datetime
+from typing import Any
+
+import orjson
+
+from src.application.books.dto import (
+    BookDTO,
+    BookFacetsDTO,
+    BookshelfLinkDTO,
+    BookWithReadPagesDTO,
+    DetailBookDTO,
+    FacetBucketDTO,
+    PublisherDTO,
+    TagDTO,
+)
+from src.application.bookshelves.dto import BookshelfDTO, BookshelfElementDTO
+from src.application.services.cache import CacheSerializer
+from src.application.services.memoize import NegativeCacheEntry
+from src.application.services.stale_cache import StaleCacheEntry
+from src.application.services.thumbnail import ImageVariant
+
+TYPE_FIELD = "__type__"
+DATETIME_FIELD = "__datetime__"
+TUPLE_FIELD = "__tuple__"
+DICT_FIELD = "__dict__"
+MARKER_FIELDS = frozenset((TYPE_FIELD, DATETIME_FIELD, TUPLE_FIELD, DICT_FIELD))
+
+# Dataclass, которые можно хранить в общем кеше. Другие классы не записываются и не восстанавливаются,
+# поэтому данные, записанные в кеш в обход приложения, не могут создать объект произвольного класса.
+CACHEABLE_TYPES: tuple[type, ...] = (
+    BookDTO,
+    BookWithReadPagesDTO,
+    DetailBookDTO,
+    PublisherDTO,
+    TagDTO,
+    BookshelfLinkDTO,
+    BookFacetsDTO,
+    FacetBucketDTO,
+    BookshelfDTO,
+    BookshelfElementDTO,
+    ImageVariant,
+    StaleCacheEntry,
+    NegativeCacheEntry,
+)
+
+
+def _type_name(cls: type) -> str:
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+class _TypedSerializer(CacheSerializer):
+    """
+    Сериализатор в формат без поддержки пользовательских типов (JSON, MessagePack).
+
+    Dataclass объекты из реестра записываются как словари с именем класса и восстанавливаются в исходные
+    классы, `datetime` записывается в ISO формате, кортежи помечаются, чтобы не превратиться в списки.
+    Словари с ключами, совпадающими со служебными полями, оборачиваются, чтобы не быть принятыми за метки.
+    """
+
+    def __init__(self, types: Iterable[type] = CACHEABLE_TYPES) -> None:
+        """
+        :param types: Dataclass, которые можно записывать в кеш и восстанавливать.
+        """
+        self.types = {_type_name(cls): cls for cls in types}
+
+    def dumps(self, value: Any) -> bytes:
+        try:
+            return self._pack(self._encode(value))
+        except (TypeError, ValueError) as exc:
+            raise self.SerializationError(str(exc)) from exc
+
+    def loads(self, data: bytes) -> Any:
+        try:
+            return self._decode(self._unpack(data))
+        except (TypeError, ValueError, KeyError, AttributeError) as exc:
+            raise self.SerializationError(str(exc)) from exc
+
+    @abstractmethod
+    def _pack(self, value: Any) -> bytes:
+        """Записывает значение из базовых типов в байты."""
+
+    @abstractmethod
+    def _unpack(self, data: bytes) -> Any:
+        """Читает значение из базовых типов из байтов."""
+
+    def _encode(self, value: Any) -> Any:
+        if dataclasses.is_dataclass(value) and not isinstance(value, type):
+            type_name = _type_name(type(value))
+            if type_name not in self.types:
+                raise TypeError(f"Type {type_name} is not registered for caching")
+            data = {
+                field.name: self._encode(getattr(value, field.name))
+                for field in dataclasses.fields(value)
+                if field.init
+            }
+            data[TYPE_FIELD] = type_name
+            return data
+        if isinstance(value, tuple):
+            return {TUPLE_FIELD: [self._encode(item) for item in value]}
+        if isinstance(value, list):
+            return [self._encode(item) for item in value]
+        if isinstance(value, dict):
+            data = {key: self._encode(item) for key, item in value.items()}
+            return {DICT_FIELD: data} if MARKER_FIELDS.intersection(data) else data
+        if isinstance(value, datetime):
+            return {DATETIME_FIELD: value.isoformat()}
+        return value
+
+    def _decode(self, value: Any) -> Any:
+        if isinstance(value, list):
+            return [self._decode(item) for item in value]
+        if not isinstance(value, dict):
+            return value
+        if len(value) == 1:
+            marker, payload = next(iter(value.items()))
+            if marker == DATETIME_FIELD:
+                return datetime.fromisoformat(payload)
+            if marker == TUPLE_FIELD:
+                return tuple(self._decode(item) for item in payload)
+            if marker == DICT_FIELD:
+                return {key: self._decode(item) for key, item in payload.items()}
+        if TYPE_FIELD in value:
+            cls = self.types.get(value[TYPE_FIELD])
+            if cls is None:
+                raise self.SerializationError(f"Type {value[TYPE_FIELD]} is not allowed")
+            return cls(**{key: self._decode(item) for key, item in value.items() if key != TYPE_FIELD})
+        if MARKER_FIELDS.intersection(value):
+            raise self.SerializationError("Unexpected marker field in cached data")
+        return {key: self._decode(item) for key, item in value.items()}
+
+
+class OrjsonSerializer(_TypedSerializer):
+    """Сериализатор в JSON с помощью orjson."""
+
+    def _pack(self, value: Any) -> bytes:
+        return orjson.dumps(value)
+
+    def _unpack(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+class MsgpackSerializer(_TypedSerializer):
+    """Сериализатор в MessagePack, требует установленный пакет `msgpack` (extra `msgpack`)."""
+
+    def __init__(self, types: Iterable[type] = CACHEABLE_TYPES) -> None:
+        super().__init__(types)
+        import msgpack
+
+        self._msgpack = msgpack
+
+    def _pack(self, value: Any) -> bytes:
+        return self._msgpack.packb(value)
+
+    def _unpack(self, data: bytes) -> Any:
+        return self._msgpack.unpackb(data)
+
+
+class PickleSerializer(CacheSerializer):
+    """
+    Сериализатор pickle, сохраняет любые объекты.
+    Подходит только для кеша в памяти процесса: загрузка pickle из общего хранилища небезопасна.
+    """
+
+    def dumps(self, value: Any) -> bytes:
+        try:
+            return pickle.dumps(value)
+        except (pickle.PicklingError, TypeError, AttributeError) as exc:
+            raise self.SerializationError(str(exc)) from exc
+
+    def loads(self, data: bytes) -> Any:
+        try:
+            return pickle.loads(data)  # noqa: S301
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError) as exc:
+            raise self.SerializationError(str(exc)) from exc
+
+
+class CompressedSerializer(CacheSerializer):
+    """
+    Сжимает результат другого сериализатора алгоритмом zstd, если он больше порога.
+
+    Первый байт данных указывает, сжаты ли они, поэтому данные, записанные в другом формате,
+    не распознаются и вызывают :class:`CacheSerializer.SerializationError`.
+    """
+
+    _raw = b"\x00"
+    _zstd = b"\x01"
+
+    def __init__(self, serializer: CacheSerializer, threshold: int | None = 1024, level: int = 3) -> None:
+        """
+        :param serializer: :class:`CacheSerializer` основной сериализатор.
+        :param threshold: Минимальный размер данных в байтах для сжатия, `None` отключает сжатие.
+        :param level: Уровень сжатия zstd.
+        """
+        self.serializer = serializer
+        self.threshold = threshold
+        self.level = level
+
+    def dumps(self, value: Any) -> bytes:
+        data = self.serializer.dumps(value)
+        if self.threshold is not None and len(data) >= self.threshold:
+            return self._zstd + zstd.compress(data, level=self.level)
+        return self._raw + data
+
+    def loads(self, data: bytes) -> Any:
+        header, body = data[:1], data[1:]
+        if header == self._raw:
+            return self.serializer.loads(body)
+        if header == self._zstd:
+            try:
+                body = zstd.decompress(body)
+            except zstd.ZstdError as exc:
+                raise self.SerializationError(str(exc)) from exc
+            return self.serializer.loads(body)
+        raise self.SerializationError("Unknown cache data format")
+
+
+def get_serializer(name: str = "orjson", compress_threshold: int | None = 1024) -> CacheSerializer:
+    """
+    Возвращает сериализатор значений кеша.
+    :param name: Формат: `orjson`, `msgpack` или `pickle`.
+    :param compress_threshold: Минимальный размер данных в байтах для сжатия zstd, `None` отключает сжатие.
+    """
+    serializers: dict[str, type[CacheSerializer]] = {
+        "orjson": OrjsonSerializer,
+        "msgpack": MsgpackSerializer,
+        "pickle": PickleSerializer,
+    }
+    if name not in serializers:
+        raise ValueError(f"Unknown cache serializer {name}")
+    return CompressedSerializer(serializers[name](), threshold=compress_threshold)
@@ -0,0 +1,126 @@
+import asyncio
+import contextlib
+import json
+from collections.abc import Mapping, Sequence
+from typing import Any
+
+from loguru import logger
+
+from src.application.services.cache import AbstractCache
+
+from .local import InMemoryCache
+from .redis import RedisCache
+
+
+class TieredCache(AbstractCache):
+    """
+    Двухуровневый кэш: небольшой кэш в памяти процесса (L1) перед общим кэшем в Redis (L2).
+
+    Значения из Redis копируются в L1 на короткое время, поэтому частые чтения не выходят за пределы процесса.
+    Изменения ключей публикуются через Redis pub/sub, и каждый процесс приложения удаляет свою копию из L1.
+    """
+
+    def __init__(self, local: InMemoryCache, remote: RedisCache, local_ttl: int = 30) -> None:
+        """
+        :param local: :class:`InMemoryCache` кэш процесса (L1).
+        :param remote: :class:`RedisCache` общий кэш (L2), должен публиковать изменения в канал.
+        :param local_ttl: Максимальное время хранения значения в L1 в секундах,
+                          ограничивает устаревание при потере сообщений об изменениях.
+        """
+        if remote.invalidation_channel is None:
+            raise ValueError("RedisCache must be created with invalidation_channel")
+        self.local = local
+        self.remote = remote
+        self.local_ttl = local_ttl
+        self._listener: asyncio.Task | None = None
+
+    async def get(self, key: str) -> Any | None:
+        self._start_listener()
+        value = await self.local.get(key)
+        if value is not None:
+            return value
+        value = await self.remote.get(key)
+        if value is not None:
+            await self.local.set(key, value, self.local_ttl)
+        return value
+
+    async def set(self, key: str, value: Any, timeout: int) -> None:
+        await self.remote.set(key, value, timeout)
+        await self.local.set(key, value, min(timeout, self.local_ttl))
+
+    async def get_many(self, keys: Sequence[str]) -> list[Any | None]:
+        self._start_listener()
+        values = await self.local.get_many(keys)
+        misses = [key for key, value in zip(keys, values, strict=True) if value is None]
+        if not misses:
+            return values
+        remote_values = dict(zip(misses, await self.remote.get_many(misses), strict=True))
+        for key, value in remote_values.items():
+            if value is not None:
+                await self.local.set(key, value, self.local_ttl)
+        return [
+            remote_values[key] if value is None else value for key, value in zip(keys, values, strict=True)
+        ]
+
+    async def set_many(self, items: Mapping[str, Any], timeout: int) -> None:
+        await self.remote.set_many(items, timeout)
+        await self.local.set_many(items, min(timeout, self.local_ttl))
+
+    async def delete(self, key: str) -> None:
+        await self.local.delete(key)
+        await self.remote.delete(key)
+
+    async def delete_namespace(self, prefix: str) -> None:
+        await self.local.delete_namespace(prefix)
+        await self.remote.delete_namespace(prefix)
+
+    async def invalidate_namespace(self, namespace: str) -> None:
+        await self.local.delete_namespace(f"{namespace}:")
+        await self.remote.invalidate_namespace(namespace)
+
+    async def acquire_lock(self, key: str, timeout: int) -> str | None:
+        return await self.remote.acquire_lock(key, timeout)
+
+    async def release_lock(self, key: str, token: str) -> None:
+        await self.remote.release_lock(key, token)
+
+    async def close(self) -> None:
+        """Останавливает прослушивание изменений."""
+        if self._listener is not None:
+            self._listener.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._listener
+            self._listener = None
+        await self.local.close()
+
+    def _start_listener(self) -> None:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+
+    async def _listen(self) -> None:
+        assert self.remote.invalidation_channel is not None
+        while True:
+            try:
+                # Пока подписки не было, сообщения могли быть пропущены.
+                await self.local.clear()
+                # Подписка использует отдельное соединение, которое закрывается сразу при остановке.
+                messages = self.remote.listen(self.remote.invalidation_channel)
+                async with contextlib.aclosing(messages):
+                    async for message in messages:
+                        await self._invalidate(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning(f"Cache invalidation listener error: {exc}")
+                await asyncio.sleep(1)
+
+    async def _invalidate(self, message: str) -> None:
+        data = json.loads(message)
+        if data["origin"] == self.remote.instance_id:
+            return
+        if data["key"] is not None:
+            await self.local.delete(data["key"])
+        for key in data.get("keys") or []:
+            await self.local.delete(key)
+        if data["prefix"] is not None:
+            await self.local.delete_namespace(data["prefix"])
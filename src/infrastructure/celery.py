@@ -4,13 +4,21 @@ from functools import wraps
 
 import loguru
 from celery import Celery, Task
-
-from src.application.books.services import RecentBookService, create_book_preview_and_update_pages_count
+from celery.signals import worker_process_init, worker_process_shutdown
+
+from src.application.books.handlers import get_book_detail_cache_key
+from src.application.books.services import (
+    BookCacheService,
+    BookCountService,
+    RecentBookService,
+    create_book_preview_and_update_pages_count,
+)
 from src.application.services.task_manager import TaskManager
-from src.application.services.thumbnail import create_thumbnails
 from src.infrastructure.cache import RedisCache
+from src.infrastructure.cache.serializers import get_serializer
 from src.infrastructure.db.repositories.books_repo import SqlAlchemyBookRepository
 from src.infrastructure.db.session_manager import db_manager, scoped_session
+from src.infrastructure.db.unit_of_work import new_unit_of_work
 from src.infrastructure.dependencies import get_storage
 from src.infrastructure.email import SMTPEmailService
 from src.infrastructure.settings import settings
@@ -47,20 +55,64 @@ def celery_async_task(*celery_args, **celery_kwargs):
 _worker_loop = None
 
 
+def _get_worker_loop() -> asyncio.AbstractEventLoop:
+    global _worker_loop
+
+    # создаём loop один раз при старте воркера
+    if _worker_loop is None or _worker_loop.is_closed():
+        _worker_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_worker_loop)
+    return _worker_loop
+
+
 def _wrap_async(async_func):
     @wraps(async_func)
     def wrapper(*args, **kwargs):
-        global _worker_loop
+        # выполняем задачу в loop воркера
+        return _get_worker_loop().run_until_complete(async_func(*args, **kwargs))
+
+    return wrapper
 
-        # создаём loop один раз при старте воркера
-        if _worker_loop is None or _worker_loop.is_closed():
-            _worker_loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(_worker_loop)
 
-        # выполняем задачу в этом loop
-        return _worker_loop.run_until_complete(async_func(*args, **kwargs))
+_worker_cache: RedisCache | None = None
 
-    return wrapper
+
+def _get_worker_cache() -> RedisCache:
+    """
+    Кеш процесса воркера, общий для всех задач процесса.
+    Создается при первом обращении, поэтому работает и при task_always_eager=True.
+    """
+    global _worker_cache
+
+    if _worker_cache is None:
+        _worker_cache = RedisCache(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            password=settings.REDIS_PASSWORD,
+            max_connections=1,
+            invalidation_channel=settings.cache_invalidation_channel,
+            serializer=get_serializer(settings.cache_serializer, settings.cache_compress_threshold),
+        )
+    return _worker_cache
+
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    """Открывает соединения хранилища в loop процесса воркера, где выполняются задачи."""
+    _get_worker_loop().run_until_complete(get_storage().connect())
+    _get_worker_cache()
+
+
+@worker_process_shutdown.connect
+def shutdown_worker_process(**kwargs):
+    global _worker_cache
+
+    if _worker_loop is not None and not _worker_loop.is_closed():
+        _worker_loop.run_until_complete(get_storage().close())
+        if _worker_cache is not None:
+            _worker_loop.run_until_complete(_worker_cache.close())
+            _worker_cache = None
 
 
 @celery_async_task(name="create_book_preview_task", ignore_result=True)
@@ -68,26 +120,28 @@ async def create_book_preview_task(book_id: int):
     """
     Асинхронная логика задачи (используется SQLAlchemy, Redis и другие async-компоненты)
     """
-    cache = RedisCache(
-        host=settings.REDIS_HOST,
-        port=settings.REDIS_PORT,
-        db=settings.REDIS_DB,
-        password=settings.REDIS_PASSWORD,
-        max_connections=1,
-    )
-    recent_book_service = RecentBookService(cache)
+    cache = _get_worker_cache()
     storage = get_storage()
+    recent_book_service = RecentBookService(
+        cache,
+        storage,
+        uow_factory=new_unit_of_work,
+        soft_ttl=settings.recent_books_cache_soft_ttl,
+        write_through=settings.recent_books_write_through,
+    )
+    book_count_service = BookCountService(cache, cache_ttl=settings.books_count_cache_ttl)
+    book_cache_service = BookCacheService(cache, storage, cache_ttl=settings.book_cache_ttl)
 
     # Работа с базой
     async with scoped_session() as session:
         repo = SqlAlchemyBookRepository(session)
-        preview_name = await create_book_preview_and_update_pages_count(storage, repo, book_id)
-
-    # Создание миниатюр
-    await create_thumbnails(storage, preview_name)
+        book = await create_book_preview_and_update_pages_count(storage, repo, book_id)
 
-    # Очистка кэша
-    await recent_book_service.delete_recent_books_cache()
+    # Обновление кэша (изменилось количество страниц книги)
+    await cache.delete(get_book_detail_cache_key(book.id))
+    await book_cache_service.delete_books(book.id)
+    await book_count_service.delete_count_cache()
+    await recent_book_service.refresh_recent_books(book.user_id)
 
 
 @celery.task(name="send_reset_password_email_task", ignore_result=True)
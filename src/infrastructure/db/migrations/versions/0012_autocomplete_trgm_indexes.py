@@ -0,0 +1,51 @@
+"""0012_autocomplete_trgm_indexes
+
+Revision ID: 2d4e1c2893f9
+Revises: f3250f7f2b40
+Create Date: 2026-10-18 11:04:09.183526
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "2d4e1c2893f9"
+down_revision: str | None = "f3250f7f2b40"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        op.f("ix__publishers__name_trgm"),
+        "publishers",
+        ["name"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+    op.create_index(
+        op.f("ix__tag__name_trgm"),
+        "tag",
+        ["name"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+    op.create_index(
+        op.f("ix__books__authors_trgm"),
+        "books",
+        ["authors"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"authors": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix__books__authors_trgm"), table_name="books", postgresql_using="gin")
+    op.drop_index(op.f("ix__tag__name_trgm"), table_name="tag", postgresql_using="gin")
+    op.drop_index(op.f("ix__publishers__name_trgm"), table_name="publishers", postgresql_using="gin")
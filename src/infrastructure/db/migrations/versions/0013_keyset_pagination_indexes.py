@@ -0,0 +1,29 @@
+"""0013_keyset_pagination_indexes
+
+Revision ID: ededc21cb937
+Revises: 2d4e1c2893f9
+Create Date: 2026-10-18 12:26:53.604118
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "ededc21cb937"
+down_revision: str | None = "2d4e1c2893f9"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f("ix__books__year_id"), "books", ["year", "id"], unique=False)
+    op.create_index(op.f("ix__favorite_books__user_id_id"), "favorite_books", ["user_id", "id"], unique=False)
+    op.create_index(op.f("ix__books_read__user_id_id"), "books_read", ["user_id", "id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix__books_read__user_id_id"), table_name="books_read")
+    op.drop_index(op.f("ix__favorite_books__user_id_id"), table_name="favorite_books")
+    op.drop_index(op.f("ix__books__year_id"), table_name="books")
@@ -0,0 +1,62 @@
+"""0014_tag_filter_indexes
+
+Revision ID: af16f12f777e
+Revises: ededc21cb937
+Create Date: 2026-10-18 13:41:18.201734
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "af16f12f777e"
+down_revision: str | None = "ededc21cb937"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Теги, отличающиеся только регистром, объединяются в тег с наименьшим идентификатором.
+DUPLICATE_TAGS = """
+    SELECT id, min(id) OVER (PARTITION BY lower(name)) AS keep_id FROM tag
+"""
+
+
+def merge_duplicate_tags() -> None:
+    """Перепривязывает книги к одному тегу из группы тегов, отличающихся регистром, и удаляет остальные."""
+    op.execute(f"""
+        UPDATE book_tag_association AS association SET tag_id = duplicate.keep_id
+        FROM ({DUPLICATE_TAGS}) AS duplicate
+        WHERE association.tag_id = duplicate.id AND duplicate.id <> duplicate.keep_id
+    """)
+    op.execute(f"""
+        DELETE FROM book_tag_association AS association
+        USING book_tag_association AS kept
+        WHERE association.book_id = kept.book_id
+            AND association.tag_id = kept.tag_id
+            AND association.id > kept.id
+            AND association.tag_id IN (
+                SELECT keep_id FROM ({DUPLICATE_TAGS}) AS duplicate WHERE duplicate.id <> duplicate.keep_id
+            )
+    """)
+    op.execute(f"""
+        DELETE FROM tag USING ({DUPLICATE_TAGS}) AS duplicate
+        WHERE tag.id = duplicate.id AND duplicate.id <> duplicate.keep_id
+    """)
+
+
+def upgrade() -> None:
+    merge_duplicate_tags()
+    op.create_index(op.f("ix__tag__lower_name"), "tag", [sa.text("lower(name)")], unique=True)
+    op.create_index(
+        op.f("ix__book_tag_association__tag_id_book_id"),
+        "book_tag_association",
+        ["tag_id", "book_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix__book_tag_association__tag_id_book_id"), table_name="book_tag_association")
+    op.drop_index(op.f("ix__tag__lower_name"), table_name="tag")
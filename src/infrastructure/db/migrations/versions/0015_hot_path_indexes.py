@@ -0,0 +1,62 @@
+"""0015_hot_path_indexes
+
+Revision ID: 40e36a9ce6d5
+Revises: af16f12f777e
+Create Date: 2026-10-18 14:20:07.318420
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "40e36a9ce6d5"
+down_revision: str | None = "af16f12f777e"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        op.f("ix__favorite_books__user_id_book_id"), "favorite_books", ["user_id", "book_id"], unique=False
+    )
+    op.create_index(
+        op.f("ix__books_read__user_id_book_id"), "books_read", ["user_id", "book_id"], unique=False
+    )
+    op.create_index(
+        op.f("ix__users_data__user_id_book_id_pdf_history_updated_at"),
+        "users_data",
+        ["user_id", "book_id", "pdf_history_updated_at"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix__comments__book_id_created_at"), "comments", ["book_id", "created_at"], unique=False
+    )
+    op.create_index(
+        op.f("ix__bookshelf_book_association__bookshelf_id_book_id"),
+        "bookshelf_book_association",
+        ["bookshelf_id", "book_id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix__books__user_id_private"),
+        "books",
+        ["user_id"],
+        unique=False,
+        postgresql_where=sa.text("private"),
+    )
+    op.create_index(op.f("ix__refresh_tokens__user_id"), "refresh_tokens", ["user_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix__refresh_tokens__user_id"), table_name="refresh_tokens")
+    op.drop_index(op.f("ix__books__user_id_private"), table_name="books", postgresql_where=sa.text("private"))
+    op.drop_index(
+        op.f("ix__bookshelf_book_association__bookshelf_id_book_id"), table_name="bookshelf_book_association"
+    )
+    op.drop_index(op.f("ix__comments__book_id_created_at"), table_name="comments")
+    op.drop_index(op.f("ix__users_data__user_id_book_id_pdf_history_updated_at"), table_name="users_data")
+    op.drop_index(op.f("ix__books_read__user_id_book_id"), table_name="books_read")
+    op.drop_index(op.f("ix__favorite_books__user_id_book_id"), table_name="favorite_books")
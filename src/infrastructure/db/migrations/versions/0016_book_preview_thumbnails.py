@@ -0,0 +1,39 @@
+"""0016_book_preview_thumbnails
+
+Revision ID: e44ac09eb08d
+Revises: 40e36a9ce6d5
+Create Date: 2026-10-18 18:42:51.104236
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "e44ac09eb08d"
+down_revision: str | None = "40e36a9ce6d5"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "books",
+        sa.Column(
+            "preview_thumbnails",
+            postgresql.ARRAY(sa.String(length=32)),
+            server_default="{}",
+            nullable=False,
+        ),
+    )
+    # Миниатюры всех размеров создавались для каждого PNG превью и до появления этого столбца.
+    op.execute(
+        "UPDATE books SET preview_thumbnails = ARRAY['small', 'medium'] WHERE preview_image LIKE '%.png'"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("books", "preview_thumbnails")
@@ -0,0 +1,32 @@
+"""0017_bookshelf_book_id_index
+
+Revision ID: 1143768531a0
+Revises: e44ac09eb08d
+Create Date: 2026-10-18 21:07:34.518264
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "1143768531a0"
+down_revision: str | None = "e44ac09eb08d"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        op.f("ix__bookshelf_book_association__book_id_bookshelf_id"),
+        "bookshelf_book_association",
+        ["book_id", "bookshelf_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("ix__bookshelf_book_association__book_id_bookshelf_id"), table_name="bookshelf_book_association"
+    )
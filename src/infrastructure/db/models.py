@@ -1,6 +1,20 @@
 from datetime import datetime
 
-from sqlalchemy import Boolean, CheckConstraint, Column, DateTime, ForeignKey, Integer, String, Table, Text
+from sqlalchemy import (
+    Boolean,
+    CheckConstraint,
+    Column,
+    Computed,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Table,
+    Text,
+    text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql.expression import false, true
 from sqlalchemy.sql.functions import func
@@ -53,6 +67,8 @@ class RefreshTokenModel(OrmBase):
     expire_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
     revoked: Mapped[bool] = mapped_column(Boolean, default=False)
 
+    __table_args__ = (Index("ix__refresh_tokens__user_id", "user_id"),)
+
 
 class PublisherModel(OrmBase):
     __tablename__ = "publishers"
@@ -63,6 +79,15 @@ class PublisherModel(OrmBase):
         "BookModel", back_populates="publisher", lazy="select", viewonly=True
     )
 
+    __table_args__ = (
+        Index(
+            "ix__publishers__name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
+
     def __str__(self):
         return self.name
 
@@ -77,6 +102,7 @@ book_tag_association = Table(
     Column("id", Integer, primary_key=True),
     Column("book_id", Integer, ForeignKey("books.id", ondelete="CASCADE")),
     Column("tag_id", Integer, ForeignKey("tag.id", ondelete="CASCADE")),
+    Index("ix__book_tag_association__tag_id_book_id", "tag_id", "book_id"),
 )
 
 
@@ -87,6 +113,10 @@ class TagModel(OrmBase):
     # Define relationship to BookModel using the association table
     books = relationship("BookModel", secondary=book_tag_association, back_populates="tags", lazy="select")
 
+    __table_args__ = (
+        Index("ix__tag__name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+    )
+
     def __str__(self):
         return self.name
 
@@ -94,6 +124,20 @@ class TagModel(OrmBase):
         return f"<TagModel: {self.name}>"
 
 
+# Теги при фильтрации ищутся без учета регистра.
+Index("ix__tag__lower_name", func.lower(TagModel.name), unique=True)
+
+
+# Взвешенный поисковый вектор книги: название (A) > авторы (B) > описание (C).
+# Каждое поле индексируется в русской и английской конфигурациях.
+BOOK_SEARCH_CONFIGS = ("russian", "english")
+BOOK_SEARCH_VECTOR_SQL = " || ".join(
+    f"setweight(to_tsvector('{config}'::regconfig, coalesce({column}, '')), '{weight}')"
+    for column, weight in (("title", "A"), ("authors", "B"), ("description", "C"))
+    for config in BOOK_SEARCH_CONFIGS
+)
+
+
 class BookModel(OrmBase):
     __tablename__ = "books"
 
@@ -104,6 +148,10 @@ class BookModel(OrmBase):
 
     title: Mapped[str] = mapped_column(String(254))
     preview_image: Mapped[str] = mapped_column(String(254))
+    # Размеры миниатюр превью, созданных в хранилище.
+    preview_thumbnails: Mapped[list[str]] = mapped_column(
+        ARRAY(String(32)), default=list, server_default="{}"
+    )
     file: Mapped[str] = mapped_column(String(512))
     authors: Mapped[str] = mapped_column(String(254))
     description: Mapped[str] = mapped_column(Text)
@@ -112,6 +160,9 @@ class BookModel(OrmBase):
     year: Mapped[int] = mapped_column(Integer())
     private: Mapped[bool] = mapped_column(Boolean)
     language: Mapped[str] = mapped_column(String(128))
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR, Computed(BOOK_SEARCH_VECTOR_SQL, persisted=True), deferred=True
+    )
 
     # Define relationship to TagModel using the association table
     tags = relationship("TagModel", secondary=book_tag_association, back_populates="books", lazy="joined")
@@ -141,6 +192,15 @@ class BookModel(OrmBase):
     __table_args__ = (
         CheckConstraint(year > 1, name="check_year_positive"),
         CheckConstraint(pages > 0, name="check_pages_positive"),
+        Index("ix__books__year_id", "year", "id"),
+        Index("ix__books__user_id_private", "user_id", postgresql_where=text("private")),
+        Index("ix__books__search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix__books__authors_trgm",
+            "authors",
+            postgresql_using="gin",
+            postgresql_ops={"authors": "gin_trgm_ops"},
+        ),
     )
 
     def __repr__(self):
@@ -181,6 +241,12 @@ class BookshelfBookAssociationModel(OrmBase):
     book_id: Mapped[int] = mapped_column(ForeignKey("books.id", ondelete="CASCADE"))
     bookshelf_id: Mapped[int] = mapped_column(ForeignKey("bookshelf.id", ondelete="CASCADE"))
 
+    __table_args__ = (
+        Index("ix__bookshelf_book_association__bookshelf_id_book_id", "bookshelf_id", "book_id"),
+        # Полки, на которых лежит книга.
+        Index("ix__bookshelf_book_association__book_id_bookshelf_id", "book_id", "bookshelf_id"),
+    )
+
 
 class CommentModel(OrmBase):
     __tablename__ = "comments"
@@ -196,6 +262,8 @@ class CommentModel(OrmBase):
         "BookModel", back_populates="comments", lazy="select", viewonly=True
     )
 
+    __table_args__ = (Index("ix__comments__book_id_created_at", "book_id", "created_at"),)
+
     def __str__(self):
         return self.text
 
@@ -209,6 +277,11 @@ class FavoriteBookModel(OrmBase):
     book_id: Mapped[int] = mapped_column(ForeignKey("books.id", ondelete="CASCADE"))
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
 
+    __table_args__ = (
+        Index("ix__favorite_books__user_id_id", "user_id", "id"),
+        Index("ix__favorite_books__user_id_book_id", "user_id", "book_id"),
+    )
+
 
 class ReadBookModel(OrmBase):
     __tablename__ = "books_read"
@@ -216,6 +289,11 @@ class ReadBookModel(OrmBase):
     book_id: Mapped[int] = mapped_column(ForeignKey("books.id", ondelete="CASCADE"))
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
 
+    __table_args__ = (
+        Index("ix__books_read__user_id_id", "user_id", "id"),
+        Index("ix__books_read__user_id_book_id", "user_id", "book_id"),
+    )
+
 
 class BookHistoryModel(OrmBase):
     __tablename__ = "users_data"
@@ -225,3 +303,12 @@ class BookHistoryModel(OrmBase):
 
     pdf_history: Mapped[str] = mapped_column(String(4096), nullable=True)
     pdf_history_updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index(
+            "ix__users_data__user_id_book_id_pdf_history_updated_at",
+            "user_id",
+            "book_id",
+            "pdf_history_updated_at",
+        ),
+    )
@@ -0,0 +1,139 @@
+import re
+
+from sqlalchemy import Select, exists, select
+from sqlalchemy.dialects.postgresql import TSQUERY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+
+from src.domain.books.entities import BookFilter
+from src.infrastructure.db.models import (
+    BOOK_SEARCH_CONFIGS,
+    BookModel,
+    PublisherModel,
+    TagModel,
+    book_tag_association,
+)
+
+
+def build_search_query(search: str):
+    """
+    Формирует полнотекстовый запрос по строке поиска.
+
+    Каждое слово ищется по префиксу (`слово:*`), чтобы поиск работал при вводе с клавиатуры,
+    слова объединяются через `&`. Запросы для всех конфигураций поискового вектора объединяются через `||`.
+
+    :param search: Строка поиска.
+    :return: Выражение `tsquery` или `None`, если в строке нет слов.
+    """
+    words = re.findall(r"[^\W_]+", search)
+    if not words:
+        return None
+    query_text = " & ".join(f"{word}:*" for word in words)
+    ts_query = None
+    for config in BOOK_SEARCH_CONFIGS:
+        config_query = func.to_tsquery(config, query_text, type_=TSQUERY)
+        ts_query = config_query if ts_query is None else ts_query.op("||")(config_query)
+    return ts_query
+
+
+def filter_books_by_viewer(query, viewer_id: int | None):
+    """
+    Оставляет публичные книги и приватные книги пользователя `viewer_id`.
+
+    Условия записаны без `IS TRUE`/`IS FALSE`: планировщик выводит условие частичного индекса
+    `ix__books__user_id_private` (`WHERE private`) только из самого столбца `private`.
+    """
+    if viewer_id is not None:
+        return query.where(~BookModel.private | (BookModel.private & (BookModel.user_id == viewer_id)))
+    return query.where(~BookModel.private)
+
+
+class BookFilterCompiler:
+    """
+    Компилирует :class:`BookFilter` в SQL запрос выборки книг.
+
+    Запрос не содержит JOIN с отношениями "многие ко многим", поэтому не требует группировки.
+    Книга должна иметь все теги фильтра: для каждого тега добавляется коррелированный EXISTS
+    подзапрос по индексу `(tag_id, book_id)`. Названия тегов заранее переводятся в идентификаторы
+    одним запросом по уникальному индексу `lower(name)`.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def compile(self, filter_: BookFilter) -> Select | None:
+        """
+        Возвращает запрос книг по фильтру без пагинации.
+        :return: Запрос или `None`, если по фильтру заведомо ничего не будет найдено.
+        """
+        query = select(BookModel)
+
+        if filter_.search and filter_.search.strip():
+            if (ts_query := build_search_query(filter_.search)) is None:
+                # В строке поиска нет слов (например, `!!!`), поэтому ей не соответствует ни одна книга.
+                return None
+            # Полнотекстовый поиск по GIN индексу, более релевантные книги выводятся первыми.
+            query = query.where(BookModel.search_vector.op("@@")(ts_query)).order_by(
+                func.ts_rank(BookModel.search_vector, ts_query).desc()
+            )
+
+        for field in filter_.keyset_fields:
+            if field.startswith("-") and hasattr(BookModel, field[1:]):
+                query = query.order_by(getattr(BookModel, field[1:]).desc())
+            elif hasattr(BookModel, field):
+                query = query.order_by(getattr(BookModel, field).asc())
+
+        if filter_.title:
+            query = query.where(BookModel.title.ilike(f"%{filter_.title}%"))
+        if filter_.authors:
+            query = query.where(BookModel.authors.ilike(f"%{filter_.authors}%"))
+        if filter_.publisher:
+            query = query.where(
+                BookModel.publisher_id.in_(
+                    select(PublisherModel.id).where(PublisherModel.name.ilike(f"%{filter_.publisher}%"))
+                )
+            )
+        if filter_.year is not None:
+            query = query.where(BookModel.year == filter_.year)
+        if filter_.language:
+            query = query.where(BookModel.language.ilike(f"%{filter_.language}%"))
+        if filter_.pages_gt is not None:
+            query = query.where(BookModel.pages > filter_.pages_gt)
+        if filter_.pages_lt is not None:
+            query = query.where(BookModel.pages < filter_.pages_lt)
+        if filter_.description:
+            query = query.where(BookModel.description.ilike(f"%{filter_.description}%"))
+
+        if filter_.only_private is not None and filter_.viewer_id is not None:
+            query = query.where(BookModel.private, BookModel.user_id == filter_.viewer_id)
+        else:
+            query = filter_books_by_viewer(query, filter_.viewer_id)
+
+        if filter_.tags:
+            tag_ids = await self._resolve_tag_ids(filter_.tags)
+            if tag_ids is None:
+                return None
+            for tag_id in tag_ids:
+                query = query.where(
+                    exists().where(
+                        book_tag_association.c.tag_id == tag_id,
+                        book_tag_association.c.book_id == BookModel.id,
+                    )
+                )
+
+        if filter_.ids_in:
+            query = query.where(BookModel.id.in_(filter_.ids_in))
+
+        return query
+
+    async def _resolve_tag_ids(self, tags: list[str]) -> list[int] | None:
+        """
+        Возвращает идентификаторы тегов по названиям без учета регистра.
+        :return: Список идентификаторов или `None`, если хотя бы один тег не существует.
+        """
+        names = {tag.lower() for tag in tags}
+        result = await self.session.execute(select(TagModel.id).where(func.lower(TagModel.name).in_(names)))
+        tag_ids = list(result.scalars().all())
+        if len(tag_ids) < len(names):
+            return None
+        return tag_ids
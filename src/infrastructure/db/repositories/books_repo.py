@@ -1,10 +1,35 @@
+from collections.abc import Sequence
+
 from advanced_alchemy.repository import SQLAlchemyAsyncRepository
-from sqlalchemy import Select, delete, distinct, select
+from sqlalchemy import (
+    Select,
+    String,
+    and_,
+    cast,
+    delete,
+    literal,
+    or_,
+    select,
+    text,
+    tuple_,
+    union_all,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import func
 
-from src.domain.books.entities import Book, BookFilter, BookmarksQueryFilter, Publisher, Tag
+from src.domain.books.entities import (
+    Book,
+    BookCursor,
+    BookFacets,
+    BookFilter,
+    BookIdPage,
+    BookmarksQueryFilter,
+    FacetBucket,
+    Publisher,
+    Tag,
+)
 from src.domain.books.repository import BookRepository
+from src.domain.common.exceptions import ValidationError
 from src.infrastructure.db.exception_handler import wrap_sqlalchemy_exception
 from src.infrastructure.db.models import (
     BookModel,
@@ -12,7 +37,12 @@ from src.infrastructure.db.models import (
     PublisherModel,
     ReadBookModel,
     TagModel,
+    book_tag_association,
 )
+from src.infrastructure.db.repositories.book_filter_compiler import BookFilterCompiler, filter_books_by_viewer
+
+# Максимальное количество вариантов, возвращаемых автодополнением.
+AUTOCOMPLETE_LIMIT = 10
 
 
 class SQLBookRepository(SQLAlchemyAsyncRepository[BookModel]):
@@ -29,66 +59,117 @@ class SqlAlchemyBookRepository(BookRepository):
         self._repo = SQLBookRepository(
             session=session, auto_commit=False, auto_refresh=True, wrap_exceptions=False
         )
+        self._compiler = BookFilterCompiler(session)
 
     async def get_by_id(self, book_id: int) -> Book:
         with wrap_sqlalchemy_exception(self._repo.dialect):
             model = await self._repo.get(book_id, uniquify=True)
             return self._to_domain(model)
 
-    async def get_filtered(self, filter_: BookFilter) -> tuple[list[Book], int]:
-        offset = (filter_.page - 1) * filter_.page_size
-        query = select(BookModel).group_by(BookModel.id).limit(filter_.page_size).offset(offset)
-
-        for field in filter_.sorted_by:
-            if field.startswith("-") and hasattr(BookModel, field[1:]):
-                query = query.order_by(getattr(BookModel, field[1:]).desc())
-            elif hasattr(BookModel, field):
-                query = query.order_by(getattr(BookModel, field).asc())
-
-        if filter_.search:
-            query = query.where(
-                BookModel.title.ilike(f"%{filter_.search}%")
-                | BookModel.description.ilike(f"%{filter_.search}%")
-            )
-        if filter_.title:
-            query = query.where(BookModel.title.ilike(f"%{filter_.title}%"))
-        if filter_.authors:
-            query = query.where(BookModel.authors.ilike(f"%{filter_.authors}%"))
-        if filter_.publisher:
-            query = query.join(BookModel.publisher).filter(
-                PublisherModel.name.ilike(f"%{filter_.publisher}%")
-            )
-        if filter_.year is not None:
-            query = query.where(BookModel.year == filter_.year)
-        if filter_.language:
-            query = query.where(BookModel.language.ilike(f"%{filter_.language}%"))
-        if filter_.pages_gt is not None:
-            query = query.where(BookModel.pages > filter_.pages_gt)
-        if filter_.pages_lt is not None:
-            query = query.where(BookModel.pages < filter_.pages_lt)
-        if filter_.description:
-            query = query.where(BookModel.description.ilike(f"%{filter_.description}%"))
-
-        if filter_.only_private is not None and filter_.viewer_id is not None:
-            query = query.where(BookModel.private.is_(True), BookModel.user_id == filter_.viewer_id)
-        else:
-            query = self._filter_books_by_viewer(query, filter_.viewer_id)
+    async def get_by_ids(self, book_ids: Sequence[int]) -> list[Book]:
+        if not book_ids:
+            return []
+        with wrap_sqlalchemy_exception(self._repo.dialect):
+            statement = select(BookModel).where(BookModel.id.in_(book_ids))
+            results = await self._repo.list(statement=statement, uniquify=True)
+            return [self._to_domain(r) for r in results]
 
-        if filter_.tags:
-            tags = {tag.lower() for tag in filter_.tags}
+    async def get_filtered_list(self, filter_: BookFilter) -> list[Book]:
+        with wrap_sqlalchemy_exception(self._repo.dialect):
+            query = await self._compiler.compile(filter_)
+            if query is None:
+                return []
+            results = await self._repo.list(statement=self._paginate(query, filter_), uniquify=True)
+            return [self._to_domain(r) for r in results]
 
-            query = (
-                query.join(BookModel.tags)
-                .where(func.lower(TagModel.name).in_(tags))
-                .having(func.count(func.distinct(TagModel.id)) == len(tags))
-            )
+    async def get_filtered_ids(self, filter_: BookFilter) -> tuple[BookIdPage, int]:
+        with wrap_sqlalchemy_exception(self._repo.dialect):
+            query = await self._compiler.compile(filter_)
+            if query is None:
+                return BookIdPage(ids=[]), 0
+            page = await self._get_ids(self._paginate(query, filter_), filter_)
+            return page, await self._repo.count(statement=query)
 
-        if filter_.ids_in:
-            query = query.where(BookModel.id.in_(filter_.ids_in))
+    async def get_filtered_id_list(self, filter_: BookFilter) -> BookIdPage:
+        with wrap_sqlalchemy_exception(self._repo.dialect):
+            query = await self._compiler.compile(filter_)
+            if query is None:
+                return BookIdPage(ids=[])
+            return await self._get_ids(self._paginate(query, filter_), filter_)
+
+    async def _get_ids(self, query: Select, filter_: BookFilter) -> BookIdPage:
+        """
+        Выполняет запрос книг, выбирая только идентификаторы и значения полей сортировки,
+        без загрузки издательств и тегов.
+        Курсор следующей страницы строится по последней строке из БД, поэтому книги,
+        пропущенные при последующей загрузке, не обрывают пагинацию.
+        """
+        names = [field_.removeprefix("-") for field_ in filter_.keyset_fields]
+        result = await self.session.execute(
+            query.with_only_columns(*(getattr(BookModel, name) for name in names))
+        )
+        rows = result.all()
+        next_cursor = None
+        if filter_.supports_cursor and rows and len(rows) == filter_.page_size:
+            next_cursor = BookCursor(values=tuple(rows[-1]))
+        id_index = names.index("id")
+        return BookIdPage(ids=[row[id_index] for row in rows], next_cursor=next_cursor)
+
+    async def get_facets(self, filter_: BookFilter, limit: int) -> BookFacets:
+        with wrap_sqlalchemy_exception(self._repo.dialect):
+            filtered_query = await self._compiler.compile(filter_)
+        if filtered_query is None:
+            return BookFacets()
+        filtered = filtered_query.with_only_columns(BookModel.id).order_by(None).cte("filtered_books")
+        book_count = func.count().label("count")
+        facet_queries = {
+            "tags": select(TagModel.name.label("value"), book_count)
+            .join(book_tag_association, book_tag_association.c.tag_id == TagModel.id)
+            .join(filtered, filtered.c.id == book_tag_association.c.book_id)
+            .group_by(TagModel.name),
+            "publishers": select(PublisherModel.name.label("value"), book_count)
+            .join(BookModel, BookModel.publisher_id == PublisherModel.id)
+            .join(filtered, filtered.c.id == BookModel.id)
+            .group_by(PublisherModel.name),
+            "years": select(cast(BookModel.year, String).label("value"), book_count)
+            .join(filtered, filtered.c.id == BookModel.id)
+            .group_by(BookModel.year),
+            "languages": select(BookModel.language.label("value"), book_count)
+            .join(filtered, filtered.c.id == BookModel.id)
+            .group_by(BookModel.language),
+        }
+        # Все разрезы считаются одним запросом по общему CTE отфильтрованных книг.
+        facet_selects = []
+        for name, query in facet_queries.items():
+            top = query.order_by(book_count.desc(), "value").limit(limit).subquery(name)
+            facet_selects.append(select(literal(name).label("facet"), top.c.value, top.c.count))
+        statement = union_all(*facet_selects)
+
+        facets = BookFacets()
+        with wrap_sqlalchemy_exception(self._repo.dialect):
+            result = await self.session.execute(statement)
+            for row in result:
+                value = int(row.value) if row.facet == "years" else row.value
+                getattr(facets, row.facet).append(FacetBucket(value=value, count=row.count))
+        return facets
 
+    async def estimate_count(self) -> int:
         with wrap_sqlalchemy_exception(self._repo.dialect):
-            results, total = await self._repo.list_and_count(statement=query, uniquify=True)
-            return [self._to_domain(r) for r in results], total
+            result = await self.session.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+                {"table": BookModel.__tablename__},
+            )
+            estimate = result.scalar_one_or_none()
+            if estimate is None or estimate < 0:
+                # Таблица еще ни разу не анализировалась, статистики нет.
+                estimate = await self._repo.count()
+            return int(estimate)
+
+    def _paginate(self, query: Select, filter_: BookFilter) -> Select:
+        if filter_.cursor is None:
+            return query.limit(filter_.page_size).offset((filter_.page - 1) * filter_.page_size)
+        query = query.where(self._keyset_condition(filter_.keyset_fields, filter_.cursor))
+        return query.limit(filter_.page_size)
 
     async def add(self, book: Book) -> Book:
         with wrap_sqlalchemy_exception(self._repo.dialect):
@@ -119,22 +200,10 @@ class SqlAlchemyBookRepository(BookRepository):
         with wrap_sqlalchemy_exception(self._repo.dialect):
             await self._repo.delete(book_id)
 
-    async def get_favorite_books(self, filter_: BookmarksQueryFilter) -> tuple[list[Book], int]:
+    async def get_favorite_book_ids(self, filter_: BookmarksQueryFilter) -> tuple[BookIdPage, int]:
         with wrap_sqlalchemy_exception(self._repo.dialect):
-            query = (
-                select(BookModel)
-                .join(FavoriteBookModel)
-                .where(
-                    FavoriteBookModel.book_id == BookModel.id,
-                    FavoriteBookModel.user_id == filter_.user_id,
-                )
-                .group_by(BookModel.id, FavoriteBookModel.id)
-                .limit(filter_.page_size)
-                .order_by(FavoriteBookModel.id.desc())
-                .offset((filter_.page - 1) * filter_.page_size)
-            )
-            result, total = await self._repo.list_and_count(statement=query, uniquify=True)
-            return [self._to_domain(book) for book in result], total
+            page = await self._get_bookmark_book_ids(FavoriteBookModel, filter_)
+            return page, await self.get_favorite_books_count(filter_.user_id)
 
     async def update_favorite_status(self, book_id: int, user_id: int, favorite: bool) -> None:
         with wrap_sqlalchemy_exception(self._repo.dialect):
@@ -178,22 +247,34 @@ class SqlAlchemyBookRepository(BookRepository):
             result = await self.session.execute(query)
             return bool(result.scalar_one_or_none())
 
-    async def get_read_books(self, filter_: BookmarksQueryFilter) -> tuple[list[Book], int]:
+    async def get_read_book_ids(self, filter_: BookmarksQueryFilter) -> tuple[BookIdPage, int]:
         with wrap_sqlalchemy_exception(self._repo.dialect):
-            query = (
-                select(BookModel)
-                .join(ReadBookModel)
-                .where(
-                    ReadBookModel.book_id == BookModel.id,
-                    ReadBookModel.user_id == filter_.user_id,
-                )
-                .group_by(BookModel.id, ReadBookModel.id)
-                .limit(filter_.page_size)
-                .order_by(ReadBookModel.id.desc())
-                .offset((filter_.page - 1) * filter_.page_size)
-            )
-            result, total = await self._repo.list_and_count(statement=query, uniquify=True)
-            return [self._to_domain(book) for book in result], total
+            page = await self._get_bookmark_book_ids(ReadBookModel, filter_)
+            return page, await self.get_read_books_count(filter_.user_id)
+
+    async def _get_bookmark_book_ids(
+        self, model: type[FavoriteBookModel] | type[ReadBookModel], filter_: BookmarksQueryFilter
+    ) -> BookIdPage:
+        """
+        Возвращает идентификаторы книг страницы закладок без загрузки самих книг.
+        Курсор хранит идентификатор последней закладки страницы, поэтому удаление закладки
+        или книги из предыдущей страницы не прерывает пагинацию.
+        """
+        query = (
+            select(model.id, model.book_id)
+            .where(model.user_id == filter_.user_id)
+            .order_by(model.id.desc())
+            .limit(filter_.page_size)
+        )
+        if filter_.cursor is None:
+            query = query.offset((filter_.page - 1) * filter_.page_size)
+        else:
+            query = query.where(model.id < filter_.cursor.values[0])
+        rows = (await self.session.execute(query)).all()
+        next_cursor = None
+        if rows and len(rows) == filter_.page_size:
+            next_cursor = BookCursor(values=(rows[-1].id,))
+        return BookIdPage(ids=[row.book_id for row in rows], next_cursor=next_cursor)
 
     async def update_read_status(self, book_id: int, user_id: int, read: bool) -> None:
         with wrap_sqlalchemy_exception(self._repo.dialect):
@@ -234,47 +315,78 @@ class SqlAlchemyBookRepository(BookRepository):
             return bool(result.scalar_one_or_none())
 
     async def get_publishers(self, search: str | None, viewer_id: int | None) -> list[str]:
-        query: Select[tuple[str]] = (
-            select(distinct(PublisherModel.name)).select_from(BookModel).join(PublisherModel)
-        )
-        if search is not None:
-            query = query.where(PublisherModel.name.ilike(f"%{search}%"))
-        query = self._filter_books_by_viewer(query, viewer_id)
+        has_visible_books = filter_books_by_viewer(
+            select(BookModel.id).where(BookModel.publisher_id == PublisherModel.id), viewer_id
+        ).exists()
+        query: Select[tuple[str]] = select(PublisherModel.name).where(has_visible_books)
+        query = self._autocomplete(query, PublisherModel.name, search)
 
         results = await self.session.execute(query)
         return list(results.scalars().all())
 
     async def get_authors(self, search: str | None, user_id: int | None) -> list[str]:
-        query: Select[tuple[str]] = select(distinct(BookModel.authors)).limit(10)
-        query = self._filter_books_by_viewer(query, user_id)
-        if search is not None:
-            query = query.where(BookModel.authors.ilike(f"%{search}%"))
+        query: Select[tuple[str]] = select(BookModel.authors).group_by(BookModel.authors)
+        query = filter_books_by_viewer(query, user_id)
+        query = self._autocomplete(query, BookModel.authors, search)
         results = await self.session.execute(query)
         return list(results.scalars().all())
 
     async def get_tags(self, search: str | None, user_id: int | None) -> list[str]:
-        query: Select[tuple[str]] = (
-            select(distinct(TagModel.name)).join(BookModel.tags).limit(10).order_by(TagModel.name.desc())
-        )
-        query = self._filter_books_by_viewer(query, user_id)
-        if search is not None:
-            query = query.where(TagModel.name.ilike(f"%{search}%"))
+        has_visible_books = filter_books_by_viewer(
+            select(BookModel.id)
+            .join(book_tag_association, book_tag_association.c.book_id == BookModel.id)
+            .where(book_tag_association.c.tag_id == TagModel.id),
+            user_id,
+        ).exists()
+        query: Select[tuple[str]] = select(TagModel.name).where(has_visible_books)
+        query = self._autocomplete(query, TagModel.name, search)
         results = await self.session.execute(query)
         return list(results.scalars().all())
 
+    @staticmethod
+    def _autocomplete(query, column, search: str | None):
+        """
+        Ограничивает выборку для автодополнения.
+
+        Совпадения ищутся по trigram GIN индексу колонки и сортируются по похожести на строку поиска.
+        Результат всегда ограничен `AUTOCOMPLETE_LIMIT` значениями.
+        """
+        if search:
+            query = query.where(column.ilike(f"%{search}%")).order_by(
+                func.similarity(column, search).desc(), column
+            )
+        else:
+            query = query.order_by(column)
+        return query.limit(AUTOCOMPLETE_LIMIT)
+
     async def get_book_tags(self, book_id: int) -> list[Tag]:
         query = select(TagModel).join(BookModel.tags).where(BookModel.id == book_id)
         result = await self.session.execute(query)
         return [Tag(id=tag.id, name=tag.name) for tag in result.scalars()]
 
     @staticmethod
-    def _filter_books_by_viewer(query, viewer_id: int | None):
-        if viewer_id is not None:
-            return query.where(
-                BookModel.private.is_(False)
-                | (BookModel.private.is_(True) & (BookModel.user_id == viewer_id))
-            )
-        return query.where(BookModel.private.is_(False))
+    def _keyset_condition(fields: list[str], cursor: BookCursor):
+        """
+        Возвращает условие выбора книг, следующих в порядке сортировки `fields` после курсора.
+        :raises ValidationError: Если курсор не соответствует полям сортировки.
+        """
+        if len(fields) != len(cursor.values):
+            raise ValidationError("Cursor does not match sort order")
+        columns = [getattr(BookModel, field.removeprefix("-")) for field in fields]
+        descending = [field.startswith("-") for field in fields]
+
+        if all(descending):
+            return tuple_(*columns) < tuple_(*cursor.values)
+        if not any(descending):
+            return tuple_(*columns) > tuple_(*cursor.values)
+
+        # Разные направления сортировки нельзя сравнить одним кортежем.
+        conditions = []
+        for i, (column, desc) in enumerate(zip(columns, descending, strict=True)):
+            equal_prefix = [columns[j] == cursor.values[j] for j in range(i)]
+            value = cursor.values[i]
+            conditions.append(and_(*equal_prefix, column < value if desc else column > value))
+        return or_(*conditions)
 
     @staticmethod
     def _to_domain(model: BookModel) -> Book:
@@ -287,6 +399,7 @@ class SqlAlchemyBookRepository(BookRepository):
             ),
             title=model.title,
             preview_image=model.preview_image,
+            preview_thumbnails=list(model.preview_thumbnails),
             file=model.file,
             authors=model.authors,
             description=model.description,
@@ -306,6 +419,7 @@ class SqlAlchemyBookRepository(BookRepository):
             publisher_id=book.publisher.id,
             title=book.title,
             preview_image=book.preview_image,
+            preview_thumbnails=book.preview_thumbnails,
             file=book.file,
             authors=book.authors,
             description=book.description,
@@ -329,10 +443,20 @@ class SqlAlchemyBookRepository(BookRepository):
         return publisher
 
     async def _get_or_create_tags(self, tags: list[str]) -> list[TagModel]:
-        """Находит или создает список тегов"""
-        model_tags = []
+        """
+        Находит или создает список тегов.
+        Теги сравниваются без учета регистра, из повторяющихся названий остается первое.
+        """
+        unique_names: dict[str, str] = {}
         for tag_name in tags:
-            result = await self.session.execute(select(TagModel).where(TagModel.name.ilike(tag_name)))
+            if tag_name := tag_name.strip():
+                unique_names.setdefault(tag_name.lower(), tag_name)
+
+        model_tags = []
+        for tag_name in unique_names.values():
+            result = await self.session.execute(
+                select(TagModel).where(func.lower(TagModel.name) == tag_name.lower())
+            )
             result.unique()
             tag = result.scalar_one_or_none()
             if tag is None:
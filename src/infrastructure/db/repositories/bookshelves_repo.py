@@ -70,10 +70,7 @@ class SqlAlchemyBookshelfRepository(BookshelfRepository):
                         description=data.description,
                         created_at=data.created_at,
                         private=data.private,
-                        books=[
-                            BookValue(id=book.get("book_id") or 0, preview=book.get("preview_image", ""))
-                            for book in data.books_info
-                        ],
+                        books=[self._to_book_value(book) for book in data.books_info],
                     )
                 )
                 if i == 0:
@@ -101,7 +98,14 @@ class SqlAlchemyBookshelfRepository(BookshelfRepository):
                 BookshelfModel.created_at,
                 BookshelfModel.private,
                 func.array_agg(
-                    func.json_build_object("book_id", BookModel.id, "preview_image", BookModel.preview_image)
+                    func.json_build_object(
+                        "book_id",
+                        BookModel.id,
+                        "preview_image",
+                        BookModel.preview_image,
+                        "preview_thumbnails",
+                        BookModel.preview_thumbnails,
+                    )
                 ).label("books_info"),
             )
             .outerjoin(BookshelfModel.books)
@@ -158,8 +162,8 @@ class SqlAlchemyBookshelfRepository(BookshelfRepository):
             private=bookshelf.private,
         )
 
-    @staticmethod
-    def _to_domain(data) -> Bookshelf:
+    @classmethod
+    def _to_domain(cls, data) -> Bookshelf:
         return Bookshelf(
             id=data.id,
             name=data.name,
@@ -167,8 +171,13 @@ class SqlAlchemyBookshelfRepository(BookshelfRepository):
             description=data.description,
             created_at=data.created_at,
             private=data.private,
-            books=[
-                BookValue(id=book.get("book_id") or 0, preview=book.get("preview_image", ""))
-                for book in data.books_info
-            ],
+            books=[cls._to_book_value(book) for book in data.books_info],
+        )
+
+    @staticmethod
+    def _to_book_value(book: dict) -> BookValue:
+        return BookValue(
+            id=book.get("book_id") or 0,
+            preview=book.get("preview_image", ""),
+            preview_thumbnails=book.get("preview_thumbnails") or [],
         )
@@ -1,3 +1,6 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.domain.books.repository import BookRepository
@@ -12,6 +15,7 @@ from src.infrastructure.db.repositories.comments_repo import SqlAlchemyCommentRe
 from src.infrastructure.db.repositories.history_repo import SqlAlchemyBookReadHistoryRepositoryRepository
 from src.infrastructure.db.repositories.refresh_token_repo import SqlAlchemyRefreshTokenRepository
 from src.infrastructure.db.repositories.users_repo import SqlAlchemyUserRepository
+from src.infrastructure.db.session_manager import db_manager
 
 
 class SqlAlchemyUnitOfWork(UnitOfWork):
@@ -78,3 +82,10 @@ class SqlAlchemyUnitOfWork(UnitOfWork):
 
     async def rollback(self):
         await self._session.rollback()
+
+
+@asynccontextmanager
+async def new_unit_of_work() -> AsyncIterator[UnitOfWork]:
+    """Создает Unit of Work с собственной сессией, которая закрывается при выходе из контекста."""
+    async with db_manager.session() as session, SqlAlchemyUnitOfWork(session) as uow:
+        yield uow
@@ -1,40 +1,134 @@
 from src.application.services.cache import AbstractCache
+from src.application.services.single_flight import SingleFlight
 from src.application.services.storage import AbstractStorage
 from src.application.services.task_manager import TaskManager
 
-from .cache import InMemoryCache, RedisCache
+from .cache import (
+    CacheMetrics,
+    CircuitBreakerCache,
+    InMemoryCache,
+    InstrumentedCache,
+    RedisCache,
+    TieredCache,
+)
+from .cache.breaker import CircuitState
+from .cache.metrics import cache_logger
+from .cache.serializers import get_serializer
 from .media_storage import LocalStorage, S3Storage
 from .settings import MediaStorageEnum, settings
 
 __cache__: AbstractCache | None = None
+__cache_metrics__: CacheMetrics | None = None
+__single_flight__: SingleFlight | None = None
 __storage__: AbstractStorage | None = None
 __task_manager__: TaskManager | None = None
 
 
+def get_cache_metrics() -> CacheMetrics:
+    """Возвращает общие для процесса метрики кэша"""
+
+    global __cache_metrics__
+    if __cache_metrics__ is None:
+        __cache_metrics__ = CacheMetrics()
+    return __cache_metrics__
+
+
 def get_cache() -> AbstractCache:
     """Возвращает кэш в зависимости от настроек приложения"""
 
     global __cache__
     if __cache__ is None:
+        metrics = get_cache_metrics()
+        cache_logger.rate = settings.cache_log_sample_rate
+        cache: AbstractCache
         if settings.REDIS_HOST:
-            __cache__ = RedisCache(
+            redis_cache = RedisCache(
                 host=settings.REDIS_HOST,
                 port=settings.REDIS_PORT,
                 db=settings.REDIS_DB,
                 password=settings.REDIS_PASSWORD,
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
+                invalidation_channel=settings.cache_invalidation_channel,
+                serializer=get_serializer(settings.cache_serializer, settings.cache_compress_threshold),
+                metrics=metrics,
+            )
+            shared_cache: AbstractCache = redis_cache
+            if settings.cache_l1_enabled:
+                shared_cache = TieredCache(
+                    local=InMemoryCache(
+                        max_entries=settings.cache_l1_max_entries,
+                        serialize=settings.local_cache_serialize,
+                        metrics=metrics,
+                        metrics_name="l1",
+                    ),
+                    remote=redis_cache,
+                    local_ttl=settings.cache_l1_ttl,
+                )
+            breaker = CircuitBreakerCache(
+                cache=shared_cache,
+                fallback=InMemoryCache(
+                    max_entries=settings.cache_l1_max_entries,
+                    serialize=settings.local_cache_serialize,
+                    metrics=metrics,
+                    metrics_name="fallback",
+                ),
+                failure_threshold=settings.cache_breaker_failure_threshold,
+                reset_timeout=settings.cache_breaker_reset_timeout,
+                call_timeout=settings.cache_breaker_call_timeout,
+            )
+            metrics.register_gauge(
+                "cache_circuit_breaker_open", lambda: float(breaker.state is not CircuitState.closed)
+            )
+            metrics.register_gauge(
+                "cache_circuit_breaker_opened_total", lambda: breaker.stats["opened_total"]
             )
+            metrics.register_gauge("cache_fallback_calls_total", lambda: breaker.stats["fallback_calls"])
+            cache = breaker
         else:
-            __cache__ = InMemoryCache()
+            local_cache = InMemoryCache(
+                max_entries=settings.local_cache_max_entries,
+                max_bytes=settings.local_cache_max_bytes,
+                serialize=settings.local_cache_serialize,
+                metrics=metrics,
+            )
+            metrics.register_gauge("cache_local_entries", lambda: len(local_cache))
+            metrics.register_gauge("cache_local_bytes", lambda: local_cache.size_bytes)
+            cache = local_cache
+        __cache__ = InstrumentedCache(cache, metrics, name="cache")
     return __cache__
 
 
+def get_single_flight() -> SingleFlight:
+    """Возвращает общий для процесса объект объединения одновременных вычислений"""
+
+    global __single_flight__
+    if __single_flight__ is None:
+        __single_flight__ = SingleFlight(get_cache())
+    return __single_flight__
+
+
 def get_storage() -> AbstractStorage:
     global __storage__
     if __storage__ is None:
         if settings.media_storage_type == MediaStorageEnum.s3:
-            __storage__ = S3Storage(bucket_name=settings.BUCKET_NAME, endpoint_url=settings.S3_ENDPOINT_URL)
+            s3_storage = S3Storage(
+                bucket_name=settings.BUCKET_NAME,
+                endpoint_url=settings.S3_ENDPOINT_URL,
+                media_url=settings.media_url,
+                presigned_url_ttl=settings.s3_presigned_url_ttl,
+                download_url_ttl=settings.s3_download_url_ttl,
+                max_pool_connections=settings.s3_max_pool_connections,
+                connect_timeout=settings.s3_connect_timeout,
+                read_timeout=settings.s3_read_timeout,
+                max_retries=settings.s3_max_retries,
+                keepalive_timeout=settings.s3_keepalive_timeout,
+            )
+            metrics = get_cache_metrics()
+            for name in s3_storage.stats:
+                metrics.register_gauge(f"s3_{name}", lambda name=name: s3_storage.stats[name])
+            __storage__ = s3_storage
         else:
-            __storage__ = LocalStorage(settings.media_root)
+            __storage__ = LocalStorage(settings.media_root, media_url=settings.media_url)
     return __storage__
 
 
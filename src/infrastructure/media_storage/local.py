@@ -1,22 +1,30 @@
 import re
 import shutil
-from collections.abc import AsyncIterable, Iterator
-from contextlib import contextmanager
+from collections.abc import AsyncIterable, Sequence
+from datetime import UTC, datetime
 from pathlib import Path
-from typing import BinaryIO
 
 import aiofiles
+import aiofiles.os
 from slugify import slugify
 
-from src.application.services.storage import AbstractStorage, FileProtocol
-from src.infrastructure.settings import settings
+from src.application.services.storage import AbstractStorage, FileInfo, FileProtocol
+
+from .urls import MediaUrlBuilder
+
+CHUNK_SIZE = 1024 * 1024  # 1MB
 
 
 class LocalStorage(AbstractStorage):
     """Локальное хранилище для книг. В файловой системе."""
 
-    def __init__(self, media_root: str | Path):
+    def __init__(self, media_root: str | Path, media_url: str = "/media"):
+        """
+        :param media_root: Директория хранилища.
+        :param media_url: Адрес, по которому раздаются файлы хранилища.
+        """
         self._media_root = self._format_media_root(media_root)
+        self._urls = MediaUrlBuilder(media_url)
 
     @staticmethod
     def _format_media_root(media_root: str | Path) -> Path:
@@ -58,44 +66,73 @@ class LocalStorage(AbstractStorage):
             old_file.unlink()
 
         async with aiofiles.open(book_file_path, "wb") as f:
-            while content := await file.read(1024 * 1024):
+            while content := await file.read(CHUNK_SIZE):
                 await f.write(content)
 
         return f"books/{book_id}/{file_name}"
 
-    async def get_book_iterator(self, book_id: int) -> AsyncIterable[bytes]:
+    async def get_book_info(self, book_id: int) -> FileInfo:
         """
-        Возвращает асинхронный итератор по байтам книги.
+        Возвращает сведения о файле книги.
         :param book_id: Идентификатор книги.
-        :return: Итератор по байтам книги.
+        :return: :class:`FileInfo` сведения о файле книги.
         :raises self.FileNotFoundError:  :class:`AbstractStorage.FileNotFoundError` Если книга не найдена.
         """
+        path = self._get_book_path(book_id)
+        return await self.get_file_info(path.relative_to(self._media_root).as_posix())
 
-        # Директория хранения книги.
-        book_folder = self._media_root / "books" / str(book_id)
-        # Ищем файл книги.
-        file_name = ""
-        for file in book_folder.glob("*"):
-            file_name = file.name
-        if not file_name:
-            raise self.FileNotFoundError
-
+    async def get_file_info(self, file_name: str) -> FileInfo:
+        """
+        Возвращает сведения о файле.
+        ETag формируется из времени изменения и размера файла.
+        :param file_name: Путь к файлу в хранилище.
+        :return: :class:`FileInfo` сведения о файле.
+        :raises self.FileNotFoundError:  :class:`AbstractStorage.FileNotFoundError` Если файл не найден.
+        """
         try:
-            async with aiofiles.open(book_folder / file_name, "rb") as f:
-                while content := await f.read(1024 * 1024):
+            stat = await aiofiles.os.stat(self._media_root / file_name)
+        except OSError as exc:
+            raise self.FileNotFoundError from exc
+        return FileInfo(
+            path=file_name,
+            size=stat.st_size,
+            last_modified=datetime.fromtimestamp(stat.st_mtime, UTC),
+            etag=f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"',
+        )
+
+    async def get_file_iterator(
+        self, file_name: str, start: int = 0, end: int | None = None
+    ) -> AsyncIterable[bytes]:
+        """
+        Возвращает асинхронный итератор по байтам файла или его части.
+        :param file_name: Путь к файлу в хранилище.
+        :param start: Позиция первого байта.
+        :param end: Позиция последнего байта включительно, по умолчанию до конца файла.
+        :return: Итератор по байтам файла.
+        :raises self.FileNotFoundError:  :class:`AbstractStorage.FileNotFoundError` Если файл не найден.
+        """
+        remaining = None if end is None else end - start + 1
+        try:
+            async with aiofiles.open(self._media_root / file_name, "rb") as f:
+                await f.seek(start)
+                while remaining is None or remaining > 0:
+                    content = await f.read(CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining))
+                    if not content:
+                        break
+                    if remaining is not None:
+                        remaining -= len(content)
                     yield content
         except OSError as exc:
             raise self.FileNotFoundError from exc
 
-    @contextmanager
-    def get_book_binary(self, book_id: int) -> Iterator[BinaryIO]:
+    def get_local_path(self, file_name: str) -> Path | None:
+        return self._media_root / file_name
+
+    def _get_book_path(self, book_id: int) -> Path:
         """
-        Возвращает итератор бинарного файла книги.
-        :param book_id: Идентификатор книги.
-        :return: Бинарный файл книги.
+        Возвращает путь к файлу книги.
         :raises self.FileNotFoundError:  :class:`AbstractStorage.FileNotFoundError` Если книга не найдена.
         """
-
         # Директория хранения книги.
         book_folder = self._media_root / "books" / str(book_id)
         # Ищем файл книги.
@@ -104,15 +141,7 @@ class LocalStorage(AbstractStorage):
             file_name = file.name
         if not file_name:
             raise self.FileNotFoundError
-
-        try:
-            book_file = open(book_folder / file_name, "rb")  # noqa: SIM115
-        except OSError as exc:
-            raise self.FileNotFoundError from exc
-        try:
-            yield book_file
-        finally:
-            book_file.close()
+        return book_folder / file_name
 
     async def upload_file(self, file_name: str, data: bytes) -> str:
         """
@@ -128,22 +157,21 @@ class LocalStorage(AbstractStorage):
             await f.write(data)
         return file_name
 
-    @contextmanager
-    def get_file_binary(self, file_name: str) -> Iterator[BinaryIO]:
+    async def read_range(self, file_name: str, start: int = 0, end: int | None = None) -> bytes:
         """
-        Возвращает итератор бинарного файла.
+        Читает часть файла.
         :param file_name: Путь к файлу в хранилище.
-        :return: Бинарный файл.
+        :param start: Позиция первого байта.
+        :param end: Позиция последнего байта включительно, по умолчанию до конца файла.
+        :return: Прочитанные байты.
         :raises self.FileNotFoundError:  :class:`AbstractStorage.FileNotFoundError` Если файл не найден.
         """
         try:
-            file = open(self._media_root / file_name, "rb")  # noqa: SIM115
+            async with aiofiles.open(self._media_root / file_name, "rb") as f:
+                await f.seek(start)
+                return await f.read(-1 if end is None else end - start + 1)
         except OSError as exc:
             raise self.FileNotFoundError from exc
-        try:
-            yield file
-        finally:
-            file.close()
 
     async def delete_book(self, book_id: int) -> None:
         """
@@ -157,17 +185,7 @@ class LocalStorage(AbstractStorage):
             pass
 
     async def get_media_url(self, file: str) -> str:
-        if file.startswith("/media"):
-            file = file[6:]
-        elif file.startswith("media"):
-            file = file[5:]
-        if not file.startswith("/"):
-            file = "/" + file
-
-        if not settings.media_url.startswith("http") and not settings.media_url.startswith("/"):
-            settings.media_url = "/" + settings.media_url
-
-        if settings.media_url.endswith("/"):
-            return settings.media_url[:-1] + file
+        return self._urls.build(file)
 
-        return settings.media_url + file
+    async def get_media_urls(self, files: Sequence[str]) -> list[str]:
+        return [self._urls.build(file) for file in files]
@@ -1,23 +1,147 @@
-import os
-import tempfile
-from collections.abc import AsyncIterable, Generator
-from contextlib import contextmanager
-from typing import BinaryIO
+import asyncio
+import time
+from collections.abc import AsyncIterable, AsyncIterator, Sequence
+from contextlib import AsyncExitStack, asynccontextmanager
+from datetime import UTC, datetime
+from typing import Any
 
 import aioboto3
 import boto3
+from aiobotocore.config import AioConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
-from src.application.services.storage import AbstractStorage, FileProtocol
-from src.infrastructure.settings import settings
+from src.application.services.storage import AbstractStorage, FileInfo, FileProtocol
+
+from .urls import MediaUrlBuilder
+
+CHUNK_SIZE = 1024 * 1024  # 1MB
+
+# Коды ошибок S3 об отсутствии объекта: HeadObject возвращает ответ без тела с кодом 404.
+NOT_FOUND_ERROR_CODES = {"NoSuchKey", "404", "NotFound"}
+
+# Максимальное количество подписанных ссылок, хранимых для повторного использования.
+PRESIGNED_URLS_CACHE_SIZE = 10_000
 
 
 class S3Storage(AbstractStorage):
-    def __init__(self, bucket_name: str, endpoint_url: str | None = None):
+    """
+    Хранилище в S3 совместимом бакете.
+
+    Асинхронный клиент с пулом соединений открывается один раз в :meth:`connect` и используется
+    всеми операциями в том же event loop. Без открытого клиента или в другом event loop
+    на каждую операцию создается временный клиент.
+    """
+
+    def __init__(
+        self,
+        bucket_name: str,
+        endpoint_url: str | None = None,
+        media_url: str = "/media",
+        presigned_url_ttl: int | None = None,
+        download_url_ttl: int | None = None,
+        max_pool_connections: int = 10,
+        connect_timeout: float = 5,
+        read_timeout: float = 60,
+        max_retries: int = 3,
+        keepalive_timeout: float = 60,
+    ):
+        """
+        :param bucket_name: Название бакета.
+        :param endpoint_url: Адрес S3 совместимого хранилища.
+        :param media_url: Адрес, по которому раздаются файлы бакета.
+        :param presigned_url_ttl: Если указано, то вместо `media_url` выдаются подписанные ссылки
+                                  на объекты бакета с этим временем жизни в секундах.
+        :param download_url_ttl: Если указано, то файлы книг скачиваются напрямую из бакета
+                                 по подписанным ссылкам с этим временем жизни в секундах.
+        :param max_pool_connections: Максимальное количество соединений в пуле клиента.
+        :param connect_timeout: Время ожидания соединения в секундах.
+        :param read_timeout: Время ожидания ответа в секундах.
+        :param max_retries: Максимальное количество попыток запроса.
+        :param keepalive_timeout: Время в секундах, в течение которого неиспользуемое соединение
+                                  остается открытым.
+        """
         self.bucket_name = bucket_name
         self.endpoint_url = endpoint_url or None
+        self.presigned_url_ttl = presigned_url_ttl
+        self.download_url_ttl = download_url_ttl
+        self._urls = MediaUrlBuilder(media_url)
+        self._presigned_urls: dict[tuple[str, ...], tuple[str, float]] = {}
+        self.max_pool_connections = max_pool_connections
+        retries: Any = {"max_attempts": max_retries, "mode": "standard"}
+        self._config = AioConfig(
+            max_pool_connections=max_pool_connections,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            retries=retries,
+            connector_args={"keepalive_timeout": keepalive_timeout},
+        )
         self._s3_async = aioboto3.Session()
-        self._s3_sync = boto3.client("s3", endpoint_url=endpoint_url)
+        self._s3_sync = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            config=Config(
+                max_pool_connections=max_pool_connections,
+                connect_timeout=connect_timeout,
+                read_timeout=read_timeout,
+                retries=retries,
+                tcp_keepalive=True,
+            ),
+        )
+
+        self._s3: Any = None
+        self._s3_loop: asyncio.AbstractEventLoop | None = None
+        self._exit_stack: AsyncExitStack | None = None
+        self._requests_in_flight = 0
+        self._requests_in_flight_peak = 0
+        self._requests_total = 0
+        self._clients_created = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "max_pool_connections": self.max_pool_connections,
+            "requests_in_flight": self._requests_in_flight,
+            "requests_in_flight_peak": self._requests_in_flight_peak,
+            "requests_total": self._requests_total,
+            "clients_created_total": self._clients_created,
+        }
+
+    async def connect(self) -> None:
+        if self._s3 is not None:
+            return
+        stack = AsyncExitStack()
+        self._s3 = await stack.enter_async_context(self._new_client())
+        self._s3_loop = asyncio.get_running_loop()
+        self._exit_stack = stack
+        self._clients_created += 1
+
+    async def close(self) -> None:
+        if self._exit_stack is None:
+            return
+        stack, self._exit_stack = self._exit_stack, None
+        self._s3 = None
+        self._s3_loop = None
+        await stack.aclose()
+
+    def _new_client(self) -> Any:
+        return self._s3_async.client("s3", endpoint_url=self.endpoint_url, config=self._config)
+
+    @asynccontextmanager
+    async def _client(self) -> AsyncIterator[Any]:
+        """Возвращает постоянный клиент, если он открыт в текущем event loop, иначе временный."""
+        self._requests_total += 1
+        self._requests_in_flight += 1
+        self._requests_in_flight_peak = max(self._requests_in_flight_peak, self._requests_in_flight)
+        try:
+            if self._s3 is not None and self._s3_loop is asyncio.get_running_loop():
+                yield self._s3
+            else:
+                self._clients_created += 1
+                async with self._new_client() as s3:
+                    yield s3
+        finally:
+            self._requests_in_flight -= 1
 
     @staticmethod
     def _book_prefix(book_id: int) -> str:
@@ -34,79 +158,73 @@ class S3Storage(AbstractStorage):
     async def upload_book(self, file: FileProtocol, book_id: int) -> str:
         await self.delete_book(book_id)
         key = self._book_key(book_id, str(file.filename))
-        async with self._s3_async.client("s3", endpoint_url=self.endpoint_url) as s3:
+        async with self._client() as s3:
             await s3.upload_fileobj(file.file, self.bucket_name, key)
         return key
 
-    def get_book_iterator(self, book_id: int) -> AsyncIterable[bytes]:
-        return self._get_file_async_iterator(book_id)
+    async def get_book_info(self, book_id: int) -> FileInfo:
+        async with self._client() as s3:
+            objects = await s3.list_objects_v2(Bucket=self.bucket_name, Prefix=self._book_prefix(book_id))
+        contents = objects.get("Contents")
+        if not contents:
+            raise self.FileNotFoundError(f"No book found for ID {book_id}")
+        obj = contents[0]
+        return FileInfo(
+            path=obj["Key"],
+            size=obj["Size"],
+            last_modified=self._as_utc(obj["LastModified"]),
+            etag=obj["ETag"],
+        )
 
-    async def _get_file_async_iterator(self, book_id: int) -> AsyncIterable[bytes]:
-        chunk_size = 1024 * 1024  # 1MB
-        async with self._s3_async.client("s3", endpoint_url=self.endpoint_url) as s3:
-            prefix = self._book_prefix(book_id)
-            objects = await s3.list_objects_v2(Bucket=self.bucket_name, Prefix=prefix)
-            contents = objects.get("Contents")
-            if not contents:
-                raise self.FileNotFoundError(f"No book found for ID {book_id}")
+    @staticmethod
+    def _as_utc(value: datetime) -> datetime:
+        return value if value.tzinfo is not None else value.replace(tzinfo=UTC)
 
-            key = contents[0]["Key"]
-            response = await s3.get_object(Bucket=self.bucket_name, Key=key)
+    async def get_file_iterator(
+        self, file_name: str, start: int = 0, end: int | None = None
+    ) -> AsyncIterable[bytes]:
+        params = {"Bucket": self.bucket_name, "Key": self._file_key(file_name)}
+        if start or end is not None:
+            # Ranged GetObject: S3 передает только запрошенную часть объекта.
+            params["Range"] = f"bytes={start}-{'' if end is None else end}"
+        async with self._client() as s3:
+            try:
+                response = await s3.get_object(**params)
+            except ClientError as exc:
+                if exc.response["Error"]["Code"] in NOT_FOUND_ERROR_CODES:
+                    raise self.FileNotFoundError(f"File '{file_name}' not found") from exc
+                raise
             stream = response["Body"]
-
-            while True:
-                chunk = await stream.read(chunk_size)
-                if not chunk:
-                    break
+            while chunk := await stream.read(CHUNK_SIZE):
                 yield chunk
 
-    @contextmanager
-    def get_book_binary(self, book_id: int) -> Generator[BinaryIO]:
-        prefix = self._book_prefix(book_id)
-        try:
-            result = self._s3_sync.list_objects_v2(Bucket=self.bucket_name, Prefix=prefix)
-            contents = result.get("Contents")
-            if not contents:
-                raise self.FileNotFoundError(f"No book found for ID {book_id}")
-            key = contents[0]["Key"]
-            with tempfile.NamedTemporaryFile(delete=False) as tmp:
-                self._s3_sync.download_fileobj(self.bucket_name, key, tmp)
-                tmp_path = tmp.name
-            with open(tmp_path, "rb") as f:
-                yield f
-        except ClientError as exc:
-            if exc.response["Error"]["Code"] == "NoSuchKey":
-                raise self.FileNotFoundError(f"File not found for book ID {book_id}") from exc
-            raise
-        finally:
-            if "tmp_path" in locals() and os.path.exists(tmp_path):
-                os.remove(tmp_path)
-
     async def upload_file(self, file_name: str, data: bytes) -> str:
         key = self._file_key(file_name)
-        async with self._s3_async.client("s3", endpoint_url=self.endpoint_url) as s3:
+        async with self._client() as s3:
             await s3.put_object(Bucket=self.bucket_name, Key=key, Body=data)
         return key
 
-    @contextmanager
-    def get_file_binary(self, file_name: str) -> Generator[BinaryIO]:
-        key = self._file_key(file_name)
-        try:
-            with tempfile.NamedTemporaryFile(delete=False) as tmp:
-                self._s3_sync.download_fileobj(self.bucket_name, key, tmp)
-                tmp_path = tmp.name
-            with open(tmp_path, "rb") as f:
-                yield f
-        except ClientError as exc:
-            if exc.response["Error"]["Code"] == "NoSuchKey":
-                raise self.FileNotFoundError(f"File '{file_name}' not found") from exc
-            raise
-        finally:
-            if "tmp_path" in locals() and os.path.exists(tmp_path):
-                os.remove(tmp_path)
+    async def get_file_info(self, file_name: str) -> FileInfo:
+        async with self._client() as s3:
+            try:
+                response = await s3.head_object(Bucket=self.bucket_name, Key=self._file_key(file_name))
+            except ClientError as exc:
+                if exc.response["Error"]["Code"] in NOT_FOUND_ERROR_CODES:
+                    raise self.FileNotFoundError(f"File '{file_name}' not found") from exc
+                raise
+        return FileInfo(
+            path=file_name,
+            size=response["ContentLength"],
+            last_modified=self._as_utc(response["LastModified"]),
+            etag=response["ETag"],
+        )
+
+    async def read_range(self, file_name: str, start: int = 0, end: int | None = None) -> bytes:
+        chunks = [chunk async for chunk in self.get_file_iterator(file_name, start, end)]
+        return b"".join(chunks)
 
     async def delete_book(self, book_id: int) -> None:
-        async with self._s3_async.client("s3", endpoint_url=self.endpoint_url) as s3:
+        async with self._client() as s3:
             for prefix in [f"previews/{book_id}/", self._book_prefix(book_id)]:
                 response = await s3.list_objects_v2(Bucket=self.bucket_name, Prefix=prefix)
                 contents = response.get("Contents")
@@ -115,17 +233,54 @@ class S3Storage(AbstractStorage):
                         await s3.delete_object(Bucket=self.bucket_name, Key=obj["Key"])
 
     async def get_media_url(self, file: str) -> str:
-        if file.startswith("/media"):
-            file = file[6:]
-        elif file.startswith("media"):
-            file = file[5:]
-        if not file.startswith("/"):
-            file = "/" + file
+        return (await self.get_media_urls([file]))[0]
+
+    async def get_media_urls(self, files: Sequence[str]) -> list[str]:
+        if self.presigned_url_ttl is None:
+            return [self._urls.build(file) for file in files]
+        now = time.monotonic()
+        return [self._get_presigned_url(file, now) for file in files]
+
+    async def get_download_url(
+        self, file_name: str, media_type: str | None = None, download_name: str | None = None
+    ) -> str | None:
+        if self.download_url_ttl is None:
+            return None
+        params = {"Key": self._file_key(file_name)}
+        # Объекты загружаются без типа, поэтому тип и имя файла задаются в подписанной ссылке.
+        if media_type:
+            params["ResponseContentType"] = media_type
+        if download_name:
+            params["ResponseContentDisposition"] = f'attachment; filename="{download_name}"'
+        return self._presign(params, self.download_url_ttl, time.monotonic())
 
-        if not settings.media_url.startswith("http") and not settings.media_url.startswith("/"):
-            settings.media_url = "/" + settings.media_url
+    def _get_presigned_url(self, file: str, now: float) -> str:
+        """Возвращает подписанную ссылку на медиа файл."""
+        assert self.presigned_url_ttl is not None
+        key = self._file_key(self._urls.get_path(file)[1:])
+        if not key:
+            return self._urls.build(file)
+        return self._presign({"Key": key}, self.presigned_url_ttl, now)
 
-        if settings.media_url.endswith("/"):
-            return settings.media_url[:-1] + file
+    def _presign(self, params: dict[str, str], ttl: int, now: float) -> str:
+        """
+        Возвращает подписанную ссылку `GetObject` с параметрами `params`.
+        Подпись вычисляется локально без запроса к S3, а ссылка переиспользуется,
+        пока до ее истечения остается больше четверти времени жизни.
+        """
+        cache_key = (str(ttl), *(f"{name}={value}" for name, value in sorted(params.items())))
+        cached = self._presigned_urls.get(cache_key)
+        if cached is not None and cached[1] > now:
+            return cached[0]
 
-        return settings.media_url + file
+        if len(self._presigned_urls) >= PRESIGNED_URLS_CACHE_SIZE:
+            self._presigned_urls = {k: v for k, v in self._presigned_urls.items() if v[1] > now}
+            if len(self._presigned_urls) >= PRESIGNED_URLS_CACHE_SIZE:
+                self._presigned_urls.clear()
+        url = self._s3_sync.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket_name, **params},
+            ExpiresIn=ttl,
+        )
+        self._presigned_urls[cache_key] = (url, now + ttl * 0.75)
+        return url
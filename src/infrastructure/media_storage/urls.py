@@ -0,0 +1,25 @@
+class MediaUrlBuilder:
+    """Формирует URL файлов хранилища. Префикс URL вычисляется один раз при создании."""
+
+    def __init__(self, media_url: str):
+        """
+        :param media_url: Адрес, по которому раздаются файлы хранилища,
+                          например `/media` или `https://cdn.example.com/media`.
+        """
+        if not media_url.startswith("http") and not media_url.startswith("/"):
+            media_url = "/" + media_url
+        self.prefix = media_url.removesuffix("/")
+
+    @staticmethod
+    def get_path(file: str) -> str:
+        """Возвращает путь к файлу в хранилище с ведущим `/` без префикса `media`."""
+        if file.startswith("/media"):
+            file = file[6:]
+        elif file.startswith("media"):
+            file = file[5:]
+        if not file.startswith("/"):
+            file = "/" + file
+        return file
+
+    def build(self, file: str) -> str:
+        return self.prefix + self.get_path(file)
@@ -39,17 +39,66 @@ class _BaseSettings(BaseSettings):
     BUCKET_NAME: str = ""
     AWS_REGION: str = ""
     S3_ENDPOINT_URL: str = ""
+    s3_presigned_url_ttl: int | None = None  # Выдавать подписанные ссылки на файлы S3 вместо media_url
+    s3_download_url_ttl: int | None = None  # Перенаправлять скачивание книг на подписанные ссылки S3
+    # Пул соединений клиента S3, открывается при запуске приложения и воркера Celery
+    s3_max_pool_connections: int = 20
+    s3_connect_timeout: float = 5
+    s3_read_timeout: float = 60
+    s3_max_retries: int = 3
+    s3_keepalive_timeout: float = 60
 
     database_url: str = ""  # Путь к базе данных
     database_echo: bool = False
     database_pool_size: int = 10
     database_max_overflow: int = 20
     media_url: str = "/media"
+    # Внутренний адрес nginx (location с `internal`), по которому отдаются файлы media_root.
+    # Если указан, локальные файлы книг отдает nginx по заголовку X-Accel-Redirect,
+    # иначе приложение отдает их через FileResponse.
+    download_accel_redirect_url: str = ""
 
     REDIS_HOST: str = ""
     REDIS_PASSWORD: str | None = None
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
+    REDIS_MAX_CONNECTIONS: int = 20
+
+    # Кеш в памяти процесса, используется, если не указан REDIS_HOST
+    local_cache_max_entries: int = 10_000
+    local_cache_max_bytes: int = 64 * 1024 * 1024
+    local_cache_serialize: bool = True  # Без сериализации значения из кеша нельзя изменять
+
+    # Копия значений из Redis в памяти процесса, сбрасывается по сообщениям из канала Redis pub/sub
+    cache_l1_enabled: bool = True
+    cache_l1_ttl: int = 30
+    cache_l1_max_entries: int = 1000
+    cache_invalidation_channel: str = "cache:invalidate"
+
+    # Формат значений в Redis: orjson, msgpack или pickle, сжатие zstd для значений больше порога в байтах
+    cache_serializer: str = "orjson"
+    cache_compress_threshold: int | None = 1024
+
+    # При ошибках Redis кеш временно работает в памяти процесса
+    cache_breaker_failure_threshold: int = 5
+    cache_breaker_reset_timeout: float = 30
+    cache_breaker_call_timeout: float = 0.5
+
+    # Доля операций кеша, записываемых в debug журнал, метрики кеша собираются для всех операций
+    cache_log_sample_rate: float = 0.01
+    # Токен доступа к /internal/metrics (`Authorization: Bearer <токен>`), без токена метрики недоступны
+    METRICS_TOKEN: str = ""
+
+    # Кеш общего количества книг в постраничных списках
+    books_count_cache_ttl: int = 60 * 10
+    books_count_estimate: bool = False  # Оценка количества по статистике БД для списков без фильтров
+
+    # Кеш книг по идентификатору для постраничных списков
+    book_cache_ttl: int = 60 * 60
+
+    # Кеш последних книг: после мягкого времени жизни список обновляется в фоне
+    recent_books_cache_soft_ttl: int = 60 * 5
+    recent_books_write_through: bool = True  # Перестраивать список после изменения книги вместо удаления
 
     CELERY_BROKER_URL: str = ""  # Брокер сообщений для Celery
 
@@ -12,11 +12,12 @@ from src.application.books.handlers import (
     BookmarksQueryHandler,
     BookQueryHandler,
 )
-from src.application.books.services import RecentBookService
+from src.application.books.services import BookCacheService, BookCountService, RecentBookService
 from src.application.bookshelves.handlers import BookshelfCommandHandler, BookshelfQueryHandler
 from src.application.comments.handler import CommentsCommandHandler, CommentsQueryHandler
 from src.application.history.handlers import HistoryCommandHandler, HistoryQueryHandler
 from src.application.services.cache import AbstractCache
+from src.application.services.single_flight import SingleFlight
 from src.application.services.storage import AbstractStorage
 from src.application.services.task_manager import TaskManager
 from src.application.users.handlers import (
@@ -31,9 +32,10 @@ from src.domain.common.unit_of_work import UnitOfWork
 from src.infrastructure.auth.hashers import BcryptPasswordHasher, PasswordHasherProtocol
 from src.infrastructure.auth.token_service import JWTService
 from src.infrastructure.db.session_manager import db_manager
-from src.infrastructure.db.unit_of_work import SqlAlchemyUnitOfWork
-from src.infrastructure.dependencies import get_cache, get_storage, get_task_manager
+from src.infrastructure.db.unit_of_work import SqlAlchemyUnitOfWork, new_unit_of_work
+from src.infrastructure.dependencies import get_cache, get_single_flight, get_storage, get_task_manager
 from src.infrastructure.settings import settings
+from src.presentation.api.file_responses import FileDelivery
 
 
 @cache
@@ -50,8 +52,42 @@ def get_jwt_token_service() -> JWTService:
     )
 
 
-def get_recent_book_service(cache_: Annotated[AbstractCache, Depends(get_cache)]):
-    return RecentBookService(cache=cache_)
+def get_recent_book_service(
+    cache_: Annotated[AbstractCache, Depends(get_cache)],
+    storage: Annotated[AbstractStorage, Depends(get_storage)],
+    single_flight: Annotated[SingleFlight, Depends(get_single_flight)],
+):
+    return RecentBookService(
+        cache=cache_,
+        storage=storage,
+        uow_factory=new_unit_of_work,
+        soft_ttl=settings.recent_books_cache_soft_ttl,
+        write_through=settings.recent_books_write_through,
+        single_flight=single_flight,
+    )
+
+
+def get_book_count_service(
+    cache_: Annotated[AbstractCache, Depends(get_cache)],
+    single_flight: Annotated[SingleFlight, Depends(get_single_flight)],
+):
+    return BookCountService(
+        cache=cache_,
+        cache_ttl=settings.books_count_cache_ttl,
+        estimate_unfiltered=settings.books_count_estimate,
+        single_flight=single_flight,
+    )
+
+
+def get_book_cache_service(
+    cache_: Annotated[AbstractCache, Depends(get_cache)],
+    storage: Annotated[AbstractStorage, Depends(get_storage)],
+):
+    return BookCacheService(cache=cache_, storage=storage, cache_ttl=settings.book_cache_ttl)
+
+
+def get_file_delivery(storage: Annotated[AbstractStorage, Depends(get_storage)]) -> FileDelivery:
+    return FileDelivery(storage, accel_redirect_url=settings.download_accel_redirect_url)
 
 
 async def get_session() -> AsyncIterator[AsyncSession]:
@@ -101,9 +137,9 @@ def get_reset_password_handler(
 
 def get_bookmark_query_handler(
     session: Annotated[AsyncSession, Depends(get_session, use_cache=True)],
-    storage: Annotated[AbstractStorage, Depends(get_storage)],
+    book_cache_service: Annotated[BookCacheService, Depends(get_book_cache_service)],
 ):
-    return BookmarksQueryHandler(uow=SqlAlchemyUnitOfWork(session), storage=storage)
+    return BookmarksQueryHandler(uow=SqlAlchemyUnitOfWork(session), book_cache_service=book_cache_service)
 
 
 def get_bookmark_command_handler(session: Annotated[AsyncSession, Depends(get_session, use_cache=True)]):
@@ -114,11 +150,19 @@ def get_book_query_handler(
     session: Annotated[AsyncSession, Depends(get_session, use_cache=True)],
     storage: Annotated[AbstractStorage, Depends(get_storage)],
     recent_book_service: Annotated[RecentBookService, Depends(get_recent_book_service)],
+    book_count_service: Annotated[BookCountService, Depends(get_book_count_service)],
+    book_cache_service: Annotated[BookCacheService, Depends(get_book_cache_service)],
+    cache_: Annotated[AbstractCache, Depends(get_cache)],
+    single_flight: Annotated[SingleFlight, Depends(get_single_flight)],
 ):
     return BookQueryHandler(
         uow=SqlAlchemyUnitOfWork(session),
         storage=storage,
         recent_book_service=recent_book_service,
+        book_count_service=book_count_service,
+        book_cache_service=book_cache_service,
+        cache=cache_,
+        single_flight=single_flight,
     )
 
 
@@ -127,12 +171,18 @@ def get_book_command_handler(
     storage: Annotated[AbstractStorage, Depends(get_storage)],
     task_manager: Annotated[TaskManager, Depends(get_task_manager)],
     recent_book_service: Annotated[RecentBookService, Depends(get_recent_book_service)],
+    book_count_service: Annotated[BookCountService, Depends(get_book_count_service)],
+    book_cache_service: Annotated[BookCacheService, Depends(get_book_cache_service)],
+    cache_: Annotated[AbstractCache, Depends(get_cache)],
 ):
     return BookCommandHandler(
         uow=SqlAlchemyUnitOfWork(session),
         task_manager=task_manager,
         storage=storage,
         recent_book_service=recent_book_service,
+        book_count_service=book_count_service,
+        book_cache_service=book_cache_service,
+        cache=cache_,
     )
 
 
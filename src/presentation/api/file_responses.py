@@ -0,0 +1,266 @@
+import secrets
+from collections.abc import AsyncIterable, Callable, Sequence
+from datetime import UTC, datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from urllib.parse import quote
+
+from fastapi import Request, status
+from fastapi.responses import FileResponse, RedirectResponse, Response, StreamingResponse
+
+from src.application.services.storage import AbstractStorage, FileInfo
+
+# Запрос с большим количеством диапазонов обслуживается целиком.
+MAX_RANGES = 16
+
+ByteRange = tuple[int, int]
+RangeReader = Callable[[int, int | None], AsyncIterable[bytes]]
+
+
+class RangeNotSatisfiableError(Exception):
+    """Ни один из запрошенных диапазонов не пересекается с файлом."""
+
+
+def parse_range_header(header: str, size: int) -> list[ByteRange] | None:
+    """
+    Разбирает заголовок `Range` (RFC 9110).
+
+    :param header: Значение заголовка, например `bytes=0-1023,-500`.
+    :param size: Размер файла.
+    :return: Диапазоны `(start, end)` с включительным концом или `None`, если заголовок некорректен
+             и должен быть проигнорирован.
+    :raises RangeNotSatisfiableError: Если ни один диапазон не пересекается с файлом.
+    """
+    unit, _, specs = header.partition("=")
+    if unit.strip().lower() != "bytes" or not specs.strip():
+        return None
+
+    ranges = []
+    for spec in specs.split(","):
+        first, sep, last = spec.strip().partition("-")
+        if not sep or not (first or last) or not all(part.isdigit() for part in (first, last) if part):
+            return None
+        if not first:
+            # Суффикс: последние `last` байт файла.
+            if int(last) > 0 and size > 0:
+                ranges.append((max(size - int(last), 0), size - 1))
+            continue
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        if start < size:
+            ranges.append((start, min(int(last), size - 1) if last else size - 1))
+
+    if not ranges:
+        raise RangeNotSatisfiableError
+    return ranges
+
+
+def _http_date(value: datetime) -> str:
+    return format_datetime(value, usegmt=True)
+
+
+def _parse_http_date(value: str) -> datetime | None:
+    """Разбирает HTTP дату, дата без часового пояса (`-0000`) считается датой в UTC."""
+    try:
+        date = parsedate_to_datetime(value)
+    except TypeError, ValueError:
+        return None
+    return date if date.tzinfo is not None else date.replace(tzinfo=UTC)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Слабое сравнение ETag для `If-None-Match`."""
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag.removeprefix("W/") for tag in header.split(","))
+
+
+def _is_not_modified(request: Request, info: FileInfo) -> bool:
+    if (if_none_match := request.headers.get("if-none-match")) is not None:
+        return _etag_matches(if_none_match, info.etag)
+    if (if_modified_since := request.headers.get("if-modified-since")) is not None:
+        since = _parse_http_date(if_modified_since)
+        return since is not None and info.last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def _if_range_matches(request: Request, info: FileInfo) -> bool:
+    """
+    Проверяет условие `If-Range`: диапазон отдается, только если файл не изменился.
+    ETag сравнивается строго, дата должна совпадать с `Last-Modified`.
+    """
+    if_range = request.headers.get("if-range")
+    if if_range is None:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith(('"', "W/")):
+        return not info.etag.startswith("W/") and if_range == info.etag
+    date = _parse_http_date(if_range)
+    return date is not None and date == info.last_modified.replace(microsecond=0)
+
+
+def _multipart_parts(
+    boundary: str, ranges: Sequence[ByteRange], size: int, media_type: str
+) -> list[tuple[bytes, ByteRange]]:
+    return [
+        (
+            (
+                f"--{boundary}\r\nContent-Type: {media_type}\r\n"
+                f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+            ).encode(),
+            (start, end),
+        )
+        for start, end in ranges
+    ]
+
+
+async def _multipart_body(
+    reader: RangeReader, parts: list[tuple[bytes, ByteRange]], boundary: str
+) -> AsyncIterable[bytes]:
+    for index, (header, (start, end)) in enumerate(parts):
+        yield (b"\r\n" if index else b"") + header
+        async for chunk in reader(start, end):
+            yield chunk
+    yield f"\r\n--{boundary}--\r\n".encode()
+
+
+def ranged_file_response(
+    request: Request,
+    info: FileInfo,
+    reader: RangeReader,
+    media_type: str,
+    headers: dict[str, str] | None = None,
+) -> Response:
+    """
+    Формирует ответ с файлом с учетом условных запросов и запросов части файла.
+
+    - `If-None-Match` / `If-Modified-Since` - ответ 304 без тела.
+    - `Range` с одним диапазоном - ответ 206 с `Content-Range`.
+    - `Range` с несколькими диапазонами - ответ 206 `multipart/byteranges`.
+    - `If-Range` - диапазоны отдаются, только если файл не изменился, иначе файл целиком.
+    - Диапазоны вне файла - ответ 416.
+
+    :param request: Запрос.
+    :param info: :class:`FileInfo` сведения о файле.
+    :param reader: Функция, возвращающая итератор по байтам файла от `start` до `end` включительно.
+    :param media_type: MIME тип файла.
+    :param headers: Дополнительные заголовки ответа.
+    :return: Ответ.
+    """
+    headers = {
+        **(headers or {}),
+        "Accept-Ranges": "bytes",
+        "ETag": info.etag,
+        "Last-Modified": _http_date(info.last_modified),
+    }
+
+    if _is_not_modified(request, info):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    ranges = None
+    if (range_header := request.headers.get("range")) is not None and _if_range_matches(request, info):
+        try:
+            ranges = parse_range_header(range_header, info.size)
+        except RangeNotSatisfiableError:
+            return Response(
+                status_code=status.HTTP_416_RANGE_NOT_SATISFIABLE,
+                headers={**headers, "Content-Range": f"bytes */{info.size}"},
+            )
+        if ranges is not None and len(ranges) > MAX_RANGES:
+            ranges = None
+
+    if ranges is None:
+        return StreamingResponse(
+            content=reader(0, None),
+            media_type=media_type,
+            headers={**headers, "Content-Length": str(info.size)},
+        )
+
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        return StreamingResponse(
+            content=reader(start, end),
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            media_type=media_type,
+            headers={
+                **headers,
+                "Content-Range": f"bytes {start}-{end}/{info.size}",
+                "Content-Length": str(end - start + 1),
+            },
+        )
+
+    boundary = secrets.token_hex(16)
+    parts = _multipart_parts(boundary, ranges, info.size, media_type)
+    length = sum(len(header) + end - start + 1 for header, (start, end) in parts)
+    length += 2 * (len(parts) - 1) + len(f"\r\n--{boundary}--\r\n")
+    return StreamingResponse(
+        content=_multipart_body(reader, parts, boundary),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=f"multipart/byteranges; boundary={boundary}",
+        headers={**headers, "Content-Length": str(length)},
+    )
+
+
+class FileDelivery:
+    """
+    Выбирает способ отдачи файла из хранилища после проверки прав доступа.
+
+    - Локальный файл при указанном `accel_redirect_url` отдает nginx по заголовку `X-Accel-Redirect`,
+      приложение не участвует в передаче данных.
+    - Локальный файл без прокси отдается через :class:`FileResponse`, который передает файл
+      без копирования (`sendfile`), если ASGI сервер это поддерживает.
+    - Если хранилище выдает временные ссылки на файлы (S3), то клиент перенаправляется
+      на такую ссылку и скачивает файл напрямую из хранилища.
+    - Остальные файлы читаются из хранилища с учетом запросов части файла.
+    """
+
+    def __init__(self, storage: AbstractStorage, accel_redirect_url: str = "") -> None:
+        """
+        :param storage: :class:`AbstractStorage` хранилище.
+        :param accel_redirect_url: Внутренний адрес nginx, по которому отдаются файлы хранилища.
+        """
+        self.storage = storage
+        self.accel_redirect_url = accel_redirect_url.rstrip("/")
+
+    async def response(
+        self,
+        request: Request,
+        info: FileInfo,
+        media_type: str,
+        download_name: str | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> Response:
+        """
+        Формирует ответ с файлом.
+
+        :param request: Запрос.
+        :param info: :class:`FileInfo` сведения о файле.
+        :param media_type: MIME тип файла.
+        :param download_name: Имя файла для сохранения, если файл нужно скачать, а не открыть.
+        :param headers: Дополнительные заголовки ответа.
+        :return: Ответ.
+        """
+        download_url = await self.storage.get_download_url(info.path, media_type, download_name)
+        if download_url is not None:
+            # Ссылка временная, поэтому перенаправление не кешируется.
+            return RedirectResponse(
+                download_url, status_code=status.HTTP_302_FOUND, headers={"Cache-Control": "no-store"}
+            )
+
+        headers = headers or {}
+        if download_name:
+            headers["Content-Disposition"] = f'attachment; filename="{download_name}"'
+        local_path = self.storage.get_local_path(info.path)
+        if local_path is not None and self.accel_redirect_url:
+            # Заголовки `Range`, `If-Range` и условные запросы обрабатывает nginx.
+            location = f"{self.accel_redirect_url}/{quote(info.path)}"
+            return Response(media_type=media_type, headers={**headers, "X-Accel-Redirect": location})
+        if local_path is not None:
+            return FileResponse(local_path, media_type=media_type, headers=headers)
+        return ranged_file_response(
+            request,
+            info,
+            lambda start, end: self.storage.get_file_iterator(info.path, start, end),
+            media_type=media_type,
+            headers=headers,
+        )
@@ -81,7 +81,7 @@ async def get_favorite_books_view(
     handler: Annotated[BookmarksQueryHandler, Depends(get_bookmark_query_handler)],
 ):
     """Возвращает избранные книги пользователя."""
-    books, count = await handler.handle_get_favorite_books(
+    books, count, _ = await handler.handle_get_favorite_books(
         BookmarksQueryFilter(
             user_id=user_id,
             page=paginator.page,
@@ -103,7 +103,7 @@ async def get_read_books_view(
     handler: Annotated[BookmarksQueryHandler, Depends(get_bookmark_query_handler)],
 ):
     """Возвращает прочитанные книги пользователя."""
-    books, count = await handler.handle_get_read_books(
+    books, count, _ = await handler.handle_get_read_books(
         BookmarksQueryFilter(
             user_id=user_id,
             page=paginator.page,
@@ -5,12 +5,12 @@ from fastapi import APIRouter, Depends, status
 from src.application.books.commands import UpdateFavoriteCommand, UpdateReadCommand
 from src.application.books.handlers import BookmarksCommandHandler, BookmarksQueryHandler
 from src.application.users.dto import UserDTO
-from src.domain.books.entities import BookmarksQueryFilter
+from src.domain.books.entities import BookCursor, BookmarksQueryFilter
 
 from ..auth import get_current_user
 from ..dependencies import get_bookmark_command_handler, get_bookmark_query_handler
 from ..schemas.books import BooksSchemaPaginated
-from .queries import PaginatorQuery, paginator_query
+from .queries import PaginatorQuery, cursor_query, paginator_query
 
 router = APIRouter(prefix="/bookmarks", tags=["bookmarks"])
 
@@ -18,18 +18,24 @@ router = APIRouter(prefix="/bookmarks", tags=["bookmarks"])
 @router.get("/favorite", status_code=status.HTTP_200_OK, response_model=BooksSchemaPaginated)
 async def get_favorite_books_view(
     paginator: Annotated[PaginatorQuery, Depends(paginator_query)],
+    cursor: Annotated[str | None, Depends(cursor_query)],
     user: Annotated[UserDTO, Depends(get_current_user)],
     bookmark_query_handler: Annotated[BookmarksQueryHandler, Depends(get_bookmark_query_handler)],
 ):
-    books, total = await bookmark_query_handler.handle_get_favorite_books(
-        BookmarksQueryFilter(user_id=user.id, page=paginator.page, page_size=paginator.per_page)
+    query = BookmarksQueryFilter(
+        user_id=user.id,
+        page=paginator.page,
+        page_size=paginator.per_page,
+        cursor=BookCursor.decode(cursor, BookmarksQueryFilter.keyset_fields) if cursor else None,
     )
+    books, total, next_cursor = await bookmark_query_handler.handle_get_favorite_books(query)
 
     return BooksSchemaPaginated.from_books_dto(
         books=books,
         total_count=total,
         current_page=paginator.page,
         per_page=paginator.per_page,
+        next_cursor=next_cursor.encode() if next_cursor else None,
     )
 
 
@@ -44,18 +50,24 @@ async def get_favorite_books_count_view(
 @router.get("/read", status_code=status.HTTP_200_OK, response_model=BooksSchemaPaginated)
 async def get_read_books_view(
     paginator: Annotated[PaginatorQuery, Depends(paginator_query)],
+    cursor: Annotated[str | None, Depends(cursor_query)],
     user: Annotated[UserDTO, Depends(get_current_user)],
     bookmark_query_handler: Annotated[BookmarksQueryHandler, Depends(get_bookmark_query_handler)],
 ):
-    books, total = await bookmark_query_handler.handle_get_read_books(
-        BookmarksQueryFilter(user_id=user.id, page=paginator.page, page_size=paginator.per_page)
+    query = BookmarksQueryFilter(
+        user_id=user.id,
+        page=paginator.page,
+        page_size=paginator.per_page,
+        cursor=BookCursor.decode(cursor, BookmarksQueryFilter.keyset_fields) if cursor else None,
     )
+    books, total, next_cursor = await bookmark_query_handler.handle_get_read_books(query)
 
     return BooksSchemaPaginated.from_books_dto(
         books=books,
         total_count=total,
         current_page=paginator.page,
         per_page=paginator.per_page,
+        next_cursor=next_cursor.encode() if next_cursor else None,
     )
 
 
@@ -1,6 +1,7 @@
+from dataclasses import replace
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, status
 from fastapi.responses import StreamingResponse
 from slugify import slugify
 
@@ -13,11 +14,22 @@ from src.application.books.commands import (
 from src.application.books.handlers import BookCommandHandler, BookQueryHandler
 from src.application.services.storage import AbstractStorage
 from src.application.users.dto import UserDTO
-from src.domain.books.entities import BookFilter
+from src.domain.books.entities import BookCursor, BookFilter
 from src.presentation.api.auth import get_current_user, get_user_or_none
-from src.presentation.api.dependencies import get_book_command_handler, get_book_query_handler, get_storage
-from src.presentation.api.handlers.queries import PaginatorQuery, paginator_query
+from src.presentation.api.dependencies import (
+    get_book_command_handler,
+    get_book_query_handler,
+    get_file_delivery,
+    get_storage,
+)
+from src.presentation.api.file_responses import FileDelivery
+from src.presentation.api.handlers.queries import (
+    PaginatorQuery,
+    cursor_query,
+    paginator_query,
+)
 from src.presentation.api.schemas.books import (
+    BookFacetsSchema,
     BookSchema,
     BookSchemaDetail,
     BookSchemaWithDesc,
@@ -93,7 +105,10 @@ async def get_last_viewed_books_view(
 
 def books_query_params(
     paginator: Annotated[PaginatorQuery, Depends(paginator_query)],
-    search: Annotated[str | None, Query(max_length=254, description="Поиск по названию и описанию")] = None,
+    cursor: Annotated[str | None, Depends(cursor_query)],
+    search: Annotated[
+        str | None, Query(max_length=254, description="Полнотекстовый поиск по названию, авторам и описанию")
+    ] = None,
     title: Annotated[str | None, Query(max_length=254, description="Заголовок")] = None,
     authors: Annotated[str | None, Query(max_length=254, description="Авторы книги")] = None,
     publisher: Annotated[str | None, Query(max_length=128, description="Издательство")] = None,
@@ -118,7 +133,7 @@ def books_query_params(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail="pages_gt must be less than pages_lt",
         )
-    return BookFilter(
+    query = BookFilter(
         search=search,
         title=title,
         authors=authors,
@@ -133,6 +148,22 @@ def books_query_params(
         page=paginator.page,
         page_size=paginator.per_page,
     )
+    if cursor:
+        # Значения курсора проверяются по типам полей сортировки фильтра.
+        query = replace(query, cursor=BookCursor.decode(cursor, query.keyset_fields))
+    return query
+
+
+@router.get("/facets", response_model=BookFacetsSchema)
+async def get_books_facets_view(
+    query_params: Annotated[BookFilter, Depends(books_query_params)],
+    current_user: Annotated[UserDTO | None, Depends(get_user_or_none)],
+    book_query_handler: Annotated[BookQueryHandler, Depends(get_book_query_handler)],
+):
+    """Количество книг по фильтру в разрезе тегов, издательств, годов и языков."""
+    query_params.viewer_id = current_user.id if current_user else None
+    facets = await book_query_handler.handle_get_facets(query_params)
+    return BookFacetsSchema.model_validate(facets)
 
 
 @router.get("", response_model=BooksSchemaPaginated)
@@ -143,13 +174,14 @@ async def get_books_view(
 ):
     """Просмотр всех книг с фильтрацией по запросу."""
     query_params.viewer_id = current_user.id if current_user else None
-    books, count = await book_query_handler.handle_get_list_books(query_params)
+    books, count, next_cursor = await book_query_handler.handle_get_list_books(query_params)
 
     return BooksSchemaPaginated.from_books_dto(
         books=books,
         total_count=count,
         current_page=query_params.page,
         per_page=query_params.page_size,
+        next_cursor=next_cursor.encode() if next_cursor else None,
     )
 
 
@@ -248,12 +280,19 @@ async def upload_book_file(
 @router.get("/{book_id}/download", response_class=StreamingResponse)
 async def download_book_file(
     book_id: int,
+    request: Request,
     user: Annotated[UserDTO | None, Depends(get_user_or_none)],
     book_query_handler: Annotated[BookQueryHandler, Depends(get_book_query_handler)],
     storage: Annotated[AbstractStorage, Depends(get_storage)],
+    file_delivery: Annotated[FileDelivery, Depends(get_file_delivery)],
     as_file: Annotated[bool, Query(alias="as-file")] = False,
 ):
-    """Скачивание файла книги"""
+    """
+    Скачивание файла книги.
+    Поддерживаются запросы части файла (`Range`, `If-Range`) и условные запросы (`ETag`, `Last-Modified`).
+    Локальные файлы отдает nginx по заголовку `X-Accel-Redirect`, если он настроен.
+    Файлы из S3 скачиваются по перенаправлению на подписанную ссылку, если это включено.
+    """
     book = await book_query_handler.handle_get_book(book_id)
     if book.private and (user is None or book.user_id != user.id):
         raise HTTPException(
@@ -264,13 +303,13 @@ async def download_book_file(
     headers = {
         "Cache-Control": "max-age=86400",
     }
-    if as_file:
-        headers["Content-Disposition"] = f'attachment; filename="{slugify(book.title)}.pdf"'
 
-    book_async_iterator = storage.get_book_iterator(book.id)
+    file_info = await storage.get_book_info(book.id)
 
-    return StreamingResponse(
-        content=book_async_iterator,
+    return await file_delivery.response(
+        request,
+        file_info,
         media_type="application/pdf",
+        download_name=f"{slugify(book.title)}.pdf" if as_file else None,
         headers=headers,
     )
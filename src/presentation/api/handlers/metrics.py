@@ -0,0 +1,42 @@
+import secrets
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+
+from src.infrastructure.dependencies import get_cache_metrics
+from src.infrastructure.settings import settings
+
+
+async def verify_metrics_token(authorization: Annotated[str | None, Header()] = None) -> None:
+    """
+    Проверяет токен доступа к метрикам из заголовка `Authorization: Bearer <токен>`.
+
+    :param authorization: Значение заголовка HTTP (Authorization).
+    :raises HTTPException: 404, если токен метрик не настроен, 401, если токен не совпадает.
+    """
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(
+        token.strip().encode(), settings.METRICS_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Unauthorized",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["internal"],
+    include_in_schema=False,
+    dependencies=[Depends(verify_metrics_token)],
+)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics_view():
+    """Метрики кеша в текстовом формате Prometheus."""
+    return PlainTextResponse(get_cache_metrics().render())
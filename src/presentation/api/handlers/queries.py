@@ -17,3 +17,15 @@ def paginator_query(
     ] = 25,
 ) -> PaginatorQuery:
     return PaginatorQuery(page=page, per_page=per_page)
+
+
+def cursor_query(
+    cursor: Annotated[
+        str | None, Query(description="Курсор следующей страницы (`nextCursor` из предыдущего ответа)")
+    ] = None,
+) -> str | None:
+    """
+    Курсор keyset пагинации. Если указан, то номер страницы не используется.
+    Значения курсора проверяются по полям сортировки списка при создании фильтра.
+    """
+    return cursor or None
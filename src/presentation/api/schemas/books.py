@@ -21,6 +21,20 @@ class TagSchema(CamelSerializerModel):
     name: str = Field(..., max_length=128)
 
 
+class ImageVariantSchema(CamelSerializerModel):
+    """Схема варианта изображения. Для миниатюр указан размер, в который вписано изображение."""
+
+    url: str
+    max_width: int | None = None
+    max_height: int | None = None
+
+
+def get_preview_variants(book: BookDTO) -> dict[str, ImageVariantSchema]:
+    return {
+        name: ImageVariantSchema.model_validate(variant) for name, variant in book.preview_variants.items()
+    }
+
+
 class CreateBookSchema(CamelAliasModel):
     """Схема для создания новой книги."""
 
@@ -42,7 +56,8 @@ class BookSchema(CamelSerializerModel):
     user_id: int
 
     title: str = Field(..., max_length=254)
-    preview_image: str = Field(..., max_length=128)
+    preview_image: str
+    preview_variants: dict[str, ImageVariantSchema] = Field(default_factory=dict)
     authors: str = Field(..., max_length=254)
     pages: int
     size: int
@@ -59,6 +74,7 @@ class BookSchema(CamelSerializerModel):
             user_id=book.user_id,
             title=book.title,
             preview_image=book.preview_image,
+            preview_variants=get_preview_variants(book),
             authors=book.authors,
             pages=book.pages,
             size=book.size,
@@ -83,6 +99,7 @@ class BookSchemaWithDesc(BookSchema):
             title=book.title,
             description=book.description,
             preview_image=book.preview_image,
+            preview_variants=get_preview_variants(book),
             authors=book.authors,
             pages=book.pages,
             size=book.size,
@@ -116,17 +133,25 @@ class BooksSchemaPaginated(CamelSerializerModel):
     """
     Схема для представления списка книг (без описания).
     Содержит информацию о количестве всех записей, текущей странице,
-    максимальное кол-во страниц, количество записей на одной странице"""
+    максимальное кол-во страниц, количество записей на одной странице
+    и курсор следующей страницы для keyset пагинации"""
 
     books: list[BookSchema]
     total_count: int
     current_page: int
     max_pages: int
     per_page: int
+    next_cursor: str | None = None
 
     @classmethod
     def from_books_dto(
-        cls, *, books: list[BookDTO], total_count: int, current_page: int, per_page: int
+        cls,
+        *,
+        books: list[BookDTO],
+        total_count: int,
+        current_page: int,
+        per_page: int,
+        next_cursor: str | None = None,
     ) -> Self:
         if total_count % per_page == 0:
             max_pages = total_count // per_page
@@ -139,6 +164,7 @@ class BooksSchemaPaginated(CamelSerializerModel):
             current_page=current_page,
             max_pages=max_pages,
             per_page=per_page,
+            next_cursor=next_cursor,
         )
 
 
@@ -184,3 +210,17 @@ class BooksWithReadPagesPaginatedSchema(CamelSerializerModel):
             max_pages=max_pages,
             per_page=per_page,
         )
+
+
+class FacetBucketSchema(CamelSerializerModel):
+    value: str | int
+    count: int
+
+
+class BookFacetsSchema(CamelSerializerModel):
+    """Схема для представления количества найденных книг в разрезе тегов, издательств, годов и языков."""
+
+    tags: list[FacetBucketSchema]
+    publishers: list[FacetBucketSchema]
+    years: list[FacetBucketSchema]
+    languages: list[FacetBucketSchema]
@@ -3,6 +3,7 @@ from datetime import datetime
 from pydantic import Field
 
 from .base import CamelAliasModel, CamelSerializerModel
+from .books import ImageVariantSchema
 
 
 class CreateUpdateBookshelfSchema(CamelAliasModel):
@@ -15,6 +16,7 @@ class CreateUpdateBookshelfSchema(CamelAliasModel):
 class BookshelfOneBookSchema(CamelSerializerModel):
     id: int
     preview: str
+    preview_variants: dict[str, ImageVariantSchema] = Field(default_factory=dict)
 
 
 class BookshelfSchema(CamelSerializerModel):
@@ -0,0 +1,201 @@
+import os
+from datetime import UTC, datetime
+from email.utils import format_datetime
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI, Request, Response
+from fastapi.testclient import TestClient
+
+from src.infrastructure.media_storage.local import LocalStorage
+from src.presentation.api.file_responses import (
+    MAX_RANGES,
+    FileDelivery,
+    RangeNotSatisfiableError,
+    parse_range_header,
+    ranged_file_response,
+)
+
+FILE_NAME = "books/1/book.pdf"
+DATA = bytes(range(256)) * 4
+LAST_MODIFIED = datetime(2026, 1, 1, 12, 0, tzinfo=UTC)
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    [
+        ("bytes=0-9", [(0, 9)]),
+        ("bytes=90-", [(90, 99)]),
+        ("bytes=90-500", [(90, 99)]),
+        ("bytes=-10", [(90, 99)]),
+        ("bytes=-500", [(0, 99)]),
+        ("Bytes = 0-0, 50-59", [(0, 0), (50, 59)]),
+        ("bytes=200-,0-1", [(0, 1)]),
+    ],
+)
+def test_parse_range_header(header: str, expected: list[tuple[int, int]]):
+    assert parse_range_header(header, 100) == expected
+
+
+@pytest.mark.parametrize(
+    "header", ["items=0-9", "bytes=", "bytes=5", "bytes=-", "bytes=9-0", "bytes=a-9", "bytes=0-9,x"]
+)
+def test_parse_invalid_range_header(header: str):
+    assert parse_range_header(header, 100) is None
+
+
+@pytest.mark.parametrize(("header", "size"), [("bytes=100-", 100), ("bytes=-0", 100), ("bytes=0-9", 0)])
+def test_parse_unsatisfiable_range_header(header: str, size: int):
+    with pytest.raises(RangeNotSatisfiableError):
+        parse_range_header(header, size)
+
+
+@pytest.fixture
+def storage(tmp_path: Path) -> LocalStorage:
+    path = tmp_path / FILE_NAME
+    path.parent.mkdir(parents=True)
+    path.write_bytes(DATA)
+    os.utime(path, (LAST_MODIFIED.timestamp(), LAST_MODIFIED.timestamp()))
+    return LocalStorage(tmp_path)
+
+
+@pytest.fixture
+def client(storage: LocalStorage) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/ranged")
+    async def ranged(request: Request) -> Response:
+        info = await storage.get_file_info(FILE_NAME)
+        return ranged_file_response(
+            request,
+            info,
+            lambda start, end: storage.get_file_iterator(FILE_NAME, start, end),
+            media_type="application/pdf",
+        )
+
+    @app.get("/delivery")
+    async def delivery(request: Request, accel_redirect_url: str = "") -> Response:
+        info = await storage.get_file_info(FILE_NAME)
+        file_delivery = FileDelivery(storage, accel_redirect_url=accel_redirect_url)
+        return await file_delivery.response(request, info, "application/pdf", download_name="book.pdf")
+
+    return TestClient(app)
+
+
+def test_full_file(client: TestClient):
+    response = client.get("/ranged")
+    assert response.status_code == 200
+    assert response.content == DATA
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert response.headers["Content-Length"] == str(len(DATA))
+    assert response.headers["Last-Modified"] == format_datetime(LAST_MODIFIED, usegmt=True)
+
+
+def test_single_range(client: TestClient):
+    response = client.get("/ranged", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == DATA[10:20]
+    assert response.headers["Content-Range"] == f"bytes 10-19/{len(DATA)}"
+    assert response.headers["Content-Length"] == "10"
+
+
+def test_suffix_range(client: TestClient):
+    response = client.get("/ranged", headers={"Range": "bytes=-5"})
+    assert response.status_code == 206
+    assert response.content == DATA[-5:]
+
+
+def test_multiple_ranges(client: TestClient):
+    response = client.get("/ranged", headers={"Range": "bytes=0-1,100-103"})
+    assert response.status_code == 206
+    media_type, _, boundary = response.headers["Content-Type"].partition("; boundary=")
+    assert media_type == "multipart/byteranges"
+    assert response.headers["Content-Length"] == str(len(response.content))
+
+    parts = response.content.split(f"--{boundary}".encode())
+    assert parts[0] == b"" and parts[-1] == b"--\r\n"
+    bodies = []
+    for part in parts[1:-1]:
+        head, _, body = part.partition(b"\r\n\r\n")
+        assert b"Content-Type: application/pdf" in head
+        bodies.append((head.split(b"Content-Range: ")[1], body.removesuffix(b"\r\n")))
+    assert bodies == [
+        (f"bytes 0-1/{len(DATA)}".encode(), DATA[0:2]),
+        (f"bytes 100-103/{len(DATA)}".encode(), DATA[100:104]),
+    ]
+
+
+def test_unsatisfiable_range(client: TestClient):
+    response = client.get("/ranged", headers={"Range": f"bytes={len(DATA)}-"})
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == f"bytes */{len(DATA)}"
+
+
+@pytest.mark.parametrize(
+    "header", ["bytes=9-0", "items=0-1", "bytes=" + ",".join(f"{i}-{i}" for i in range(MAX_RANGES + 1))]
+)
+def test_ignored_range_returns_full_file(client: TestClient, header: str):
+    response = client.get("/ranged", headers={"Range": header})
+    assert response.status_code == 200
+    assert response.content == DATA
+
+
+def test_if_range_with_current_etag_or_date(client: TestClient):
+    etag = client.get("/ranged").headers["ETag"]
+    for if_range in (etag, format_datetime(LAST_MODIFIED, usegmt=True)):
+        response = client.get("/ranged", headers={"Range": "bytes=0-9", "If-Range": if_range})
+        assert response.status_code == 206
+        assert response.content == DATA[:10]
+
+
+@pytest.mark.parametrize(
+    "if_range", ['"outdated"', "W/{etag}", format_datetime(datetime(2025, 1, 1, tzinfo=UTC), usegmt=True)]
+)
+def test_if_range_with_changed_file_returns_full_file(client: TestClient, if_range: str):
+    etag = client.get("/ranged").headers["ETag"]
+    response = client.get("/ranged", headers={"Range": "bytes=0-9", "If-Range": if_range.format(etag=etag)})
+    assert response.status_code == 200
+    assert response.content == DATA
+
+
+@pytest.mark.parametrize(
+    "header",
+    [
+        "If-Modified-Since: " + format_datetime(LAST_MODIFIED, usegmt=True),
+        # Дата без часового пояса считается датой в UTC.
+        "If-Modified-Since: " + format_datetime(LAST_MODIFIED.replace(tzinfo=None)),
+        "If-None-Match: *",
+    ],
+)
+def test_not_modified(client: TestClient, header: str):
+    name, _, value = header.partition(": ")
+    response = client.get("/ranged", headers={name: value})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_not_modified_by_etag(client: TestClient):
+    etag = client.get("/ranged").headers["ETag"]
+    assert client.get("/ranged", headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+
+
+@pytest.mark.parametrize(
+    "value", ["not a date", format_datetime(datetime(2025, 1, 1, tzinfo=UTC), usegmt=True)]
+)
+def test_modified_since(client: TestClient, value: str):
+    assert client.get("/ranged", headers={"If-Modified-Since": value}).status_code == 200
+
+
+def test_delivery_of_local_file(client: TestClient):
+    response = client.get("/delivery", headers={"Range": "bytes=0-9"})
+    assert response.status_code == 206
+    assert response.content == DATA[:10]
+    assert response.headers["Content-Disposition"] == 'attachment; filename="book.pdf"'
+
+
+def test_delivery_through_accel_redirect(client: TestClient):
+    response = client.get("/delivery", params={"accel_redirect_url": "/protected/"})
+    assert response.status_code == 200
+    assert response.content == b""
+    assert response.headers["X-Accel-Redirect"] == f"/protected/{FILE_NAME}"
+    assert response.headers["Content-Disposition"] == 'attachment; filename="book.pdf"'
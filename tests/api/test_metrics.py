@@ -0,0 +1,36 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.infrastructure.settings import settings
+from src.presentation.api.handlers.metrics import router
+
+
+@pytest.fixture
+def client() -> TestClient:
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_metrics_are_hidden_without_configured_token(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "")
+    assert client.get("/internal/metrics", headers={"Authorization": "Bearer "}).status_code == 404
+
+
+@pytest.mark.parametrize("authorization", [None, "Bearer wrong", "Basic secret", "secret"])
+def test_metrics_require_token(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch, authorization: str | None
+):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "secret")
+    headers = {"Authorization": authorization} if authorization else {}
+    response = client.get("/internal/metrics", headers=headers)
+    assert response.status_code == 401
+    assert response.headers["WWW-Authenticate"] == "Bearer"
+
+
+def test_metrics_with_token(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "secret")
+    response = client.get("/internal/metrics", headers={"Authorization": "Bearer secret"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
@@ -0,0 +1,218 @@
+from collections.abc import AsyncIterator
+from typing import Any
+
+import anyio
+import pytest
+
+from src.application.services.cache import AbstractCache
+from src.infrastructure.cache import breaker
+from src.infrastructure.cache.breaker import CircuitBreakerCache, CircuitState
+from src.infrastructure.cache.local import InMemoryCache
+
+pytestmark = pytest.mark.anyio
+
+RESET_TIMEOUT = 30
+
+
+class FakeCache(AbstractCache):
+    """Основной кэш, операции которого завершаются ошибкой, пока он недоступен."""
+
+    def __init__(self) -> None:
+        self.data: dict[str, Any] = {}
+        self.calls: list[tuple[str, str]] = []
+        self.available = True
+        self.failing: set[str] = set()  # Операции, которые завершаются ошибкой и при доступном кэше
+        self.blocked: anyio.Event | None = None  # Операции ждут события, пока оно задано
+
+    async def _call(self, operation: str, argument: str) -> None:
+        self.calls.append((operation, argument))
+        if self.blocked is not None:
+            await self.blocked.wait()
+        if not self.available or operation in self.failing:
+            raise ConnectionError(f"{operation} failed")
+
+    async def get(self, key: str) -> Any | None:
+        await self._call("get", key)
+        return self.data.get(key)
+
+    async def set(self, key: str, value: Any, timeout: int) -> None:
+        await self._call("set", key)
+        self.data[key] = value
+
+    async def delete(self, key: str) -> None:
+        await self._call("delete", key)
+        self.data.pop(key, None)
+
+    async def delete_namespace(self, prefix: str) -> None:
+        await self._call("delete_namespace", prefix)
+
+    async def invalidate_namespace(self, namespace: str) -> None:
+        await self._call("invalidate_namespace", namespace)
+
+
+class Clock:
+    """Замена модуля `time` в выключателе, время изменяется тестом."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(breaker, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def backend() -> FakeCache:
+    return FakeCache()
+
+
+@pytest.fixture
+async def fallback() -> AsyncIterator[InMemoryCache]:
+    fallback = InMemoryCache()
+    yield fallback
+    await fallback.close()
+
+
+@pytest.fixture
+def cache(backend: FakeCache, fallback: InMemoryCache, clock: Clock) -> CircuitBreakerCache:
+    return CircuitBreakerCache(backend, fallback, failure_threshold=2, reset_timeout=RESET_TIMEOUT)
+
+
+async def open_circuit(cache: CircuitBreakerCache, backend: FakeCache) -> None:
+    backend.available = False
+    for _ in range(cache.failure_threshold):
+        await cache.get("probe")
+    assert cache.state is CircuitState.open
+
+
+async def test_opens_after_consecutive_failures(cache: CircuitBreakerCache, backend: FakeCache):
+    backend.available = False
+    assert await cache.get("key") is None
+    assert cache.state is CircuitState.closed
+
+    await cache.set("key", "value", 60)
+    assert cache.state is CircuitState.open
+    assert cache.stats["opened_total"] == 1
+
+    # Пока выключатель разомкнут, основной кэш не используется, а запросы обслуживает кэш процесса.
+    calls = len(backend.calls)
+    assert await cache.get("key") == "value"
+    assert len(backend.calls) == calls
+
+
+async def test_success_resets_failure_count(cache: CircuitBreakerCache, backend: FakeCache):
+    backend.available = False
+    await cache.get("key")
+    backend.available = True
+    await cache.get("key")
+    backend.available = False
+    await cache.get("key")
+    assert cache.state is CircuitState.closed
+
+
+async def test_half_open_probe_closes_circuit(
+    cache: CircuitBreakerCache, backend: FakeCache, fallback: InMemoryCache, clock: Clock
+):
+    await open_circuit(cache, backend)
+    await cache.set("key", "stale", 60)
+
+    clock.now += RESET_TIMEOUT
+    assert cache.state is CircuitState.half_open
+    backend.available = True
+    backend.data["key"] = "fresh"
+
+    assert await cache.get("key") == "fresh"
+    assert cache.state is CircuitState.closed
+    # Значения, записанные в кэш процесса во время недоступности, сбрасываются.
+    assert await fallback.get("key") is None
+
+
+async def test_half_open_probe_failure_reopens_circuit(
+    cache: CircuitBreakerCache, backend: FakeCache, clock: Clock
+):
+    await open_circuit(cache, backend)
+    clock.now += RESET_TIMEOUT
+    calls = len(backend.calls)
+
+    await cache.get("key")
+    assert len(backend.calls) == calls + 1
+    assert cache.state is CircuitState.open
+
+    clock.now += RESET_TIMEOUT - 1
+    assert cache.state is CircuitState.open
+    clock.now += 1
+    assert cache.state is CircuitState.half_open
+
+
+async def test_half_open_allows_limited_probe_calls(
+    cache: CircuitBreakerCache, backend: FakeCache, clock: Clock
+):
+    await open_circuit(cache, backend)
+    clock.now += RESET_TIMEOUT
+    backend.available = True
+    backend.blocked = anyio.Event()
+    calls = len(backend.calls)
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(cache.get, "probe")
+        await anyio.wait_all_tasks_blocked()
+        # Второй запрос не ждет пробный запрос и обслуживается кэшем процесса.
+        assert await cache.get("other") is None
+        assert backend.calls[calls:] == [("get", "probe")]
+        backend.blocked.set()
+
+    assert cache.state is CircuitState.closed
+
+
+async def test_pending_invalidations_are_replayed_after_recovery(
+    cache: CircuitBreakerCache, backend: FakeCache, fallback: InMemoryCache, clock: Clock
+):
+    await open_circuit(cache, backend)
+    await fallback.set("books:1", "value", 60)
+    await cache.delete("books:1")
+    await cache.delete_namespace("shelves:")
+    await cache.invalidate_namespace("recent")
+    assert await fallback.get("books:1") is None
+
+    clock.now += RESET_TIMEOUT
+    backend.available = True
+    calls = len(backend.calls)
+    await cache.get("probe")
+
+    assert cache.state is CircuitState.closed
+    assert backend.calls[calls:] == [
+        ("get", "probe"),
+        ("delete", "books:1"),
+        ("delete_namespace", "shelves:"),
+        ("invalidate_namespace", "recent"),
+    ]
+
+    # Повторенные удаления больше не выполняются.
+    await cache.get("probe")
+    assert backend.calls[-1] == ("get", "probe")
+
+
+async def test_failed_replay_keeps_pending_invalidations(
+    cache: CircuitBreakerCache, backend: FakeCache, clock: Clock
+):
+    await open_circuit(cache, backend)
+    await cache.delete("books:1")
+
+    clock.now += RESET_TIMEOUT
+    backend.available = True
+    backend.failing = {"delete"}
+    await cache.get("probe")
+    assert cache.state is CircuitState.open
+
+    clock.now += RESET_TIMEOUT
+    backend.failing = set()
+    calls = len(backend.calls)
+    await cache.get("probe")
+    assert cache.state is CircuitState.closed
+    assert backend.calls[calls:] == [("get", "probe"), ("delete", "books:1")]
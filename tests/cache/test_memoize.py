@@ -0,0 +1,223 @@
+from collections.abc import AsyncIterator
+
+import anyio
+import pytest
+
+from src.application.services.memoize import (
+    MAX_KEY_LENGTH,
+    CacheMode,
+    NegativeCacheEntry,
+    cache_mode,
+    cached,
+    make_cache_key,
+)
+from src.application.services.single_flight import SingleFlight
+from src.domain.common.exceptions import ObjectNotFoundError
+from src.infrastructure.cache.local import InMemoryCache
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def cache() -> AsyncIterator[InMemoryCache]:
+    cache = InMemoryCache()
+    yield cache
+    await cache.close()
+
+
+class Loader:
+    """Кешируемые функции, которые запоминают свои вызовы и возвращают `result`."""
+
+    def __init__(self, cache: InMemoryCache) -> None:
+        self.cache = cache
+        self.calls: list[tuple[int, int]] = []
+        self.result: str | None = "value"
+        self.error: Exception | None = None
+
+    async def _call(self, book_id: int, page: int) -> str | None:
+        self.calls.append((book_id, page))
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    @cached(timeout=60, namespace="book")
+    async def get(self, book_id: int, page: int = 1) -> str | None:
+        return await self._call(book_id, page)
+
+    @cached(timeout=60, namespace="book_by_id", key=("book_id",))
+    async def get_by_id(self, book_id: int, page: int = 1) -> str | None:
+        return await self._call(book_id, page)
+
+    @cached(timeout=60, namespace="negative", negative_timeout=30)
+    async def get_or_none(self, book_id: int, page: int = 1) -> str | None:
+        return await self._call(book_id, page)
+
+
+@pytest.fixture
+def loader(cache: InMemoryCache) -> Loader:
+    return Loader(cache)
+
+
+def test_cache_key_does_not_depend_on_argument_order():
+    assert make_cache_key("books", page=2, book_id=1) == make_cache_key("books", book_id=1, page=2)
+    assert make_cache_key("books", book_id=1, page=2) == "books:book_id=1:page=2"
+
+
+def test_cache_key_quotes_values():
+    assert make_cache_key("tags", search="a:b c") == "tags:search=a%3Ab%20c"
+
+
+def test_long_cache_key_is_hashed():
+    key = make_cache_key("tags", search="x" * MAX_KEY_LENGTH)
+    namespace, _, suffix = key.partition(":")
+    assert namespace == "tags"
+    assert len(suffix) == 64
+
+
+def test_function_without_cache_getter_is_rejected():
+    with pytest.raises(TypeError):
+
+        @cached(timeout=60)
+        async def get(book_id: int) -> int:
+            return book_id
+
+
+async def test_positional_and_keyword_calls_share_key(loader: Loader, cache: InMemoryCache):
+    assert await loader.get(1) == "value"
+    assert await loader.get(1, 1) == "value"
+    assert await loader.get(book_id=1, page=1) == "value"
+    assert await loader.get(page=1, book_id=1) == "value"
+    assert loader.calls == [(1, 1)]
+    assert await cache.get("book:book_id=1:page=1") == "value"
+
+    assert await loader.get(1, page=2) == "value"
+    assert loader.calls == [(1, 1), (1, 2)]
+
+
+async def test_key_arguments(loader: Loader):
+    await loader.get_by_id(1, page=1)
+    await loader.get_by_id(1, page=2)
+    await loader.get_by_id(2, page=2)
+    assert loader.calls == [(1, 1), (2, 2)]
+
+
+async def test_key_function(cache: InMemoryCache):
+    calls = []
+
+    @cached(timeout=60, namespace="books", key=lambda user_id, search: search.lower(), cache=lambda: cache)
+    async def search_books(user_id: int, search: str) -> list[int]:
+        calls.append(search)
+        return [user_id]
+
+    assert await search_books(1, "Python") == [1]
+    assert await search_books(2, search="PYTHON") == [1]
+    assert calls == ["Python"]
+    assert await cache.get("books:python") == [1]
+
+
+async def test_none_is_not_cached_without_negative_timeout(loader: Loader):
+    loader.result = None
+    assert await loader.get(1) is None
+    assert await loader.get(1) is None
+    assert len(loader.calls) == 2
+
+
+async def test_none_is_cached_with_negative_timeout(loader: Loader, cache: InMemoryCache):
+    loader.result = None
+    assert await loader.get_or_none(1) is None
+    assert await loader.get_or_none(1) is None
+    assert len(loader.calls) == 1
+    assert await cache.get("negative:book_id=1:page=1") == NegativeCacheEntry()
+
+
+async def test_not_found_error_is_cached_with_negative_timeout(loader: Loader):
+    loader.error = ObjectNotFoundError("Book 1 not found")
+    for _ in range(2):
+        with pytest.raises(ObjectNotFoundError, match="Book 1 not found"):
+            await loader.get_or_none(1)
+    assert len(loader.calls) == 1
+
+
+async def test_not_found_error_is_not_cached_without_negative_timeout(loader: Loader):
+    loader.error = ObjectNotFoundError("Book 1 not found")
+    for _ in range(2):
+        with pytest.raises(ObjectNotFoundError):
+            await loader.get(1)
+    assert len(loader.calls) == 2
+
+
+async def test_other_errors_are_not_cached(loader: Loader):
+    loader.error = ValueError("broken")
+    with pytest.raises(ValueError):
+        await loader.get_or_none(1)
+    loader.error = None
+    assert await loader.get_or_none(1) == "value"
+    assert len(loader.calls) == 2
+
+
+async def test_negative_entry_of_unknown_error_is_a_miss(loader: Loader, cache: InMemoryCache):
+    await cache.set("negative:book_id=1:page=1", NegativeCacheEntry(error="RemovedError"), 30)
+    assert await loader.get_or_none(1) == "value"
+    assert len(loader.calls) == 1
+
+
+async def test_bypass_mode_does_not_use_cache(loader: Loader, cache: InMemoryCache):
+    await cache.set("book:book_id=1:page=1", "stale", 60)
+    with cache_mode(CacheMode.bypass):
+        assert await loader.get(1) == "value"
+        assert await loader.get(2) == "value"
+    assert await cache.get("book:book_id=1:page=1") == "stale"
+    assert await cache.get("book:book_id=2:page=1") is None
+    assert len(loader.calls) == 2
+
+
+async def test_refresh_mode_overwrites_cache(loader: Loader, cache: InMemoryCache):
+    await cache.set("book:book_id=1:page=1", "stale", 60)
+    with cache_mode(CacheMode.refresh):
+        assert await loader.get(1) == "value"
+    assert await cache.get("book:book_id=1:page=1") == "value"
+
+    # После выхода из блока восстанавливается режим по умолчанию.
+    assert await loader.get(1) == "value"
+    assert len(loader.calls) == 1
+
+
+async def test_cache_mode_is_local_to_task(loader: Loader, cache: InMemoryCache):
+    await cache.set("book:book_id=1:page=1", "cached", 60)
+    results = {}
+
+    async def bypass() -> None:
+        with cache_mode(CacheMode.bypass):
+            await anyio.sleep(0.01)
+            results["bypass"] = await loader.get(1)
+
+    async def default() -> None:
+        results["default"] = await loader.get(1)
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(bypass)
+        tg.start_soon(default)
+    assert results == {"bypass": "value", "default": "cached"}
+
+
+async def test_concurrent_misses_call_function_once(cache: InMemoryCache):
+    calls = 0
+    flight = SingleFlight()
+
+    @cached(timeout=60, cache=lambda: cache, single_flight=lambda: flight)
+    async def load(book_id: int) -> int:
+        nonlocal calls
+        calls += 1
+        await anyio.sleep(0.01)
+        return book_id
+
+    results = []
+
+    async def call() -> None:
+        results.append(await load(1))
+
+    async with anyio.create_task_group() as tg:
+        for _ in range(5):
+            tg.start_soon(call)
+    assert results == [1] * 5
+    assert calls == 1
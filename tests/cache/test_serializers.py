@@ -0,0 +1,83 @@
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+import orjson
+import pytest
+
+from src.application.books.dto import BookDTO, PublisherDTO
+from src.application.services.cache import CacheSerializer
+from src.application.services.memoize import NegativeCacheEntry
+from src.application.services.stale_cache import StaleCacheEntry
+from src.infrastructure.cache.serializers import OrjsonSerializer
+
+
+@dataclass
+class UnregisteredDTO:
+    value: int
+
+
+def make_book() -> BookDTO:
+    return BookDTO(
+        id=1,
+        user_id=1,
+        publisher=PublisherDTO(id=1, name="publisher"),
+        title="title",
+        description="description",
+        preview_image="previews/1.png",
+        authors="author",
+        pages=10,
+        size=1024,
+        year=2020,
+        private=False,
+        language="ru",
+        tags=["tag"],
+        preview_thumbnails=["small"],
+    )
+
+
+@pytest.fixture
+def serializer() -> OrjsonSerializer:
+    return OrjsonSerializer()
+
+
+def test_round_trip_registered_dataclasses(serializer: OrjsonSerializer):
+    value = StaleCacheEntry(value=[make_book()], stale_at=1.5)
+    assert serializer.loads(serializer.dumps(value)) == value
+    assert serializer.loads(serializer.dumps(NegativeCacheEntry(error="E"))) == NegativeCacheEntry(error="E")
+
+
+def test_round_trip_tuples_and_datetimes(serializer: OrjsonSerializer):
+    value = {"cursor": (2020, 1), "at": datetime(2026, 1, 1, tzinfo=UTC)}
+    assert serializer.loads(serializer.dumps(value)) == value
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        {"__type__": "os:system", "x": 1},
+        {"__tuple__": [1, 2]},
+        {"__datetime__": "2026-01-01T00:00:00"},
+        {"__dict__": {"a": 1}},
+    ],
+)
+def test_user_dicts_with_marker_keys_are_not_interpreted(serializer: OrjsonSerializer, value: dict):
+    assert serializer.loads(serializer.dumps(value)) == value
+
+
+def test_unregistered_dataclass_is_not_written(serializer: OrjsonSerializer):
+    with pytest.raises(CacheSerializer.SerializationError):
+        serializer.dumps(UnregisteredDTO(value=1))
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"__type__": "os:system"},
+        {"__type__": f"{__name__}:UnregisteredDTO", "value": 1},
+        {"__type__": "src.application.books.dto:PublisherDTO", "unknown": 1},
+        {"__tuple__": [1], "extra": 1},
+    ],
+)
+def test_unknown_type_tags_are_rejected(serializer: OrjsonSerializer, data: dict):
+    with pytest.raises(CacheSerializer.SerializationError):
+        serializer.loads(orjson.dumps(data))
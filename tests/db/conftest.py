@@ -0,0 +1,65 @@
+import asyncio
+import os
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from tests.db.seed import SEED_STATEMENTS
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+
+
+@pytest.fixture(scope="session")
+def database_url() -> str:
+    """
+    Адрес тестовой базы PostgreSQL из переменной окружения `TEST_DATABASE_URL`.
+    Схема `public` этой базы пересоздается, поэтому рабочую базу указывать нельзя.
+    """
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    return url
+
+
+async def _reset_schema(url: str) -> None:
+    engine = create_async_engine(url, poolclass=NullPool)
+    async with engine.begin() as connection:
+        await connection.execute(text("DROP SCHEMA public CASCADE"))
+        await connection.execute(text("CREATE SCHEMA public"))
+    await engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def migrated_database(database_url: str) -> str:
+    """Пересоздает схему и применяет все миграции, чтобы проверялись индексы из миграций, а не из моделей."""
+    asyncio.run(_reset_schema(database_url))
+    config = Config()
+    config.set_main_option("script_location", str(ROOT_DIR / "src/infrastructure/db/migrations"))
+    config.set_main_option("sqlalchemy.url", database_url)
+    command.upgrade(config, "head")
+    return database_url
+
+
+@pytest.fixture(scope="session")
+async def engine(migrated_database: str) -> AsyncIterator[AsyncEngine]:
+    """Движок тестовой базы, заполненной данными и со свежей статистикой планировщика."""
+    engine = create_async_engine(migrated_database, poolclass=NullPool)
+    async with engine.begin() as connection:
+        for statement in SEED_STATEMENTS:
+            await connection.execute(statement)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+async def session(engine: AsyncEngine) -> AsyncIterator[AsyncSession]:
+    """Сессия теста, изменения которой откатываются."""
+    async with AsyncSession(engine, expire_on_commit=False, autoflush=False) as session:
+        yield session
+        await session.rollback()
@@ -0,0 +1,105 @@
+import json
+from collections.abc import Awaitable, Iterator
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Запросы, для которых строится план. Служебные запросы драйвера (`SHOW`, `BEGIN`) пропускаются.
+EXPLAINABLE_STATEMENTS = ("SELECT", "WITH", "UPDATE", "DELETE", "INSERT")
+
+
+@dataclass(slots=True, kw_only=True)
+class QueryPlan:
+    """
+    План выполнения SQL запроса, полученный через `EXPLAIN (FORMAT JSON)`.
+
+    Attributes:
+        statement: SQL запрос в том виде, в котором он был передан драйверу
+        plan: Корневой узел плана
+    """
+
+    statement: str
+    plan: dict[str, Any]
+
+    def nodes(self) -> Iterator[dict[str, Any]]:
+        """Обходит все узлы плана, включая узлы подзапросов и CTE."""
+        stack = [self.plan]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(node.get("Plans", ()))
+
+    @property
+    def index_names(self) -> set[str]:
+        """Индексы, которые используются в плане."""
+        return {node["Index Name"] for node in self.nodes() if "Index Name" in node}
+
+    @property
+    def seq_scanned_tables(self) -> set[str]:
+        """Таблицы, которые читаются полностью (`Seq Scan`)."""
+        return {node["Relation Name"] for node in self.nodes() if node["Node Type"] == "Seq Scan"}
+
+    def reads(self, table: str) -> bool:
+        """Проверяет, обращается ли запрос к таблице `table`."""
+        return any(node.get("Relation Name") == table for node in self.nodes())
+
+
+@dataclass(slots=True)
+class _QueryRecorder:
+    """Запоминает запросы и параметры, переданные драйверу на соединении сессии."""
+
+    queries: list[tuple[str, Any]] = field(default_factory=list)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if statement.lstrip().upper().startswith(EXPLAINABLE_STATEMENTS):
+            self.queries.append((statement, parameters))
+
+
+async def explain(session: AsyncSession, call: Awaitable[Any]) -> list[QueryPlan]:
+    """
+    Выполняет вызов репозитория и возвращает планы всех выполненных им запросов.
+
+    Запросы перехватываются событием `before_cursor_execute` и затем передаются в
+    `EXPLAIN (FORMAT JSON)` с теми же параметрами, поэтому план строится для того SQL,
+    который на самом деле формирует репозиторий.
+
+    :param session: Сессия, через которую работает репозиторий.
+    :param call: Корутина вызова метода репозитория.
+    :return: Планы запросов в порядке выполнения.
+    """
+    connection = await session.connection()
+    recorder = _QueryRecorder()
+    event.listen(connection.sync_engine, "before_cursor_execute", recorder)
+    try:
+        await call
+    finally:
+        event.remove(connection.sync_engine, "before_cursor_execute", recorder)
+
+    plans = []
+    for statement, parameters in recorder.queries:
+        result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+        explained = result.scalar_one()
+        if isinstance(explained, str):
+            explained = json.loads(explained)
+        plans.append(QueryPlan(statement=statement, plan=explained[0]["Plan"]))
+    return plans
+
+
+def assert_index_used(plans: list[QueryPlan], table: str, index: str) -> None:
+    """
+    Проверяет, что таблица `table` читается по индексу `index` и ни один запрос не читает ее полностью.
+
+    :param plans: Планы запросов вызова репозитория.
+    :param table: Имя таблицы.
+    :param index: Имя индекса, который должен использоваться.
+    :raises AssertionError: Если к таблице нет запросов, индекс не используется
+                            или таблица читается полностью.
+    """
+    table_plans = [plan for plan in plans if plan.reads(table)]
+    assert table_plans, f"No queries to `{table}` were executed"
+    assert any(index in plan.index_names for plan in table_plans), f"`{index}` is not used:\n{table_plans}"
+    for plan in table_plans:
+        message = f"`{table}` is scanned by:\n{plan.statement}\n{plan.plan}"
+        assert table not in plan.seq_scanned_tables, message
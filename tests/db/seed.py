@@ -0,0 +1,73 @@
+from sqlalchemy import text
+
+# Объем тестовых данных. Планировщик выбирает индексы по статистике, поэтому данных должно быть
+# достаточно, чтобы выборка по одному пользователю или книге была заметно дешевле полного просмотра.
+USERS = 1_000
+PUBLISHERS = 100
+TAGS = 200
+BOOKS = 100_000
+BOOKSHELVES = 2_000
+ROWS_PER_TABLE = 100_000
+
+SEED_STATEMENTS = (
+    text("""
+        INSERT INTO users (username, password)
+        SELECT 'user' || n, 'password' FROM generate_series(1, :users) AS n
+    """).bindparams(users=USERS),
+    text("""
+        INSERT INTO publishers (name)
+        SELECT 'publisher ' || n FROM generate_series(1, :publishers) AS n
+    """).bindparams(publishers=PUBLISHERS),
+    text("""
+        INSERT INTO tag (name)
+        SELECT 'tag ' || n FROM generate_series(1, :tags) AS n
+    """).bindparams(tags=TAGS),
+    text("""
+        INSERT INTO books (
+            user_id, publisher_id, title, preview_image, file, authors, description,
+            pages, size, year, private, language
+        )
+        SELECT
+            n % :users + 1, n % :publishers + 1, 'book ' || n, 'previews/' || n || '.png',
+            'books/' || n || '.pdf', 'author ' || n % 5000, 'description of book ' || n,
+            n % 900 + 10, n * 1024, 1900 + n % 125, n % 10 = 0, 'ru'
+        FROM generate_series(1, :books) AS n
+    """).bindparams(users=USERS, publishers=PUBLISHERS, books=BOOKS),
+    text("""
+        INSERT INTO book_tag_association (book_id, tag_id)
+        SELECT n % :books + 1, n % :tags + 1 FROM generate_series(1, :rows) AS n
+    """).bindparams(books=BOOKS, tags=TAGS, rows=ROWS_PER_TABLE),
+    text("""
+        INSERT INTO favorite_books (book_id, user_id)
+        SELECT n % :books + 1, n % :users + 1 FROM generate_series(1, :rows) AS n
+    """).bindparams(books=BOOKS, users=USERS, rows=ROWS_PER_TABLE),
+    text("""
+        INSERT INTO books_read (book_id, user_id)
+        SELECT (n * 7) % :books + 1, n % :users + 1 FROM generate_series(1, :rows) AS n
+    """).bindparams(books=BOOKS, users=USERS, rows=ROWS_PER_TABLE),
+    text("""
+        INSERT INTO users_data (user_id, book_id, pdf_history, pdf_history_updated_at)
+        SELECT n % :users + 1, n % :books + 1, '{}', now() - n * interval '1 minute'
+        FROM generate_series(1, :rows) AS n
+    """).bindparams(users=USERS, books=BOOKS, rows=ROWS_PER_TABLE),
+    text("""
+        INSERT INTO comments (user_id, book_id, text, created_at)
+        SELECT n % :users + 1, n % :books + 1, 'comment ' || n, now() - n * interval '1 minute'
+        FROM generate_series(1, :rows) AS n
+    """).bindparams(users=USERS, books=BOOKS, rows=ROWS_PER_TABLE),
+    text("""
+        INSERT INTO bookshelf (name, description, user_id, private)
+        SELECT 'bookshelf ' || n, 'description of bookshelf ' || n, n % :users + 1, n % 5 = 0
+        FROM generate_series(1, :bookshelves) AS n
+    """).bindparams(users=USERS, bookshelves=BOOKSHELVES),
+    text("""
+        INSERT INTO bookshelf_book_association (book_id, bookshelf_id)
+        SELECT n % :books + 1, n % :bookshelves + 1 FROM generate_series(1, :rows) AS n
+    """).bindparams(books=BOOKS, bookshelves=BOOKSHELVES, rows=ROWS_PER_TABLE),
+    text("""
+        INSERT INTO refresh_tokens (user_id, token_hash, issued_at, expire_at, revoked)
+        SELECT n % :users + 1, md5(n::text), n, now() + interval '1 day', false
+        FROM generate_series(1, :rows) AS n
+    """).bindparams(users=USERS, rows=ROWS_PER_TABLE),
+    text("ANALYZE"),
+)
@@ -0,0 +1,103 @@
+"""
+Регрессионные тесты планов запросов репозиториев.
+
+Каждый тест выполняет метод репозитория на заполненной базе, получает план его запросов через
+`EXPLAIN (FORMAT JSON)` и проверяет, что таблица читается по индексу из миграций, а не полным просмотром.
+Для запуска нужна база PostgreSQL в `TEST_DATABASE_URL`, без нее тесты пропускаются.
+"""
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.domain.books.entities import BookCursor, BookFilter, BookmarksQueryFilter
+from src.domain.bookshelves.entities import BookshelfFilter
+from src.domain.comments.entities import CommentFilter
+from src.domain.history.entities import BookReadHistoryFilter
+from src.infrastructure.db.repositories.books_repo import SqlAlchemyBookRepository
+from src.infrastructure.db.repositories.bookshelves_repo import SqlAlchemyBookshelfRepository
+from src.infrastructure.db.repositories.comments_repo import SqlAlchemyCommentRepository
+from src.infrastructure.db.repositories.history_repo import SqlAlchemyBookReadHistoryRepositoryRepository
+from src.infrastructure.db.repositories.refresh_token_repo import SqlAlchemyRefreshTokenRepository
+from tests.db.plans import assert_index_used, explain
+
+pytestmark = pytest.mark.anyio
+
+USER_ID = 7
+BOOK_ID = 42
+
+
+async def test_books_list_uses_year_id_index(session: AsyncSession):
+    repo = SqlAlchemyBookRepository(session)
+    plans = await explain(session, repo.get_filtered_id_list(BookFilter(viewer_id=USER_ID)))
+    assert_index_used(plans, "books", "ix__books__year_id")
+
+
+async def test_books_list_cursor_uses_year_id_index(session: AsyncSession):
+    repo = SqlAlchemyBookRepository(session)
+    filter_ = BookFilter(viewer_id=USER_ID, cursor=BookCursor(values=(2000, 50_000)))
+    plans = await explain(session, repo.get_filtered_id_list(filter_))
+    assert_index_used(plans, "books", "ix__books__year_id")
+
+
+async def test_private_books_use_partial_user_index(session: AsyncSession):
+    repo = SqlAlchemyBookRepository(session)
+    plans = await explain(
+        session, repo.get_filtered_id_list(BookFilter(viewer_id=USER_ID, only_private=True))
+    )
+    assert_index_used(plans, "books", "ix__books__user_id_private")
+
+
+@pytest.mark.parametrize(
+    ("method", "table"),
+    [("get_favorite_book_ids", "favorite_books"), ("get_read_book_ids", "books_read")],
+)
+@pytest.mark.parametrize("cursor", [None, BookCursor(values=(50_000,))])
+async def test_bookmark_pages_use_user_id_id_index(
+    session: AsyncSession, method: str, table: str, cursor: BookCursor | None
+):
+    repo = SqlAlchemyBookRepository(session)
+    filter_ = BookmarksQueryFilter(user_id=USER_ID, page=1, page_size=20, cursor=cursor)
+    plans = await explain(session, getattr(repo, method)(filter_))
+    assert_index_used(plans, table, f"ix__{table}__user_id_id")
+
+
+@pytest.mark.parametrize(
+    ("method", "table"),
+    [("is_favorite_by_user", "favorite_books"), ("is_read_by_user", "books_read")],
+)
+async def test_bookmark_lookup_uses_user_id_book_id_index(session: AsyncSession, method: str, table: str):
+    repo = SqlAlchemyBookRepository(session)
+    plans = await explain(session, getattr(repo, method)(BOOK_ID, USER_ID))
+    assert_index_used(plans, table, f"ix__{table}__user_id_book_id")
+
+
+async def test_read_history_uses_user_index(session: AsyncSession):
+    repo = SqlAlchemyBookReadHistoryRepositoryRepository(session)
+    plans = await explain(
+        session, repo.get_filtered(BookReadHistoryFilter(user_id=USER_ID, page=1, page_size=20))
+    )
+    assert_index_used(plans, "users_data", "ix__users_data__user_id_book_id_pdf_history_updated_at")
+
+
+async def test_book_comments_use_book_id_created_at_index(session: AsyncSession):
+    repo = SqlAlchemyCommentRepository(session)
+    plans = await explain(session, repo.get_filtered(CommentFilter(book_id=BOOK_ID, page=1, page_size=20)))
+    assert_index_used(plans, "comments", "ix__comments__book_id_created_at")
+
+
+async def test_book_bookshelves_use_association_indexes(session: AsyncSession):
+    repo = SqlAlchemyBookshelfRepository(session)
+    filter_ = BookshelfFilter(viewer_id=USER_ID, book_id=BOOK_ID, page=1, page_size=20)
+    plans = await explain(session, repo.get_filtered(filter_))
+    assert_index_used(
+        plans, "bookshelf_book_association", "ix__bookshelf_book_association__book_id_bookshelf_id"
+    )
+    assert_index_used(
+        plans, "bookshelf_book_association", "ix__bookshelf_book_association__bookshelf_id_book_id"
+    )
+
+
+async def test_revoke_refresh_tokens_uses_user_index(session: AsyncSession):
+    repo = SqlAlchemyRefreshTokenRepository(session)
+    plans = await explain(session, repo.revoke_all_for_user(USER_ID))
+    assert_index_used(plans, "refresh_tokens", "ix__refresh_tokens__user_id")
@@ -0,0 +1,27 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.domain.books.entities import BookFilter, BookIdPage
+from src.infrastructure.db.repositories.books_repo import SqlAlchemyBookRepository
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_search_by_word_prefixes(session: AsyncSession):
+    repo = SqlAlchemyBookRepository(session)
+    page, total = await repo.get_filtered_ids(BookFilter(search="Boo 4242", page_size=100))
+    assert 4242 in page.ids
+    assert total == len(page.ids)
+
+
+@pytest.mark.parametrize("search", ["!!!", "- _ -"])
+async def test_search_without_words_finds_nothing(session: AsyncSession, search: str):
+    repo = SqlAlchemyBookRepository(session)
+    assert await repo.get_filtered_ids(BookFilter(search=search)) == (BookIdPage(ids=[]), 0)
+
+
+async def test_blank_search_is_ignored(session: AsyncSession):
+    repo = SqlAlchemyBookRepository(session)
+    page = await repo.get_filtered_id_list(BookFilter(search="  ", page_size=5))
+    assert page.ids == (await repo.get_filtered_id_list(BookFilter(page_size=5))).ids
+    assert len(page.ids) == 5
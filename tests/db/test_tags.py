@@ -0,0 +1,19 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.infrastructure.db.repositories.books_repo import SqlAlchemyBookRepository
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_new_tags_are_deduplicated_case_insensitively(session: AsyncSession):
+    repo = SqlAlchemyBookRepository(session)
+    tags = await repo._get_or_create_tags(["Python", "python", " PYTHON ", ""])
+    assert [tag.name for tag in tags] == ["Python"]
+    assert tags[0].id is not None
+
+
+async def test_existing_tag_is_found_case_insensitively(session: AsyncSession):
+    repo = SqlAlchemyBookRepository(session)
+    tags = await repo._get_or_create_tags(["TAG 1", "tag 1"])
+    assert [tag.name for tag in tags] == ["tag 1"]
@@ -0,0 +1,99 @@
+import base64
+import json
+
+import pytest
+
+from src.domain.books.entities import BookCursor, BookFilter
+from src.domain.common.exceptions import ValidationError
+
+SORTED_BY = ["-year", "title", "-id"]
+
+
+def encode_raw(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("values", [(2020, "Книга", 42), (0, "", 1), (2020, "a" * 5, 2**40)])
+def test_cursor_round_trip(values: tuple[int | str, ...]):
+    cursor = BookCursor(values=values)
+    encoded = cursor.encode()
+    assert "=" not in encoded
+    assert BookCursor.decode(encoded, SORTED_BY) == cursor
+
+
+@pytest.mark.parametrize(
+    "encoded",
+    [
+        "",
+        "not base64!",
+        encode_raw(b"not json"),
+        encode_raw(b'{"year": 2020}'),
+        # Количество значений не совпадает с полями сортировки.
+        BookCursor(values=(2020, "title")).encode(),
+        BookCursor(values=(2020, "title", 42, 1)).encode(),
+        # Тип значения не совпадает с типом поля.
+        BookCursor(values=("2020", "title", 42)).encode(),
+        BookCursor(values=(2020, 1, 42)).encode(),
+        encode_raw(json.dumps([2020, "title", True]).encode()),
+        encode_raw(json.dumps([2020, "title", 4.2]).encode()),
+        encode_raw(json.dumps([2020, "title", None]).encode()),
+    ],
+)
+def test_invalid_cursor_is_rejected(encoded: str):
+    with pytest.raises(ValidationError):
+        BookCursor.decode(encoded, SORTED_BY)
+
+
+def test_tampered_cursor_is_rejected():
+    encoded = BookCursor(values=(2020, "title", 42)).encode()
+    with pytest.raises(ValidationError):
+        BookCursor.decode(encoded[:-3], SORTED_BY)
+
+
+def test_cursor_for_unknown_sort_field_is_rejected():
+    encoded = BookCursor(values=("text",)).encode()
+    with pytest.raises(ValidationError):
+        BookCursor.decode(encoded, ["description"])
+
+
+def test_cursor_is_not_available_for_search():
+    with pytest.raises(ValidationError):
+        BookFilter(search="python", cursor=BookCursor(values=(2020, 42)))
+
+
+def test_count_signature_ignores_pagination_and_sorting():
+    base = BookFilter(viewer_id=1, title="Python")
+    other = BookFilter(
+        viewer_id=1,
+        title="Python",
+        page=3,
+        page_size=100,
+        sorted_by=["title", "-id"],
+        cursor=BookCursor(values=("Python", 42)),
+    )
+    assert base.count_signature() == other.count_signature()
+
+
+def test_count_signature_normalizes_values():
+    base = BookFilter(viewer_id=1, title="python", tags=["django", "web"])
+    other = BookFilter(viewer_id=1, title="  Python ", tags=["Web", "django ", "web"])
+    assert base.count_signature() == other.count_signature()
+    assert BookFilter(title=" ").count_signature() == BookFilter().count_signature()
+    assert BookFilter(tags=[]).count_signature() == BookFilter().count_signature()
+
+
+@pytest.mark.parametrize(
+    "changes",
+    [{"viewer_id": 2}, {"title": "Rust"}, {"year": 2020}, {"only_private": True}, {"tags": ["web"]}],
+)
+def test_count_signature_depends_on_conditions(changes: dict):
+    assert (
+        BookFilter(viewer_id=1).count_signature()
+        != BookFilter(**{"viewer_id": 1, **changes}).count_signature()
+    )
+
+
+def test_is_unfiltered():
+    assert BookFilter(viewer_id=1, page=2, sorted_by=["title"]).is_unfiltered
+    assert BookFilter(title=" ", tags=[]).is_unfiltered
+    assert not BookFilter(viewer_id=1, year=2020).is_unfiltered